@@ -0,0 +1,108 @@
+# scripts/agg_cache.py
+"""Bounded, thread-safe LRU cache for dashboard aggregations.
+
+Entries are keyed on a canonical hash of (data version, filter state,
+aggregation name), so identical filter states from any session share one
+result. Memory is bounded by an approximate byte budget; the least recently
+used entries are evicted first.
+"""
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _canonical(value):
+    """JSON-friendly, order-stable form of a filter state value."""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (set, frozenset)):
+        return sorted(_canonical(v) for v in value)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if hasattr(value, "tolist"):
+        return _canonical(value.tolist())
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def cache_key(data_version, filters, name):
+    payload = json.dumps([_canonical(data_version), _canonical(filters), name], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _size_of(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, tuple):
+        return sum(_size_of(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class AggregationCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, name, compute, data_version, filters):
+        """Return the cached result of `compute()` for this state, computing it on a miss."""
+        hit, value = self.lookup(name, data_version, filters)
+        if hit:
+            return value
+        # computed outside the lock so other sessions are not blocked meanwhile
+        value = compute()
+        self.store(name, data_version, filters, value)
+        return value
+
+    def lookup(self, name, data_version, filters):
+        """(True, value) on a hit, (False, None) on a miss."""
+        key = cache_key(data_version, filters, name)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key][0]
+            self.misses += 1
+        return False, None
+
+    def store(self, name, data_version, filters, value):
+        key = cache_key(data_version, filters, name)
+        size = _size_of(value)
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (value, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted_size) = self._entries.popitem(last=False)
+                    self.bytes -= evicted_size
+                    self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,277 @@
+# scripts/aggregate_service.py
+"""Small asyncio HTTP/JSON service for the standard sales aggregates.
+
+Power BI (Web connector), the dashboard or any other client can read the
+same aggregates instead of each scanning `orders` with its own queries:
+
+    GET /aggregates                         names and accepted filters
+    GET /aggregates/<name>?start=2019-01-01&end=2019-12-31&country=FR,US&category=Men's Shoes&customer=ann&limit=10
+    GET /health                             data version
+    GET /stats                              queries run, requests coalesced, cache hit rate
+
+Filters are the dashboard's (query_builder.build_where). Queries run on a
+shared connection pool, one thread per pooled connection. Identical requests
+arriving while their query runs wait for that one query instead of issuing
+their own, and results are kept in an LRU cache keyed on the data version
+(row count, max key, update time of orders / order_items), which is checked
+at most every VERSION_TTL seconds.
+
+    python scripts/aggregate_service.py --port 8765
+    python scripts/aggregate_service.py --sqlite data/bench/10k/orders-seed42.sqlite   # local SQLite stand-in
+"""
+import argparse
+import asyncio
+import functools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+from mysql.connector import Error
+
+from agg_cache import AggregationCache
+from query_builder import COUNTRY_COL, build_where, quote
+from report_engine import make_pool, table_version
+
+HOST = "127.0.0.1"
+PORT = 8765
+POOL_SIZE = 4
+# seconds a data version is trusted before it is looked up again
+VERSION_TTL = 5.0
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 1000
+READ_TIMEOUT = 10.0
+
+# aggregate -> (SQL over the filtered orders, reads line items, takes a limit)
+AGGREGATES = {
+    "sales_by_country": (f"""
+        SELECT {quote(COUNTRY_COL)} AS country, SUM(taxful_total_price) AS total_sales, COUNT(*) AS total_orders
+        FROM orders WHERE {{where}}
+        GROUP BY country ORDER BY total_sales DESC""", False, False),
+    "monthly_revenue": ("""
+        SELECT DATE_FORMAT(order_date, %s) AS month, SUM(taxful_total_price) AS monthly_revenue, COUNT(*) AS orders
+        FROM orders WHERE {where}
+        GROUP BY month ORDER BY month""", False, False),
+    "top_customers": ("""
+        SELECT customer_full_name AS customer, SUM(taxful_total_price) AS total_spent, COUNT(*) AS orders
+        FROM orders WHERE {where}
+        GROUP BY customer_full_name ORDER BY total_spent DESC LIMIT %s""", False, True),
+    # per line item, so an order counts towards each of its categories / SKUs
+    "top_categories": ("""
+        SELECT category, SUM(quantity) AS total_quantity_sold, SUM(taxful_price) AS total_revenue
+        FROM order_items {where}
+        GROUP BY category ORDER BY total_revenue DESC LIMIT %s""", True, True),
+    "top_skus": ("""
+        SELECT sku, SUM(quantity) AS qty, SUM(taxful_price) AS total_sales
+        FROM order_items {where}
+        GROUP BY sku ORDER BY total_sales DESC LIMIT %s""", True, True),
+    "top_manufacturers": ("""
+        SELECT manufacturer, SUM(quantity) AS qty, SUM(taxful_price) AS total_sales
+        FROM order_items {where}
+        GROUP BY manufacturer ORDER BY total_sales DESC LIMIT %s""", True, True),
+}
+FILTERS = ["start", "end", "country", "category", "customer", "limit"]
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 503: "Service Unavailable"}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def parse_filters(name, query):
+    """Canonical filter state of a request's query string (the cache / coalescing key)."""
+    params = parse_qs(query, keep_blank_values=False)
+
+    def values(key):
+        # repeated (?country=FR&country=US) or comma separated (?country=FR,US)
+        return sorted({v.strip() for raw in params.get(key, []) for v in raw.split(",") if v.strip()})
+
+    def day(key):
+        if key not in params:
+            return None
+        try:
+            return date.fromisoformat(params[key][-1])
+        except ValueError:
+            raise BadRequest(f"{key} must be a date (YYYY-MM-DD)") from None
+
+    filters = {"start": day("start"), "end": day("end"), "countries": values("country"),
+               "categories": values("category"), "customer": params.get("customer", [""])[-1].strip()}
+    if AGGREGATES[name][2]:
+        try:
+            filters["limit"] = int(params.get("limit", [DEFAULT_LIMIT])[-1])
+        except ValueError:
+            raise BadRequest("limit must be an integer") from None
+        if not 1 <= filters["limit"] <= MAX_LIMIT:
+            raise BadRequest(f"limit must be between 1 and {MAX_LIMIT}")
+    return filters
+
+
+def build_query(name, filters):
+    """Return (sql, params) of one aggregate for a canonical filter state.
+
+    The dashboard also passes the exact `customer_names` its name index resolved.
+    """
+    sql, items, limited = AGGREGATES[name]
+    where, params = build_where(filters["start"], filters["end"], filters["countries"], filters["categories"],
+                                filters["customer"], filters.get("customer_names"))
+    if items:
+        # line items of the matching orders; no subquery when nothing is filtered
+        where = "" if where == "1 = 1" else f"WHERE order_id IN (SELECT order_id FROM orders WHERE {where})"
+    if name == "monthly_revenue":
+        # the format is bound, so the statement has no literal % to escape
+        params = ["%Y-%m"] + params
+    if limited:
+        params = params + [filters["limit"]]
+    return sql.format(where=where), params
+
+
+class AggregateService:
+    def __init__(self, pool, pool_size=POOL_SIZE, version_ttl=VERSION_TTL, cache=None):
+        self.pool = pool
+        # one thread per pooled connection: queries beyond that wait here, not in the pool
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="aggregate")
+        self.version_ttl = version_ttl
+        self.cache = cache or AggregationCache()
+        self.inflight = {}
+        self.version = None
+        self.version_at = 0.0
+        self.queries = 0
+        self.coalesced = 0
+
+    # -------------------------------
+    # Queries (run on the executor threads)
+    # -------------------------------
+    def _fetch_version(self):
+        conn = self.pool.get_connection()
+        try:
+            return {table: table_version(conn, table) for table in ("orders", "order_items")}
+        finally:
+            conn.close()
+
+    def _query(self, name, filters):
+        sql, params = build_query(name, filters)
+        conn = self.pool.get_connection()
+        try:
+            df = pd.read_sql(sql, conn, params=params)
+        finally:
+            conn.close()
+        # MySQL returns SUM() as Decimal
+        for col in df.columns[1:]:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+        return df
+
+    # -------------------------------
+    # Coalescing and caching
+    # -------------------------------
+    async def _coalesced(self, key, fn, *args):
+        """Run `fn(*args)` on the executor, or join the identical call already running."""
+        future = self.inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, functools.partial(fn, *args))
+            self.inflight[key] = future
+            future.add_done_callback(lambda _: self.inflight.pop(key, None))
+            self.queries += 1
+        else:
+            self.coalesced += 1
+        # shielded: a client hanging up must not cancel the query the others wait for
+        return await asyncio.shield(future)
+
+    async def data_version(self):
+        if self.version is None or time.monotonic() - self.version_at >= self.version_ttl:
+            self.version = await self._coalesced(("version",), self._fetch_version)
+            self.version_at = time.monotonic()
+        return self.version
+
+    async def aggregate(self, name, filters):
+        """(rows, data version) of one aggregate."""
+        version = await self.data_version()
+        hit, df = self.cache.lookup(name, version, filters)
+        if not hit:
+            key = (name, json.dumps([version, filters], sort_keys=True, default=str))
+            df = await self._coalesced(key, self._query, name, filters)
+            self.cache.store(name, version, filters, df)
+        return json.loads(df.to_json(orient="records", date_format="iso")), version
+
+    # -------------------------------
+    # HTTP
+    # -------------------------------
+    async def dispatch(self, method, target):
+        """(status, JSON body) for one request."""
+        if method != "GET":
+            return 405, {"error": "only GET is supported"}
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip("/")
+        if path == "/health":
+            return 200, {"status": "ok", "data_version": await self.data_version()}
+        if path == "/stats":
+            return 200, {"queries": self.queries, "coalesced": self.coalesced, "in_flight": len(self.inflight),
+                         "cache": self.cache.stats()}
+        if path == "/aggregates":
+            return 200, {"aggregates": sorted(AGGREGATES), "filters": FILTERS}
+        if path.startswith("/aggregates/") and path.split("/", 2)[2] in AGGREGATES:
+            name = path.split("/", 2)[2]
+            filters = parse_filters(name, url.query)
+            rows, version = await self.aggregate(name, filters)
+            return 200, {"aggregate": name, "filters": filters, "data_version": version, "rows": rows}
+        return 404, {"error": f"unknown path {path or '/'}"}
+
+    async def handle(self, reader, writer):
+        try:
+            try:
+                request_line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                # headers are not used; read up to the blank line ending them
+                while (await asyncio.wait_for(reader.readline(), READ_TIMEOUT)) not in (b"\r\n", b"\n", b""):
+                    pass
+                status, body = await self.dispatch(method, target)
+            except (ValueError, asyncio.TimeoutError) as e:
+                status, body = 400, {"error": str(e) or "malformed request"}
+            except Error as e:
+                status, body = 503, {"error": f"database error: {e}"}
+            payload = json.dumps(body, default=str).encode("utf-8")
+            writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                         "Content-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\n"
+                         "Connection: close\r\n\r\n".encode("latin-1") + payload)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"🚀 Serving aggregates on http://{host}:{port}/aggregates")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the standard sales aggregates over HTTP/JSON.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE, help="pooled MySQL connections")
+    parser.add_argument("--version-ttl", type=float, default=VERSION_TTL,
+                        help="seconds between data version checks")
+    parser.add_argument("--sqlite", metavar="PATH", help="serve a SQLite stand-in database instead of MySQL")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        import bench_backend
+        pool = bench_backend.Pool(args.sqlite)
+    else:
+        from load_to_mysql import DB_CONFIG
+        pool = make_pool(DB_CONFIG, args.pool_size)
+    service = AggregateService(pool, args.pool_size, args.version_ttl)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("👋 Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,78 +1,87 @@
-import pandas as pd
+import argparse
+
 import plotly.express as px
-import mysql.connector
 from mysql.connector import Error
 
+import cohorts
+import snapshot
+from queries import REPORT_QUERIES, ROLLUP_QUERIES
+from report_engine import POOL_SIZE, ReportEngine, make_pool
+from rollups import rollups_available
+
+parser = argparse.ArgumentParser(description="Run the sales reports and chart them.")
+parser.add_argument("--refresh", action="store_true", help="ignore cached results and re-run every query")
+parser.add_argument("--workers", type=int, default=POOL_SIZE, help="queries run concurrently")
+parser.add_argument("--snapshot", action="store_true",
+                    help="answer from the columnar snapshot (scripts/snapshot.py) instead of MySQL")
+parser.add_argument("--rebuild-cohorts", action="store_true",
+                    help="recompute the cohort / RFM state from every order instead of only the new ones")
+args = parser.parse_args()
+
 # -------------------------------
 # STEP 1: Connect to MySQL
 # -------------------------------
-try:
-    conn = mysql.connector.connect(
-        host="localhost",
-        user="datauser",
-        password="Data@123",
-        database="ecom_db"
-    )
-    print("✅ Connected to MySQL successfully!")
-except Error as e:
-    print(f"❌ MySQL Connection Error: {e}")
-    exit()
-
-# Helper function to run queries and return a dataframe
-def run_query(query):
-    print(f"\n📊 Running query:\n{query}\n")
-    return pd.read_sql(query, conn)
+pool = None
+if not args.snapshot:
+    try:
+        pool = make_pool({
+            "host": "localhost",
+            "user": "datauser",
+            "password": "Data@123",
+            "database": "ecom_db"
+        }, size=args.workers)
+        print("✅ Connected to MySQL successfully!")
+    except Error as e:
+        print(f"❌ MySQL Connection Error: {e}")
+        if not snapshot.available():
+            exit()
+        print("⚠️ Falling back to the columnar snapshot.")
 
 # -------------------------------
 # STEP 2: Define and Run Analysis Queries
 # -------------------------------
+if pool is None:
+    if not snapshot.available():
+        print("❌ No snapshot found. Create one with: python scripts/snapshot.py")
+        exit()
+    print(f"🗂️ Using snapshot from {snapshot.read_manifest()['refreshed_at']}.")
+    results = snapshot.run_reports()
+else:
+    # Answer from the pre-aggregated rollups when the loader has built them
+    conn = pool.get_connection()
+    use_rollups = rollups_available(conn)
+    conn.close()
+    if use_rollups:
+        print("⚡ Using rollup tables.")
+        queries = ROLLUP_QUERIES
+    else:
+        queries = REPORT_QUERIES
 
-# 1️⃣ Total Sales by Country
-query1 = """
-SELECT 
-    `geoip.country_iso_code` AS country,
-    SUM(taxful_total_price) AS total_sales
-FROM orders
-GROUP BY `geoip.country_iso_code`
-ORDER BY total_sales DESC;
-"""
-df_country = run_query(query1)
-
-# 2️⃣ Top 10 Customers by Spending
-query2 = """
-SELECT 
-    customer_full_name AS customer,
-    SUM(taxful_total_price) AS total_spent
-FROM orders
-GROUP BY customer_full_name
-ORDER BY total_spent DESC
-LIMIT 10;
-"""
-df_customers = run_query(query2)
-
-# 3️⃣ Monthly Revenue Trend
-query3 = """
-SELECT 
-    DATE_FORMAT(order_date, '%Y-%m') AS month,
-    SUM(taxful_total_price) AS monthly_revenue
-FROM orders
-GROUP BY month
-ORDER BY month;
-"""
-df_monthly = run_query(query3)
+    # Queries run concurrently on pooled connections; results whose tables have not
+    # changed since the last run are read back from .cache/reports instead
+    print("\n📊 Running report queries...")
+    results = ReportEngine(pool, workers=args.workers).run(queries, refresh=args.refresh)
+df_country = results["country_sales"]
+df_customers = results["top_customers"]
+df_monthly = results["monthly_revenue"]
+df_categories = results["top_categories"]
 
-# 4️⃣ Top Product Categories
-query4 = """
-SELECT 
-    category,
-    SUM(total_quantity) AS total_quantity_sold,
-    SUM(taxful_total_price) AS total_revenue
-FROM orders
-GROUP BY category
-ORDER BY total_revenue DESC
-LIMIT 10;
-"""
-df_categories = run_query(query4)
+# Cohorts, retention and RFM: the customer × month state in .cache/cohorts.pkl only takes in
+# orders loaded since the last run
+activity = cohorts.CustomerActivity() if args.rebuild_cohorts else cohorts.load_state()
+if pool is None:
+    orders = snapshot.load_table("orders", columns=["id", "customer_id", "order_date", "taxful_total_price"])
+    activity = cohorts.refresh_from_frame(orders, activity)
+else:
+    conn = pool.get_connection()
+    activity = cohorts.refresh_from_db(conn, activity)
+    conn.close()
+cohorts.save_state(activity)
+df_retention = cohorts.retention_matrix(activity)
+df_repeat = cohorts.repeat_purchases(activity)
+df_segments = cohorts.rfm_segments(cohorts.rfm(activity))
+print(f"\n👥 {len(activity)} customers, repeat-purchase rate {df_repeat['repeat_rate'].iloc[-1]:.1%}")
+print(df_segments.to_string(index=False))
 
 # -------------------------------
 # STEP 3: Generate Visualizations
@@ -96,5 +105,13 @@ fig3.show()
 fig4 = px.bar(df_categories, x="category", y="total_revenue", title="Top Product Categories", color="total_revenue", text_auto=True)
 fig4.show()
 
+# 5️⃣ Cohort Retention
+fig5 = px.imshow(df_retention.drop(columns="customers"), text_auto=".0%", aspect="auto",
+                 labels={"x": "Months since first order", "y": "Cohort", "color": "Retention"}, title="Cohort Retention")
+fig5.show()
+
+# 6️⃣ RFM Segments
+fig6 = px.bar(df_segments, x="segment", y="customers", color="revenue", title="Customers per RFM Segment", text_auto=True)
+fig6.show()
+
 print("\n✅ All visualizations generated successfully!")
-conn.close()
@@ -0,0 +1,200 @@
+# scripts/bench_backend.py
+"""SQLite stand-in for the MySQL server, used by benchmark.py.
+
+It speaks the small part of the mysql.connector API the scripts rely on
+(connect, cursor(buffered=...), execute/executemany with %s parameters,
+fetchone/fetchmany/fetchall, column_names, commit) and rewrites the MySQL
+dialect they emit into SQLite: AUTO_INCREMENT and inline KEY clauses,
+ON DUPLICATE KEY UPDATE, DATE_FORMAT, CRC32 checksums, information_schema
+lookups. It is a stand-in for measuring the Python side and the shape of the
+queries, not a model of MySQL's own performance.
+
+    import bench_backend
+    bench_backend.install("bench/db.sqlite")   # mysql.connector.connect now opens it
+"""
+import re
+import sqlite3
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+import pandas as pd
+import mysql.connector
+from mysql.connector import Error
+
+
+# DATETIME / DATE values are stored as ISO text; midnight is stored as a bare
+# date so `day BETWEEN '2019-03-01' AND '2019-03-31'` behaves like MySQL DATE
+def _iso(value):
+    if value.hour or value.minute or value.second or value.microsecond:
+        return value.isoformat(sep=" ")
+    return value.date().isoformat()
+
+
+sqlite3.register_adapter(pd.Timestamp, _iso)
+sqlite3.register_adapter(datetime, _iso)
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+sqlite3.register_adapter(Decimal, float)
+
+
+def _date_format(value, fmt):
+    if value is None:
+        return None
+    if fmt == "%Y-%m":
+        return str(value)[:7]
+    return pd.Timestamp(value).strftime(fmt.replace("%i", "%M"))
+
+
+def _greatest(*values):
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+def _concat_ws(sep, *values):
+    return sep.join(str(v) for v in values if v is not None)
+
+
+def _crc32(value):
+    return None if value is None else zlib.crc32(str(value).encode("utf-8"))
+
+
+class _BitXor:
+    def __init__(self):
+        self.value = 0
+
+    def step(self, value):
+        if value is not None:
+            self.value ^= int(value)
+
+    def finalize(self):
+        return self.value
+
+
+# (pattern, replacement) applied to every statement, in order
+_DIALECT = [
+    (re.compile(r"\bINT AUTO_INCREMENT PRIMARY KEY", re.I), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\bBIGINT AUTO_INCREMENT PRIMARY KEY", re.I), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r",\s*KEY \w+ \([^)]*\)", re.I), ""),
+    (re.compile(r"\bUNIQUE KEY \w+ \(", re.I), "UNIQUE ("),
+    (re.compile(r"\bENUM\([^)]*\)", re.I), "TEXT"),
+    (re.compile(r"\bON UPDATE CURRENT_TIMESTAMP\b", re.I), ""),
+    (re.compile(r"\bDROP INDEX (`?\w+`?) ON \w+", re.I), r"DROP INDEX \1"),
+    # index prefix lengths: SQLite indexes whole values
+    (re.compile(r"(`[\w.]+`)\(\d+\)(?=[,)])"), r"\1"),
+    (re.compile(r"\bLIKE \?", re.I), r"LIKE ? ESCAPE '\\'"),
+    (re.compile(r"\bDATABASE\(\)", re.I), "'main'"),
+]
+_UPSERT = re.compile(r"\bON DUPLICATE KEY UPDATE\b", re.I)
+_VALUES_REF = re.compile(r"\bVALUES\((`?[\w.]+`?)\)")
+
+# information_schema lookups issued by the loader and the dashboard
+_CATALOG = [
+    (re.compile(r"FROM information_schema\.statistics", re.I),
+     "SELECT name FROM pragma_index_list(?)"),
+    (re.compile(r"SELECT column_name, data_type FROM information_schema\.columns", re.I),
+     "SELECT name, type FROM pragma_table_info(?)"),
+    (re.compile(r"SELECT column_name, column_type FROM information_schema\.columns", re.I),
+     "SELECT name, type FROM pragma_table_info(?)"),
+    (re.compile(r"SELECT column_name FROM information_schema\.columns", re.I),
+     "SELECT name FROM pragma_table_info('orders') ORDER BY cid"),
+    # SQLite does not enforce declared types, so widening a column is a no-op
+    (re.compile(r"^\s*ALTER TABLE \w+ MODIFY\b", re.I), "SELECT 1"),
+]
+
+
+def translate(query, has_params):
+    """Rewrite one MySQL statement into SQLite."""
+    for pattern, replacement in _CATALOG:
+        if pattern.search(query):
+            return replacement
+    if has_params:
+        # pyformat: %s is a placeholder and %% a literal percent only when parameters are bound
+        query = query.replace("%%", "\x00").replace("%s", "?").replace("\x00", "%")
+    for pattern, replacement in _DIALECT:
+        query = pattern.sub(replacement, query)
+    if _UPSERT.search(query):
+        query = _VALUES_REF.sub(r"excluded.\1", _UPSERT.sub("ON CONFLICT DO UPDATE SET", query))
+    return query
+
+
+class Cursor:
+    def __init__(self, conn):
+        self._cursor = sqlite3.Cursor(conn)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def column_names(self):
+        return tuple(d[0] for d in self._cursor.description or ())
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, query, params=None):
+        try:
+            self._cursor.execute(translate(query, params is not None), list(params or ()))
+        except sqlite3.Error as e:
+            raise Error(msg=str(e)) from e
+        return self
+
+    def executemany(self, query, rows):
+        try:
+            self._cursor.executemany(translate(query, True), rows)
+        except sqlite3.Error as e:
+            raise Error(msg=str(e)) from e
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection(sqlite3.Connection):
+    """A sqlite3 connection (so pandas reads it natively) with MySQL-dialect cursors."""
+
+    def cursor(self, buffered=None, **kwargs):
+        return Cursor(self)
+
+    def is_connected(self):
+        return True
+
+
+def connect(path, **kwargs):
+    conn = sqlite3.connect(path, factory=Connection, check_same_thread=False, timeout=60)
+    conn.create_function("DATE_FORMAT", 2, _date_format, deterministic=True)
+    conn.create_function("GREATEST", -1, _greatest, deterministic=True)
+    conn.create_function("CONCAT_WS", -1, _concat_ws, deterministic=True)
+    conn.create_function("CRC32", 1, _crc32, deterministic=True)
+    conn.create_aggregate("BIT_XOR", 1, _BitXor)
+    # bulk-load settings; durability is not what the benchmark measures
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    return conn
+
+
+class Pool:
+    """Stand-in for mysql.connector.pooling.MySQLConnectionPool."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def get_connection(self):
+        return connect(self.path)
+
+
+def install(path):
+    """Route mysql.connector.connect (used by every script) to the SQLite file at `path`."""
+    mysql.connector.connect = lambda **kwargs: connect(path)
@@ -0,0 +1,66 @@
+# scripts/bench_cleaning.py
+"""Micro-benchmark: cleaning.py versus the previous per-cell cleaning code.
+
+Rows are resampled from the dataset up to --rows and both implementations
+clean the same frame; the cost is reported in seconds per million rows.
+
+    python scripts/bench_cleaning.py --rows 1000000
+"""
+import argparse
+import re
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from cleaning import MONEY_COLS, clean_orders
+
+
+def legacy_clean(df):
+    """The loader's cleaning before cleaning.py (format-guessing dates, per-cell regex)."""
+    with warnings.catch_warnings():
+        # pandas warns that it falls back to dateutil for every element
+        warnings.simplefilter("ignore", UserWarning)
+        df["order_date"] = pd.to_datetime(df["order_date"], errors="coerce")
+    for col in MONEY_COLS:
+        df[col] = (
+            df[col]
+            .astype(str)
+            .apply(lambda x: re.sub(r"[^0-9.\-]", "", x.strip()) if x.strip() != "" else "0")
+            .astype(float)
+        )
+    return df
+
+
+def timed(clean, frame, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        df = frame.copy()
+        started = time.perf_counter()
+        clean(df)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark order cleaning.")
+    parser.add_argument("--file", default="data/ecom_dataset.csv")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    source = pd.read_csv(args.file, usecols=["order_date"] + MONEY_COLS)
+    picks = np.random.default_rng(0).integers(0, len(source), args.rows)
+    frame = source.iloc[picks].reset_index(drop=True)
+    print(f"📊 Cleaning {len(frame):,} rows ({frame['order_date'].nunique()} distinct order dates)")
+
+    per_million = 1_000_000 / len(frame)
+    legacy = timed(legacy_clean, frame, args.repeat)
+    current = timed(clean_orders, frame, args.repeat)
+    print(f"   previous code : {legacy * per_million:8.3f} s per million rows")
+    print(f"   cleaning.py   : {current * per_million:8.3f} s per million rows ({legacy / current:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+# scripts/benchmark.py
+"""Reproducible benchmarks of the load path, the reports and the dashboard.
+
+For every scale a seeded synthetic dataset is generated with
+generate_mock_sales.py (cached under data/bench/), then each phase runs in a
+fresh process against a local SQLite stand-in for MySQL (bench_backend.py):
+
+    load       load_to_mysql.load_chunks over the CSV chunks (orders, line items, rollups),
+               or etl_pipeline.load_chunks_parallel with --load-workers / --load-writers
+    reports    the analyze_views.py queries, raw and from the rollups, plus ReportEngine runs
+    dashboard  dashboard.py through Streamlit's AppTest: cold start, reruns, filters, tabs
+
+Throughput, latency percentiles and the peak RSS of each phase are written
+to a JSON file with stable key order, so results of two commits can be
+diffed, or compared with --compare.
+
+    python scripts/benchmark.py --scales 10k,1m --out bench_results.json
+    python scripts/benchmark.py --scales 10k --compare bench_results.json
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+import warnings
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # not available on Windows; peak RSS is then not recorded
+    resource = None
+
+SCALES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+PHASES = ("load", "reports", "dashboard")
+BENCH_DIR = os.path.join("data", "bench")
+SEED = 42
+CHUNK_ROWS = 100_000
+
+
+# -------------------------------
+# Measurements
+# -------------------------------
+def latency(samples):
+    """Percentiles (ms) of a list of durations in seconds."""
+    ms = np.asarray(samples, dtype=float) * 1000
+    if not len(ms):
+        return {"n": 0}
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"n": len(ms), "mean_ms": round(float(ms.mean()), 3), "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3), "max_ms": round(float(ms.max()), 3)}
+
+
+def peak_rss_mb():
+    """High-water resident set size of this process, in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+# -------------------------------
+# Dataset
+# -------------------------------
+def dataset(scale, rows, seed, workers):
+    """CSV chunks of the seeded mock dataset for `scale`, generated once and reused."""
+    from generate_mock_sales import END_DATE, START_DATE, _write_task
+
+    out_dir = os.path.join(BENCH_DIR, scale, f"csv-seed{seed}")
+    marker = os.path.join(out_dir, "COMPLETE")
+    files = sorted(glob.glob(os.path.join(out_dir, "*.csv")))
+    if os.path.exists(marker):
+        return files, None
+
+    os.makedirs(out_dir, exist_ok=True)
+    for path in files:
+        os.remove(path)
+    tasks = [((seed, no, min(CHUNK_ROWS, rows - first), 1 + first, max(1, rows // 8), START_DATE, END_DATE),
+              out_dir, "csv") for no, first in enumerate(range(0, rows, CHUNK_ROWS))]
+    started = time.perf_counter()
+    with multiprocessing.Pool(max(1, min(workers, len(tasks)))) as pool:
+        written = sum(pool.imap_unordered(_write_task, tasks))
+    elapsed = time.perf_counter() - started
+    open(marker, "w").close()
+    return sorted(glob.glob(os.path.join(out_dir, "*.csv"))), {
+        "rows": written, "seconds": round(elapsed, 3), "rows_per_sec": round(written / elapsed)}
+
+
+# -------------------------------
+# Phases (each runs in its own process)
+# -------------------------------
+def bench_load(db_path, files, opts):
+    import bench_backend
+    from etl_pipeline import load_chunks_parallel
+    from load_to_mysql import CHUNK_SIZE, load_chunks
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = bench_backend.connect(db_path)
+    cursor = conn.cursor()
+    chunk_times = []
+
+    def chunks():
+        for path in files:
+            for chunk in pd.read_csv(path, chunksize=CHUNK_SIZE):
+                started = time.perf_counter()
+                yield chunk
+                # resumed once load_chunks has cleaned and written the chunk
+                chunk_times.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    args = Namespace(mode="batch", batch_size=opts["batch_size"], no_rollups=False,
+                     workers=opts["load_workers"], writers=opts["load_writers"])
+    parallel = args.workers > 1 or args.writers > 1
+    if parallel:
+        rows, items, _, _ = load_chunks_parallel(conn, cursor, chunks(), args, lambda: bench_backend.connect(db_path))
+    else:
+        rows, items, _, _ = load_chunks(conn, cursor, chunks(), args)
+    elapsed = time.perf_counter() - started
+    cursor.close()
+    conn.close()
+    result = {"rows": rows, "line_items": items, "seconds": round(elapsed, 3),
+              "rows_per_sec": round(rows / elapsed), "workers": args.workers, "writers": args.writers,
+              "db_mb": round(os.path.getsize(db_path) / 2**20, 1)}
+    if not parallel:
+        # in the pipeline the reader only waits for backpressure, not for a chunk's write
+        result["chunk_latency"] = latency(chunk_times)
+    return result
+
+
+def bench_reports(db_path, opts):
+    import bench_backend
+    from queries import REPORT_QUERIES, ROLLUP_QUERIES
+    from report_engine import ReportEngine
+
+    conn = bench_backend.connect(db_path)
+    cursor = conn.cursor()
+    results = {}
+    for kind, queries in (("raw", REPORT_QUERIES), ("rollup", ROLLUP_QUERIES)):
+        for name, query in queries.items():
+            def run():
+                cursor.execute(query)
+                cursor.fetchall()
+            results[f"{kind}.{name}"] = latency(timed(run, opts["repeat"]))
+    cursor.close()
+    conn.close()
+
+    # the concurrent engine end to end: every query stale, then every query cached
+    engine = ReportEngine(bench_backend.Pool(db_path), cache_dir=os.path.join(os.path.dirname(db_path), "report-cache"))
+    results["engine.refresh"] = latency(timed(lambda: engine.run(REPORT_QUERIES, refresh=True), opts["repeat"]))
+    results["engine.cached"] = latency(timed(lambda: engine.run(REPORT_QUERIES), opts["repeat"]))
+    return results
+
+
+def bench_dashboard(db_path, opts):
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return {"skipped": "streamlit.testing is not available"}
+    import bench_backend
+
+    bench_backend.install(db_path)
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard.py")
+    app = AppTest.from_file(script, default_timeout=3600)
+
+    def run():
+        app.run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].value)
+
+    results = {"cold_start": latency(timed(run, 1)), "rerun": latency(timed(run, opts["repeat"]))}
+
+    # a different country per run, so every run is a fresh query
+    def country_filter():
+        return next(m for m in app.multiselect if m.label == "Country")
+
+    countries = list(country_filter().options)
+    picks = iter(countries)
+
+    def filter_country():
+        country_filter().set_value([next(picks)])
+        run()
+    results["filter_country"] = latency(timed(filter_country, min(opts["repeat"], len(countries))))
+
+    country_filter().set_value(countries)
+    run()
+    tabs = ["Customer Insights", "Cohorts & Retention", "Product Performance", "Map", "Data Explorer", "Overview"]
+    tab_names = iter(tabs)
+
+    def switch_tab():
+        app.session_state["active_tab"] = next(tab_names)
+        run()
+    results["tab_switch"] = latency(timed(switch_tab, len(tabs)))
+
+    def search_customer():
+        app.text_input[0].set_value("an")
+        run()
+        app.text_input[0].set_value("")
+    results["customer_search"] = latency(timed(search_customer, 1))
+    return results
+
+
+def _phase(task):
+    phase, args = task
+    warnings.simplefilter("ignore")
+    # the scripts print progress (and Streamlit logs); keep the benchmark output readable,
+    # errors still reach the parent process as exceptions
+    with open(os.devnull, "w") as devnull:
+        streams, (sys.stdout, sys.stderr) = (sys.stdout, sys.stderr), (devnull, devnull)
+        try:
+            result = {"load": bench_load, "reports": bench_reports, "dashboard": bench_dashboard}[phase](*args)
+        finally:
+            sys.stdout, sys.stderr = streams
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_phase(phase, *args):
+    # a fresh interpreter per phase, so peak RSS is the phase's own high-water mark
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        try:
+            return executor.submit(_phase, (phase, args)).result()
+        except BrokenProcessPool:
+            # e.g. killed by the OOM killer; recorded so the other phases and scales still run
+            return {"failed": "worker process died (out of memory?)", "peak_rss_mb": None}
+
+
+# -------------------------------
+# Results
+# -------------------------------
+def metadata(seed):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "seed": seed, "python": platform.python_version(), "pandas": pd.__version__,
+            "sqlite": sqlite3.sqlite_version, "platform": platform.platform(), "cpus": os.cpu_count(),
+            "created": pd.Timestamp.now().isoformat(timespec="seconds")}
+
+
+def _flatten(tree, prefix=""):
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield f"{prefix}{key}", value
+
+
+# metrics shown by --compare; for rows_per_sec a bigger number is an improvement
+COMPARED = ("p50_ms", "p95_ms", "rows_per_sec", "seconds", "peak_rss_mb")
+HIGHER_IS_BETTER = ("rows_per_sec",)
+
+
+def compare(baseline, current):
+    """Print metrics present in both runs with their relative change."""
+    old, new = dict(_flatten(baseline["scales"])), dict(_flatten(current["scales"]))
+    print(f"\n📊 Compared with {baseline['meta'].get('commit')} ({baseline['meta'].get('created')})")
+    print(f"{'metric':<58}{'before':>12}{'after':>12}{'change':>10}")
+    for key in sorted(old.keys() & new.keys()):
+        if not key.endswith(COMPARED) or not old[key]:
+            continue
+        change = new[key] / old[key] - 1
+        better = change > 0 if key.endswith(HIGHER_IS_BETTER) else change < 0
+        flag = "✅" if better and abs(change) >= 0.05 else "⚠️" if abs(change) >= 0.05 else ""
+        print(f"{key:<58}{old[key]:>12,.1f}{new[key]:>12,.1f}{change:>+9.0%} {flag}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the load path, reports and dashboard on synthetic data.")
+    parser.add_argument("--scales", default=",".join(SCALES), help=f"comma-separated subset of {', '.join(SCALES)}")
+    parser.add_argument("--phases", default=",".join(PHASES), help=f"comma-separated subset of {', '.join(PHASES)}")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query / dashboard interaction")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per INSERT in the load phase")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes generating the datasets")
+    parser.add_argument("--load-workers", type=int, default=1, help="cleaning processes in the load phase")
+    parser.add_argument("--load-writers", type=int, default=1, help="writer threads in the load phase")
+    parser.add_argument("--out", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    scales = [s.strip().lower() for s in args.scales.split(",") if s.strip()]
+    phases = [p.strip() for p in args.phases.split(",") if p.strip()]
+    unknown = sorted(set(scales) - set(SCALES)) + sorted(set(phases) - set(PHASES))
+    if unknown:
+        print(f"❌ Unknown scale/phase: {', '.join(unknown)}")
+        exit(1)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    opts = {"repeat": args.repeat, "batch_size": args.batch_size,
+            "load_workers": args.load_workers, "load_writers": args.load_writers}
+    results = {"meta": metadata(args.seed), "scales": {}}
+    for scale in scales:
+        rows = SCALES[scale]
+        print(f"\n🏁 Scale {scale} ({rows:,} orders)")
+        files, generated = dataset(scale, rows, args.seed, args.workers)
+        entry = results["scales"][scale] = {"rows": rows}
+        if generated:
+            entry["generate"] = generated
+            print(f"   🧪 generated in {generated['seconds']:.1f}s ({generated['rows_per_sec']:,} rows/sec)")
+        db_path = os.path.join(BENCH_DIR, scale, f"orders-seed{args.seed}.sqlite")
+
+        for phase in phases:
+            if phase != "load" and not os.path.exists(db_path):
+                print(f"   ⚠️ {phase}: no database for this scale yet, run the load phase first")
+                continue
+            started = time.perf_counter()
+            phase_args = (db_path, files, opts) if phase == "load" else (db_path, opts)
+            entry[phase] = run_phase(phase, *phase_args)
+            if "failed" in entry[phase]:
+                print(f"   ❌ {phase}: {entry[phase]['failed']}")
+                continue
+            print(f"   ⏱️ {phase}: {time.perf_counter() - started:.1f}s, peak RSS {entry[phase]['peak_rss_mb']} MB")
+            if phase == "load":
+                chunk_p95 = entry[phase].get("chunk_latency", {}).get("p95_ms")
+                print(f"      {entry[phase]['rows_per_sec']:,} rows/sec"
+                      + ("" if chunk_p95 is None else f", chunk p95 {chunk_p95:,.0f} ms"))
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"\n✅ Results written to {args.out}")
+    if baseline is not None:
+        compare(baseline, results)
+
+
+if __name__ == "__main__":
+    main()
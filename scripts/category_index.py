@@ -0,0 +1,71 @@
+# scripts/category_index.py
+"""Multi-valued category membership for the orders frame.
+
+The `category` column holds JSON lists such as '["Men's Shoes","Men's Clothing"]'.
+Stored as a pandas categorical, each row is just a code into the distinct
+list strings, so the lists are parsed once per distinct value (a few dozen)
+instead of once per row. A boolean membership matrix (distinct lists ×
+individual categories) then turns filtering and per-category aggregation
+into vectorized numpy operations.
+"""
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+def _parse(value):
+    """Individual categories of one stored value (JSON list or plain string)."""
+    try:
+        parsed = json.loads(value)
+    except (TypeError, ValueError):
+        return [value]
+    return [str(v) for v in parsed] if isinstance(parsed, list) else [str(parsed)]
+
+
+@lru_cache(maxsize=32)
+def _membership(distinct_values):
+    parsed = [_parse(v) for v in distinct_values]
+    vocab = sorted({c for cats in parsed for c in cats})
+    position = {c: i for i, c in enumerate(vocab)}
+    membership = np.zeros((len(distinct_values), len(vocab)), dtype=bool)
+    for row, cats in enumerate(parsed):
+        membership[row, [position[c] for c in cats]] = True
+    return vocab, membership
+
+
+def as_categorical(series):
+    """Store a category column as a pandas categorical (parsed once per distinct value)."""
+    return series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype("category")
+
+
+def membership(series):
+    """Return (vocabulary, membership matrix) for a categorical category column."""
+    return _membership(tuple(as_categorical(series).cat.categories))
+
+
+def vocabulary(series):
+    return membership(series)[0]
+
+
+def category_mask(series, selected):
+    """Boolean mask of rows containing any of the `selected` categories (exact match)."""
+    series = as_categorical(series)
+    vocab, matrix = membership(series)
+    selected = set(selected)
+    columns = [i for i, c in enumerate(vocab) if c in selected]
+    # code -1 marks a missing value: it indexes the trailing False
+    distinct_hit = np.append(matrix[:, columns].any(axis=1), False)
+    return distinct_hit[series.cat.codes.to_numpy()]
+
+
+def sum_by_category(series, values):
+    """Sum `values` per individual category; an order counts towards each of its categories."""
+    series = as_categorical(series)
+    vocab, matrix = membership(series)
+    codes = series.cat.codes.to_numpy()
+    known = codes >= 0
+    per_distinct = np.bincount(codes[known], weights=np.asarray(values, dtype=float)[known],
+                               minlength=matrix.shape[0])
+    return pd.Series(matrix.T.astype(float) @ per_distinct, index=vocab)
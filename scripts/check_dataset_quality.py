@@ -1,40 +1,74 @@
+import argparse
+import glob
+from multiprocessing import Pool
+
 import pandas as pd
 
-# 1️⃣ Load dataset
-file_path = "E:/DataAnalyst projects/ecom-analytics/data/ecom_dataset.csv"
-df = pd.read_csv(file_path)
-
-print("✅ Dataset loaded successfully!\n")
-
-# 2️⃣ Basic information
-print("🔹 Shape of dataset:", df.shape)
-print("\n🔹 Column Names:")
-print(df.columns.tolist())
-
-# 3️⃣ Check for missing or null values
-print("\n🔍 Missing values per column:")
-print(df.isnull().sum())
-
-# 4️⃣ Check for empty strings
-empty_counts = (df == "").sum()
-print("\n🔍 Empty string counts per column:")
-print(empty_counts[empty_counts > 0])
-
-# 5️⃣ Check for numeric columns with zeros
-numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns
-if len(numeric_cols) > 0:
-    print("\n🔢 Zero counts in numeric columns:")
-    for col in numeric_cols:
-        zero_count = (df[col] == 0).sum()
-        if zero_count > 0:
+from profiler import DatasetProfile, profile_file
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Profile the dataset in one streaming pass.")
+    parser.add_argument("files", nargs="*", default=["data/ecom_dataset.csv"],
+                        help="CSV/Parquet files or glob patterns; several files (shards) are profiled in parallel")
+    parser.add_argument("--chunksize", type=int, default=100000, help="rows read at a time")
+    parser.add_argument("--workers", type=int, default=1, help="files profiled in parallel")
+    return parser.parse_args()
+
+
+def _profile(task):
+    return profile_file(*task)
+
+
+def main():
+    args = parse_args()
+    files = sorted({f for pattern in args.files for f in (glob.glob(pattern) or [pattern])})
+
+    # 1️⃣ Profile every file in a single pass (one worker per shard), then merge
+    profile = DatasetProfile()
+    tasks = [(f, args.chunksize) for f in files]
+    if args.workers > 1 and len(files) > 1:
+        with Pool(min(args.workers, len(files))) as pool:
+            for shard in pool.imap_unordered(_profile, tasks):
+                profile.merge(shard)
+    else:
+        for task in tasks:
+            profile.merge(_profile(task))
+    print(f"✅ Profiled {len(files)} file(s) successfully!\n")
+    summary = profile.to_frame()
+
+    # 2️⃣ Basic information
+    print("🔹 Shape of dataset:", (profile.rows, len(summary)))
+    print("\n🔹 Column Names:")
+    print(summary.index.tolist())
+
+    # 3️⃣ Check for missing or null values
+    print("\n🔍 Missing values per column:")
+    print(summary["nulls"])
+
+    # 4️⃣ Check for empty strings
+    empty_counts = summary["empty"]
+    print("\n🔍 Empty string counts per column:")
+    print(empty_counts[empty_counts > 0])
+
+    # 5️⃣ Check for numeric columns with zeros
+    zero_counts = summary["zeros"]
+    if (zero_counts > 0).any():
+        print("\n🔢 Zero counts in numeric columns:")
+        for col, zero_count in zero_counts[zero_counts > 0].items():
             print(f"   {col}: {zero_count} zeros")
 
-# 6️⃣ Quick descriptive summary
-print("\n📊 Descriptive statistics:")
-print(df.describe(include='all').transpose().head(10))
-# 7️⃣ Inspect price columns closely
-print("\n💰 Sample values from taxful_total_price:")
-print(df["taxful_total_price"].head(10))
+    # 6️⃣ Descriptive summary (~ marks approximate values from sketches)
+    print("\n📊 Descriptive statistics:")
+    with pd.option_context("display.max_columns", None, "display.width", 200):
+        print(summary.drop(columns=["nulls", "empty", "zeros", "malformed"]))
+
+    # 7️⃣ Values the loader would turn into NULL (same cleaning code as load_to_mysql.py)
+    print("\n🧹 Unparseable values (coerced to NaN by the loader):")
+    for col in ["order_date", "taxful_total_price", "taxless_total_price"]:
+        if col in summary.index:
+            print(f"   {col}: {summary.at[col, 'malformed']}")
+
 
-print("\n💰 Sample values from taxless_total_price:")
-print(df["taxless_total_price"].head(10))
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# scripts/cleaning.py
+"""Vectorized cleaning shared by the loader, the dashboard and the quality check.
+
+Money columns arrive as strings like "$59.98 "; they are normalized with
+vectorized string ops instead of a per-cell regex. Order dates arrive in
+the Kibana export format "March 30th 2019, 16:12:00.000": the ordinal suffix
+is stripped and the rest parsed with an explicit format, so pandas never has
+to guess the format row by row. Both run once per distinct value (prices and
+timestamps repeat a lot) and are broadcast back through factorized codes.
+Values that cannot be parsed become NaN / NaT and are counted.
+The `geoip.location` JSON blob ({"lon": 7.4, "lat": 43.7}) is split the same
+way into numeric `geoip.lat` / `geoip.lon` columns.
+"""
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+MONEY_COLS = ["taxful_total_price", "taxless_total_price"]
+DATE_COLS = ["order_date"]
+LOCATION_COL = "geoip.location"
+LAT_COL, LON_COL = "geoip.lat", "geoip.lon"
+
+ORDER_DATE_FORMAT = "%B %d %Y, %H:%M:%S.%f"
+_ORDINAL_SUFFIX = r"(?<=\d)(?:st|nd|rd|th)(?=\s)"
+_NUMBER = r"\s*:\s*(-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)"
+
+
+def _money_distinct(values):
+    text = pd.Series(values, dtype="string").str.strip()
+    numbers = pd.to_numeric(
+        text.str.replace(r"[^0-9.\-]", "", regex=True).mask(text == "", "0"), errors="coerce")
+    return numbers.to_numpy(dtype=float, na_value=np.nan)
+
+
+def clean_money(series):
+    """Return (float series, rows coerced to NaN). Blank strings count as 0."""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float), 0
+    # prices repeat a lot, so each distinct string is cleaned once
+    codes, uniques = pd.factorize(series)
+    values = np.append(_money_distinct(np.asarray(uniques, dtype=object)), np.nan)[codes]
+    numbers = pd.Series(values, index=series.index, name=series.name)
+    coerced = int((numbers.isna() & series.notna()).sum())
+    return numbers, coerced
+
+
+def _parse_distinct(values):
+    """Parse distinct date strings: ordinal-aware fast path, generic parser for the rest."""
+    text = pd.Series(values, dtype="string").str.strip()
+    parsed = pd.to_datetime(text.str.replace(_ORDINAL_SUFFIX, "", regex=True),
+                            format=ORDER_DATE_FORMAT, errors="coerce")
+    misses = parsed.isna() & text.notna()
+    if misses.any():
+        # e.g. ISO strings coming back from MySQL or another export
+        parsed[misses] = pd.to_datetime(text[misses], format="mixed", errors="coerce",
+                                        utc=True).dt.tz_localize(None)
+    return parsed.to_numpy(dtype="datetime64[ns]")
+
+
+def parse_dates(series):
+    """Return (datetime64 series, rows coerced to NaT)."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series, 0
+    # parse each distinct value once and broadcast through the factorized codes
+    codes, uniques = pd.factorize(series)
+    distinct = _parse_distinct(np.asarray(uniques, dtype=object))
+    values = np.append(distinct, np.datetime64("NaT", "ns"))[codes]
+    dates = pd.Series(values, index=series.index, name=series.name)
+    coerced = int((dates.isna() & series.notna()).sum())
+    return dates, coerced
+
+
+def parse_locations(series):
+    """Return (lat series, lon series, rows coerced to NaN) from `{"lon": .., "lat": ..}` blobs."""
+    # a location is shared by every order from the same city: parse each distinct blob once
+    codes, uniques = pd.factorize(series)
+    text = pd.Series(np.asarray(uniques, dtype=object), dtype="string")
+    lat = pd.to_numeric(text.str.extract('"lat"' + _NUMBER, expand=False), errors="coerce").to_numpy(dtype=float)
+    lon = pd.to_numeric(text.str.extract('"lon"' + _NUMBER, expand=False), errors="coerce").to_numpy(dtype=float)
+    outside = (np.abs(lat) > 90) | (np.abs(lon) > 180)
+    lat[outside] = lon[outside] = np.nan
+    lat = pd.Series(np.append(lat, np.nan)[codes], index=series.index, name=LAT_COL)
+    lon = pd.Series(np.append(lon, np.nan)[codes], index=series.index, name=LON_COL)
+    present = series.notna() & (series.astype("string").str.strip() != "")
+    coerced = int((present & (lat.isna() | lon.isna())).sum())
+    return lat, lon, coerced
+
+
+def clean_orders(df, coerced=None):
+    """Clean the money and date columns of an orders frame in place and return it.
+
+    Pass a Counter as `coerced` to accumulate, per column, the number of
+    non-empty values that could not be parsed.
+    """
+    coerced = Counter() if coerced is None else coerced
+    for col in DATE_COLS:
+        if col in df.columns:
+            df[col], n = parse_dates(df[col])
+            coerced[col] += n
+    for col in MONEY_COLS:
+        if col in df.columns:
+            df[col], n = clean_money(df[col])
+            coerced[col] += n
+    if LOCATION_COL in df.columns:
+        df[LAT_COL], df[LON_COL], n = parse_locations(df[LOCATION_COL])
+        coerced[LOCATION_COL] += n
+    return df
@@ -0,0 +1,263 @@
+# scripts/cohorts.py
+"""Customer cohorts, retention, repeat purchases and RFM segments.
+
+Orders are reduced to a sparse customer × month activity table: one entry
+per (customer, order month) that has orders, with its order count and
+revenue, plus per-customer totals (first month, last order, orders,
+revenue). Every report is a bincount or a rank over those arrays instead of
+a per-customer groupby-apply, and new orders are folded in with update()
+without revisiting the old ones.
+
+    activity = CustomerActivity().update(orders)   # customer_id, order_date, taxful_total_price
+    retention_matrix(activity)
+    repeat_purchases(activity)
+    rfm_segments(rfm(activity))
+"""
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+CACHE_PATH = os.path.join(".cache", "cohorts.pkl")
+# months of retention shown per cohort
+MAX_AGE = 12
+RFM_BINS = 5
+# the month (months since year 0) sits in the low bits of a customer × month key
+MONTH_BITS = 16
+NO_MONTH = np.iinfo(np.int32).max
+
+# RFM segment of every (recency score, frequency score), scores 1..5
+SEGMENTS = ["Hibernating", "At risk", "Can't lose them", "About to sleep", "Need attention",
+            "Loyal customers", "Promising", "New customers", "Potential loyalists", "Champions"]
+SEGMENT_GRID = np.array([
+    # F:  1  2  3  4  5
+    [0, 0, 1, 1, 2],   # R 1
+    [0, 0, 1, 1, 2],   # R 2
+    [3, 3, 4, 5, 5],   # R 3
+    [6, 8, 8, 5, 5],   # R 4
+    [7, 8, 8, 9, 9],   # R 5
+])
+
+
+def _month_index(dates):
+    return (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype=np.int64)
+
+
+def month_label(index):
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+class CustomerActivity:
+    """Sparse customer × month order activity, updated incrementally."""
+
+    def __init__(self):
+        self.customers = pd.Index([])                    # customer id of every code
+        self.first_month = np.empty(0, np.int32)
+        self.last_order = np.empty(0, "datetime64[ns]")
+        self.orders = np.empty(0, np.int64)
+        self.revenue = np.empty(0, np.float64)
+        # one entry per active (customer, month), sorted by code << MONTH_BITS | month
+        self.keys = np.empty(0, np.int64)
+        self.key_orders = np.empty(0, np.int64)
+        self.key_revenue = np.empty(0, np.float64)
+        # highest orders.id folded in; the next update only needs rows past it
+        self.last_id = None
+        # order rows folded in, compared with the table's count up to last_id
+        self.rows = 0
+
+    def __len__(self):
+        return len(self.customers)
+
+    def update(self, orders, customer_col="customer_id"):
+        """Fold in orders not seen before (customer, order_date, taxful_total_price[, id]); returns self."""
+        if "id" in orders.columns and orders["id"].notna().any():
+            top = int(orders["id"].max())
+            self.last_id = top if self.last_id is None else max(self.last_id, top)
+        self.rows += len(orders)
+        dates = pd.to_datetime(orders["order_date"], errors="coerce")
+        keep = (orders[customer_col].notna() & dates.notna()).to_numpy()
+        if not keep.any():
+            return self
+        customer = orders[customer_col][keep]
+        dates = dates[keep]
+        price = pd.to_numeric(orders["taxful_total_price"][keep], errors="coerce").fillna(0.0).to_numpy()
+
+        # existing customers keep their code, new ones are appended
+        codes = self.customers.get_indexer(customer)
+        new = codes < 0
+        if new.any():
+            fresh = pd.Index(pd.unique(customer[new]))
+            self.customers = self.customers.append(fresh)
+            codes[new] = len(self.customers) - len(fresh) + fresh.get_indexer(customer[new])
+            grow = len(fresh)
+            self.first_month = np.concatenate([self.first_month, np.full(grow, NO_MONTH, np.int32)])
+            self.last_order = np.concatenate([self.last_order, np.full(grow, np.datetime64("NaT"), "datetime64[ns]")])
+            self.orders = np.concatenate([self.orders, np.zeros(grow, np.int64)])
+            self.revenue = np.concatenate([self.revenue, np.zeros(grow, np.float64)])
+
+        months = _month_index(dates)
+        per = (pd.DataFrame({"code": codes, "month": months, "date": dates.to_numpy(), "revenue": price})
+                 .groupby("code")
+                 .agg(first=("month", "min"), last=("date", "max"), n=("month", "size"), revenue=("revenue", "sum")))
+        idx = per.index.to_numpy()
+        self.first_month[idx] = np.minimum(self.first_month[idx], per["first"].to_numpy())
+        last = self.last_order[idx]
+        self.last_order[idx] = np.where(np.isnat(last) | (last < per["last"].to_numpy()), per["last"].to_numpy(), last)
+        self.orders[idx] += per["n"].to_numpy()
+        self.revenue[idx] += per["revenue"].to_numpy()
+
+        # merge the batch's (customer, month) cells into the sorted sparse table
+        keys = (codes.astype(np.int64) << MONTH_BITS) | months
+        cells = (pd.DataFrame({"key": np.concatenate([self.keys, keys]),
+                               "n": np.concatenate([self.key_orders, np.ones(len(keys), np.int64)]),
+                               "revenue": np.concatenate([self.key_revenue, price])})
+                   .groupby("key", sort=True).sum())
+        self.keys = cells.index.to_numpy(np.int64)
+        self.key_orders = cells["n"].to_numpy(np.int64)
+        self.key_revenue = cells["revenue"].to_numpy(np.float64)
+        return self
+
+    def cells(self):
+        """(customer code, month index) of every active cell."""
+        return self.keys >> MONTH_BITS, self.keys & ((1 << MONTH_BITS) - 1)
+
+
+# -------------------------------
+# Reports
+# -------------------------------
+def retention_matrix(activity, max_age=MAX_AGE):
+    """Share of each cohort (first order month) with an order `age` months later, plus its size."""
+    if not len(activity):
+        return pd.DataFrame(columns=["customers"] + list(range(max_age + 1)))
+    code, month = activity.cells()
+    cohort = activity.first_month[code].astype(np.int64)
+    age = month - cohort
+    first, last = int(activity.first_month.min()), int(month.max())
+    n_cohorts, width = last - first + 1, max_age + 1
+    inside = age <= max_age
+    active = np.bincount((cohort[inside] - first) * width + age[inside],
+                         minlength=n_cohorts * width).reshape(n_cohorts, width)
+    sizes = np.bincount(activity.first_month.astype(np.int64) - first, minlength=n_cohorts)
+
+    share = active / np.maximum(sizes, 1)[:, None]
+    # months after the last month with data are unknown, not zero
+    unseen = (np.arange(n_cohorts)[:, None] + np.arange(width)[None, :]) > (last - first)
+    share[unseen] = np.nan
+    matrix = pd.DataFrame(share, index=[month_label(first + i) for i in range(n_cohorts)], columns=range(width))
+    matrix.insert(0, "customers", sizes)
+    return matrix[sizes > 0].rename_axis("cohort")
+
+
+def repeat_purchases(activity):
+    """Per cohort: customers, customers with 2+ orders and the repeat-purchase rate ("All" last)."""
+    if not len(activity):
+        return pd.DataFrame(columns=["cohort", "customers", "repeat_customers", "repeat_rate"])
+    first = int(activity.first_month.min())
+    cohort = activity.first_month.astype(np.int64) - first
+    customers = np.bincount(cohort)
+    repeat = np.bincount(cohort, weights=activity.orders >= 2, minlength=len(customers)).astype(np.int64)
+    table = pd.DataFrame({"cohort": [month_label(first + i) for i in range(len(customers))],
+                          "customers": customers, "repeat_customers": repeat})
+    # relabelled first: months without new customers leave gaps the "All" row would land on
+    table = table[table["customers"] > 0].reset_index(drop=True)
+    table.loc[len(table)] = ["All", int(customers.sum()), int(repeat.sum())]
+    table["repeat_rate"] = table["repeat_customers"] / table["customers"]
+    return table
+
+
+def _score(values):
+    # quantile scores 1..RFM_BINS; ranking first breaks the ties that make qcut fail
+    pct = pd.Series(values).rank(method="first", pct=True).to_numpy()
+    return np.ceil(pct * RFM_BINS).astype(np.int8)
+
+
+def rfm(activity, as_of=None):
+    """Recency (days), frequency, monetary value, 1-5 scores and a segment for every customer."""
+    last = pd.DatetimeIndex(activity.last_order)
+    as_of = pd.Timestamp(as_of) if as_of is not None else last.max()
+    recency = (as_of - last).days.to_numpy()
+    r, f, m = _score(-recency), _score(activity.orders), _score(activity.revenue)
+    table = pd.DataFrame({"customer_id": activity.customers, "recency_days": recency,
+                          "frequency": activity.orders, "monetary": activity.revenue,
+                          "r": r, "f": f, "m": m})
+    table["segment"] = pd.Categorical.from_codes(SEGMENT_GRID[r - 1, f - 1], SEGMENTS) if len(table) else []
+    return table
+
+
+def rfm_segments(table):
+    """Customers, revenue and average R / F / M per segment, largest segment first."""
+    segments = (table.groupby("segment", observed=True)
+                     .agg(customers=("customer_id", "size"), revenue=("monetary", "sum"),
+                          avg_recency_days=("recency_days", "mean"), avg_frequency=("frequency", "mean"),
+                          avg_monetary=("monetary", "mean"))
+                     .reset_index()
+                     .sort_values("customers", ascending=False))
+    segments.insert(2, "share", segments["customers"] / max(len(table), 1))
+    return segments.reset_index(drop=True)
+
+
+# -------------------------------
+# Incremental state on disk
+# -------------------------------
+def load_state(path=CACHE_PATH):
+    """The activity saved by the last run, or a fresh one."""
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return CustomerActivity()
+
+
+def save_state(activity, path=CACHE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(activity, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def _outdated(activity, count):
+    """Whether the orders up to `activity.last_id` are no longer the `activity.rows` folded in.
+
+    LOAD DATA ... REPLACE deletes colliding rows and re-inserts them under new
+    ids, which would count those orders again; deleted rows would stay counted.
+    Either way the table then holds a different number of rows up to last_id.
+    """
+    # states saved before `rows` was tracked are rebuilt once
+    return getattr(activity, "rows", None) != count
+
+
+def refresh_from_frame(orders, activity=None):
+    """refresh_from_db() for an orders frame with an `id` column (e.g. the snapshot)."""
+    activity = activity if activity is not None else CustomerActivity()
+    if activity.last_id is not None and _outdated(activity, int((orders["id"] <= activity.last_id).sum())):
+        activity = CustomerActivity()
+    return activity.update(orders[orders["id"] > (activity.last_id or 0)])
+
+
+def refresh_from_db(conn, activity=None, chunksize=200000):
+    """Fold the orders past `activity.last_id` into it, reading them in id order; returns it.
+
+    Rows are only ever read once. When rows up to last_id were deleted or
+    replaced since, the activity is rebuilt from every order instead, and
+    the returned object is a new one. An order updated in place by a later
+    load keeps its id and is not re-counted (rebuild with a fresh activity).
+    """
+    activity = activity if activity is not None else CustomerActivity()
+    cursor = conn.cursor()
+    try:
+        if activity.last_id is not None:
+            cursor.execute("SELECT COUNT(*) FROM orders WHERE id <= %s", (activity.last_id,))
+            if _outdated(activity, int(cursor.fetchone()[0])):
+                activity = CustomerActivity()
+        while True:
+            cursor.execute("SELECT id, customer_id, order_date, taxful_total_price FROM orders "
+                           "WHERE id > %s ORDER BY id LIMIT %s", (activity.last_id or 0, chunksize))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            activity.update(pd.DataFrame(rows, columns=["id", "customer_id", "order_date", "taxful_total_price"]))
+    finally:
+        cursor.close()
+    return activity
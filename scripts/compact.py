@@ -0,0 +1,76 @@
+# scripts/compact.py
+"""Compact in-memory layout for the dashboard's orders frame.
+
+Loaded as it comes from MySQL, every text column is one Python string per
+row (currency, gender, country, city, day_of_week, ... repeat a handful of
+values millions of times) and every number is 64-bit. compact_frame()
+stores low-cardinality text as categoricals (an int8/int16 code per row plus
+the distinct values once), downcasts integers to the smallest type that
+holds them and coordinates to float32. Prices stay float64 so revenue sums
+keep their cents.
+
+The whole table is read in chunks that are compacted as they arrive, so
+the raw rows never all sit in memory at once; concat() joins the chunks
+without turning their categoricals back into strings.
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# text columns with at most this share of distinct values become categoricals
+CATEGORY_RATIO = 0.5
+# float columns that do not need double precision (degrees, rounded to ~0.1 on load)
+FLOAT32_COLUMNS = ["geoip_lat", "geoip_lon"]
+
+
+def _is_text(series):
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+
+def compact_frame(df, categorical=None, ratio=CATEGORY_RATIO):
+    """Downcast the columns of `df` in place and return it.
+
+    `categorical` lists the text columns to store as categoricals; by default
+    those with at most `ratio` distinct values per row. Chunks of one table
+    should all get the columns chosen for the first one.
+    """
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(series.dtype):
+            continue
+        if pd.api.types.is_integer_dtype(series.dtype):
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif col in FLOAT32_COLUMNS and pd.api.types.is_float_dtype(series.dtype):
+            df[col] = series.astype(np.float32)
+        elif _is_text(series):
+            if categorical is None:
+                keep = len(series) > 0 and series.nunique() <= ratio * len(series)
+            else:
+                keep = col in categorical
+            if keep:
+                df[col] = series.astype("category")
+    return df
+
+
+def categorical_columns(df):
+    return [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+
+
+def concat(frames):
+    """Concatenate compacted chunks; categoricals get the union of their chunks' categories.
+
+    The input frames are left as they are (one may be a copy readers are still using).
+    """
+    frames = [f for f in frames if len(f.columns)]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    unified = {}
+    for col in categorical_columns(frames[0]):
+        if all(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames):
+            unified[col] = union_categoricals([f[col] for f in frames], sort_categories=True).categories
+    frames = [f.assign(**{col: f[col].cat.set_categories(categories) for col, categories in unified.items()})
+              for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
@@ -6,8 +6,33 @@ import mysql.connector
 from mysql.connector import Error
 from datetime import datetime
 
+import category_index
+import cohorts
+import compact
+import geo
+import instrumentation
+import rollups
+import sampling
+import snapshot
+from agg_cache import AggregationCache
+from aggregate_service import build_query as build_aggregate_query
+from cleaning import parse_dates
+from export import EXPORT_FORMATS, export_to_tempfile, iter_frame_chunks, iter_query_chunks
+from instrumentation import span
+from name_search import NameIndex
+from query_builder import (COUNTRY_COL, KEYSET_COLUMNS, WIDE_COLUMNS, build_id_query, build_orders_query,
+                           build_page_query, quote)
+from refresher import TableRefresher
+from sketches import HLL_ERROR
+
 st.set_page_config(page_title="E-commerce Analytics Dashboard", layout="wide")
 
+# Timing spans of this rerun, shown in the sidebar "Performance" panel
+# (and logged as JSON lines when ECOM_METRICS_LOG is set)
+instrumentation.enable_json_logs_from_env()
+run_metrics = instrumentation.activate(instrumentation.Recorder())
+profiler = instrumentation.start_profile() if st.session_state.pop("profile_requested", False) else None
+
 # -------------------------
 # Config / DB connection
 # -------------------------
@@ -18,40 +43,302 @@ DB_CONFIG = {
     "database": "ecom_db"
 }
 
-@st.cache_data(ttl=300)
-def load_orders_from_db():
-    """Load entire orders table into a DataFrame and clean column names."""
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        # load whole table
-        df = pd.read_sql_query("SELECT * FROM orders;", conn)
-        conn.close()
-    except Exception as e:
-        st.error(f"Error loading data from MySQL: {e}")
-        return pd.DataFrame()
+# Name-search matches beyond this are sent to MySQL as a LIKE instead of an IN list
+MAX_NAMES_IN_QUERY = 1000
 
+# Data Explorer page sizes; only the visible page is fetched and rendered
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Line-item columns kept in memory (id drives the incremental refresh)
+ITEM_COLUMNS = ["id", "order_id", "sku", "manufacturer", "category", "quantity", "taxful_price"]
+
+@instrumentation.timed("prepare_orders")
+def prepare_orders(df):
+    """Clean column names and types of an orders frame fetched from MySQL."""
     # normalize column names (replace dots with underscores)
     df.columns = [c.replace(".", "_") for c in df.columns]
 
-    # convert order_date if present
+    # convert order_date if present (a no-op when MySQL already returned datetimes)
     if "order_date" in df.columns:
-        df["order_date"] = pd.to_datetime(df["order_date"], errors="coerce")
+        df["order_date"] = parse_dates(df["order_date"])[0]
 
     # ensure numeric columns are numeric
     for col in ["taxful_total_price", "taxless_total_price", "total_quantity"]:
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
 
-    # some columns might contain lists as strings; keep as-is for now
+    # category holds JSON lists; a categorical parses each distinct list once
+    if "category" in df.columns:
+        df["category"] = category_index.as_categorical(df["category"])
     return df
 
-# Load data
-df = load_orders_from_db()
+def connect_db():
+    return mysql.connector.connect(**DB_CONFIG)
+
+def prepare_items(items):
+    for col in ["quantity", "taxful_price"]:
+        items[col] = pd.to_numeric(items[col], errors="coerce").fillna(0.0)
+    return items
+
+@st.cache_resource
+def get_refresher(table):
+    """In-memory copy of `table` refreshed in the background (scripts/refresher.py), one per server process."""
+    if table == "orders":
+        # the wide JSON columns stay in MySQL; the Data Explorer fetches them by id
+        return TableRefresher(connect_db, "orders", exclude=WIDE_COLUMNS,
+                              prepare=lambda df: sampling.add_sample_keys(prepare_orders(df)))
+    return TableRefresher(connect_db, "order_items", columns=ITEM_COLUMNS, prepare=prepare_items)
+
+@instrumentation.timed("db.orders_all")
+def load_orders_from_db():
+    """The compact in-memory orders frame: loaded on first use, then kept fresh in the background."""
+    refresher = get_refresher("orders")
+    state = refresher.get()
+    if state is None:
+        st.error(f"Error loading data from MySQL: {refresher.last_error}")
+        return pd.DataFrame()
+    return state.frame
+
+@st.cache_data(ttl=300)
+@instrumentation.timed("db.wide_columns", measure_bytes=True)
+def load_wide_columns(columns, ids, from_snapshot=False):
+    """Wide columns of the orders on one Data Explorer page, by id (None on failure)."""
+    columns = ["id"] + list(columns)
+    try:
+        if from_snapshot:
+            df = snapshot.load_by_id(ids, columns)
+        else:
+            sql, params = build_id_query(columns, ids)
+            conn = mysql.connector.connect(**DB_CONFIG)
+            try:
+                df = pd.read_sql_query(sql, conn, params=params)
+            finally:
+                conn.close()
+    except Exception:
+        return None
+    return prepare_orders(df)
+
+@st.cache_resource
+def get_agg_cache():
+    """One aggregation cache per server process, shared by every session."""
+    return AggregationCache()
+
+@st.cache_data(ttl=300)
+@instrumentation.timed("db.filter_options")
+def load_filter_options():
+    """Sidebar bounds and choices from cheap aggregate queries (None on failure)."""
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MIN(order_date), MAX(order_date) FROM orders")
+            min_date, max_date = cursor.fetchone()
+            cursor.execute(f"SELECT DISTINCT {quote(COUNTRY_COL)} FROM orders")
+            countries = sorted(r[0] for r in cursor.fetchall() if r[0])
+            cursor.execute("SELECT DISTINCT category FROM order_items")
+            categories = sorted(r[0] for r in cursor.fetchall() if r[0])
+            cursor.execute("SELECT column_name FROM information_schema.columns "
+                           "WHERE table_schema = DATABASE() AND table_name = 'orders' ORDER BY ordinal_position")
+            all_columns = [r[0] for r in cursor.fetchall()]
+            columns = [c for c in all_columns if c not in WIDE_COLUMNS]
+            # row count + max id changes whenever orders are loaded, so it versions cached aggregations
+            cursor.execute("SELECT COUNT(*), MAX(id) FROM orders")
+            version = tuple(cursor.fetchone())
+            cursor.execute("SELECT COUNT(*), MAX(id) FROM order_items")
+            items_version = tuple(cursor.fetchone())
+            cursor.close()
+        finally:
+            conn.close()
+    except Exception:
+        return None
+
+    if min_date is None:
+        return None
+    return {"min_date": pd.Timestamp(min_date), "max_date": pd.Timestamp(max_date),
+            "countries": countries, "categories": categories, "columns": columns,
+            "all_columns": all_columns, "version": version, "items_version": items_version,
+            "checked_at": datetime.now()}
+
+@st.cache_resource(ttl=300)
+@instrumentation.timed("db.customer_index")
+def load_customer_index():
+    """Trigram index over the distinct customer names, built once per data load."""
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT DISTINCT customer_full_name FROM orders")
+            names = [r[0] for r in cursor.fetchall()]
+            cursor.close()
+        finally:
+            conn.close()
+    except Exception:
+        return None
+    return NameIndex(names)
+
+@st.cache_resource(ttl=300)
+@instrumentation.timed("customer_index")
+def build_customer_index(_df, rows):
+    """Name index for the in-memory fallback frame (`rows` stands in for its version)."""
+    return NameIndex(_df["customer_full_name"].dropna().unique())
 
-if df.empty:
-    st.title("E-commerce Analytics Dashboard")
-    st.warning("No data found in the 'orders' table. Please run the ETL to load data first.")
-    st.stop()
+@st.cache_data(ttl=300)
+@instrumentation.timed("db.orders_filtered", measure_bytes=True)
+def load_filtered_orders(columns, **filters):
+    """Fetch only the projected columns of the orders matching the filters (None on failure)."""
+    sql, params = build_orders_query(list(columns), **filters)
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        try:
+            df = pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+    except Exception:
+        return None
+    return sampling.add_sample_keys(prepare_orders(df))
+
+@st.cache_data(ttl=300)
+@instrumentation.timed("db.explorer_page")
+def load_page(columns, sort, descending, after, offset, limit, version, **filters):
+    """One Data Explorer page straight from MySQL (None on failure); `version` drops it on reloads."""
+    sql, params = build_page_query(list(columns), sort, descending, after, offset, limit, **filters)
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        try:
+            df = pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+    except Exception:
+        return None
+    return df
+
+@instrumentation.timed("db.item_aggregate")
+def load_item_aggregate(name, **filters):
+    """One line-item aggregate of the filtered orders as a GROUP BY in MySQL (None on failure)."""
+    sql, params = build_aggregate_query(name, filters)
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        try:
+            df = pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+    except Exception:
+        return None
+    # MySQL returns SUM() as Decimal
+    for col in df.columns[1:]:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+    return df
+
+@instrumentation.timed("filter")
+def apply_filters(df, country_col, start, end, selected_countries, selected_categories, customer_names):
+    """In-memory filtering, used when the filters cannot be pushed down to MySQL.
+
+    The conditions are and-ed into one boolean mask and the rows taken once at
+    the end; when every row matches, the cached frame itself is returned.
+    """
+    # date filtering, on the datetime64 values rather than per-row date objects
+    dates = df["order_date"]
+    mask = ((dates >= pd.Timestamp(start)) & (dates < pd.Timestamp(end) + pd.Timedelta(days=1))).to_numpy()
+    # country
+    if country_col and selected_countries:
+        mask = mask & df[country_col].isin(selected_countries).to_numpy()
+    # category - exact match of any selected category within each row's list
+    if selected_categories:
+        mask = mask & category_index.category_mask(df["category"], selected_categories)
+    # customer search, already resolved to exact names through the name index
+    if customer_names is not None:
+        mask = mask & df["customer_full_name"].isin(customer_names).to_numpy()
+    return df if mask.all() else df[mask]
+
+@instrumentation.timed("db.order_items")
+def load_order_items_from_db():
+    """The exploded line items (one row per product) and their version, kept fresh in the background."""
+    state = get_refresher("order_items").get()
+    if state is None:
+        # older loads have no order_items table; callers fall back to the list columns
+        return pd.DataFrame(), None
+    return state.frame, state.version
+
+# one snapshot version at a time: each entry holds a whole orders frame
+@st.cache_resource(max_entries=1)
+@instrumentation.timed("snapshot.load", measure_bytes=True)
+def load_snapshot(version):
+    """Orders and line items from the memory-mapped snapshot, shared by all sessions."""
+    # compacted like the MySQL frame; the wide columns are read by id when shown
+    orders = compact.compact_frame(sampling.add_sample_keys(
+        prepare_orders(snapshot.load_table("orders", exclude=WIDE_COLUMNS))))
+    items = snapshot.load_table("order_items",
+                                columns=["order_id", "sku", "manufacturer", "category", "quantity", "taxful_price"])
+    return orders, items
+
+@st.cache_data(ttl=300)
+def load_rollup_chart(name, start, end, countries, **kwargs):
+    """Answer one standard chart from the rollup tables (None if unavailable)."""
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        try:
+            if not rollups.rollups_available(conn):
+                return None
+            with span(f"rollup.{name}"):
+                return getattr(rollups, name)(conn, start, end, list(countries) or None, **kwargs)
+        finally:
+            conn.close()
+    except Exception:
+        return None
+
+# Load data: filters are pushed down to MySQL when possible, otherwise the
+# whole table is loaded once and filtered in pandas. A columnar snapshot
+# (scripts/snapshot.py) can stand in for MySQL, and does when it is down.
+manifest = snapshot.read_manifest() if snapshot.available() else None
+LIVE_SOURCE = "MySQL (live)"
+source = LIVE_SOURCE
+if manifest is not None:
+    source = st.sidebar.radio("Data source", [LIVE_SOURCE, f"Snapshot ({manifest['refreshed_at']})"])
+options = load_filter_options() if source == LIVE_SOURCE else None
+use_snapshot = manifest is not None and (source != LIVE_SOURCE or options is None)
+if use_snapshot and source == LIVE_SOURCE:
+    st.sidebar.info("MySQL is unreachable, showing the snapshot instead.")
+pushdown = options is not None
+df = None
+# with pushdown the line items stay in MySQL and are aggregated there (see item_aggregate)
+items = None
+items_version = options["items_version"] if pushdown else None
+if use_snapshot:
+    df, items = load_snapshot(manifest["version"])
+elif not pushdown:
+    df = load_orders_from_db()
+    if df.empty:
+        st.title("E-commerce Analytics Dashboard")
+        st.warning("No data found in the 'orders' table. Please run the ETL to load data first.")
+        st.stop()
+    items, items_version = load_order_items_from_db()
+
+# Data freshness: the in-memory tables are revalidated in the background and swapped in
+# whole, so a rerun never waits on a reload; the button only wakes the refresh early
+def refresh_data():
+    load_filter_options.clear()
+    for table in ("orders", "order_items"):
+        if get_refresher(table).state is not None:
+            get_refresher(table).request_refresh()
+
+if use_snapshot:
+    st.sidebar.caption(f"Data: snapshot {manifest['version']}, taken {manifest['refreshed_at']}")
+elif pushdown:
+    count, max_id = options["version"]
+    st.sidebar.caption(f"Data version: {count:,} orders (max id {max_id}), checked "
+                       f"{options['checked_at']:%H:%M:%S}; filters run as live MySQL queries")
+else:
+    orders_source = get_refresher("orders")
+    state = orders_source.state
+    count, max_id = state.version
+    refreshed = f"{state.mode} refresh at {state.refreshed_at:%H:%M:%S}"
+    if state.mode == "incremental":
+        refreshed += f" (+{state.fetched:,} rows)"
+    st.sidebar.caption(f"Data version: {count:,} orders (max id {max_id}), {refreshed}"
+                       + ("; refreshing in the background…" if orders_source.refreshing else ""))
+if not use_snapshot:
+    st.sidebar.button("🔄 Refresh data", on_click=refresh_data,
+                      help="Reload in the background; the current data stays on screen meanwhile")
 
 # -------------------------
 # Sidebar filters
@@ -59,38 +346,218 @@ if df.empty:
 st.sidebar.header("Filters")
 
 # Date range
-min_date = df["order_date"].min()
-max_date = df["order_date"].max()
+min_date = options["min_date"] if pushdown else df["order_date"].min()
+max_date = options["max_date"] if pushdown else df["order_date"].max()
 date_range = st.sidebar.date_input("Order date range", value=(min_date.date(), max_date.date()),
                                    min_value=min_date.date(), max_value=max_date.date())
 
 # Country filter - handle both possible names
-country_col_candidates = [c for c in df.columns if "geoip" in c and "country" in c]
-country_col = country_col_candidates[0] if country_col_candidates else None
-countries = sorted(df[country_col].dropna().unique().tolist()) if country_col else []
+if pushdown:
+    country_col = COUNTRY_COL.replace(".", "_")
+    countries = options["countries"]
+else:
+    country_col_candidates = [c for c in df.columns if "geoip" in c and "country" in c]
+    country_col = country_col_candidates[0] if country_col_candidates else None
+    countries = sorted(df[country_col].dropna().unique().tolist()) if country_col else []
 selected_countries = st.sidebar.multiselect("Country", options=countries, default=countries)
 
 # Category filter
-category_list = sorted(df["category"].dropna().unique().tolist()) if "category" in df.columns else []
+if pushdown:
+    category_list = options["categories"]
+else:
+    category_list = category_index.vocabulary(df["category"]) if "category" in df.columns else []
 selected_categories = st.sidebar.multiselect("Category", options=category_list, default=category_list)
 
-# Customer search
+# Customer search, answered from a prebuilt name index rather than a scan of every order
 customer_search = st.sidebar.text_input("Customer name contains")
+name_index = load_customer_index() if pushdown else build_customer_index(df, len(df))
+customer_names = None
+if customer_search and name_index is not None:
+    suggestions = name_index.suggest(customer_search)
+    picked = st.sidebar.selectbox("Matching customers", ["(all matches)"] + suggestions)
+    customer_names = [picked] if picked != "(all matches)" else list(name_index.search(customer_search))
+
+# Approximate mode: sketches merged from the rollups and stratified samples instead of full scans
+approximate = st.sidebar.toggle("Approximate mode", help="HyperLogLog, top-k summaries and sampling, with error bounds")
 
-# Apply filters to a working dataframe
-filtered = df.copy()
-# date filtering
 start, end = date_range
-filtered = filtered[(filtered["order_date"].dt.date >= start) & (filtered["order_date"].dt.date <= end)]
-# country
-if country_col and selected_countries:
-    filtered = filtered[filtered[country_col].isin(selected_countries)]
-# category - categories in this dataset might be stringified lists; filter with substring
-if selected_categories:
-    filtered = filtered[filtered["category"].apply(lambda x: any(cat in str(x) for cat in selected_categories))]
-# customer search
-if customer_search:
-    filtered = filtered[filtered["customer_full_name"].str.contains(customer_search, case=False, na=False)]
+filtered = None
+query_filters = None
+if pushdown:
+    # "everything selected" is sent as no filter to keep the WHERE clause index-friendly
+    query_filters = {
+        "start": start, "end": end,
+        "countries": tuple(selected_countries) if set(selected_countries) != set(countries) else (),
+        "categories": tuple(selected_categories) if set(selected_categories) != set(category_list) else (),
+        "customer_search": customer_search,
+        # very broad matches are cheaper as one LIKE than as a huge IN list
+        "customer_names": (tuple(customer_names)
+                           if customer_names is not None and len(customer_names) <= MAX_NAMES_IN_QUERY else None),
+    }
+    filtered = load_filtered_orders(tuple(options["columns"]), **query_filters)
+if filtered is None:
+    if df is None:
+        df = load_orders_from_db()
+    if df.empty:
+        st.warning("Could not load the 'orders' table. Please check the MySQL connection.")
+        st.stop()
+    if customer_search and customer_names is None:
+        customer_names = build_customer_index(df, len(df)).search(customer_search)
+    filtered = apply_filters(df, country_col, start, end, selected_countries, selected_categories, customer_names)
+# the line items are grouped in MySQL as well when the orders were filtered there
+item_filters = query_filters if df is None else None
+
+# Overview charts can be answered from the rollups unless a filter they are not keyed on is active
+use_rollups = (not use_snapshot
+               and rollups.can_serve(customer_search, set(selected_categories) != set(category_list)))
+rollup_countries = tuple(selected_countries) if set(selected_countries) != set(countries) else ()
+
+# -------------------------
+# Aggregations (memoized per data version + filter state, shared by all sessions)
+# -------------------------
+if pushdown:
+    data_version = (options["version"], items_version)
+elif use_snapshot:
+    data_version = ("snapshot", manifest["version"])
+else:
+    data_version = ((len(df), int(df["id"].max()) if "id" in df.columns else None), items_version)
+filter_state = {
+    "start": start, "end": end, "countries": sorted(selected_countries), "categories": sorted(selected_categories),
+    "customers": customer_search if customer_names is None else sorted(customer_names), "pushdown": pushdown,
+    "approximate": approximate,
+}
+agg_cache = get_agg_cache()
+
+def aggregate(name, compute):
+    def timed_compute():
+        instrumentation.count("agg_cache.miss")
+        with span(f"aggregate.{name}") as record:
+            result = compute()
+            if isinstance(result, pd.DataFrame):
+                record["rows"] = len(result)
+            return result
+    instrumentation.count("agg_cache.lookup")
+    return agg_cache.get_or_compute(name, timed_compute, data_version, filter_state)
+
+def count_col(frame):
+    return ("order_id", "count") if "order_id" in frame.columns else ("taxful_total_price", "count")
+
+def compute_kpis():
+    total_revenue = filtered["taxful_total_price"].sum()
+    total_orders = filtered.shape[0]
+    unique_customers = (filtered["customer_id"].nunique() if "customer_id" in filtered.columns
+                        else filtered["customer_full_name"].nunique())
+    return total_revenue, total_orders, unique_customers
+
+def compute_country():
+    # observed=True: categorical columns would otherwise list every category, filtered out or not
+    return (filtered.groupby(country_col, observed=True)
+                    .agg(total_sales=("taxful_total_price", "sum"), total_orders=count_col(filtered))
+                    .reset_index()
+                    .sort_values("total_sales", ascending=False))
+
+def compute_monthly():
+    monthly = (filtered.groupby(filtered["order_date"].dt.to_period("M"))
+                       .agg(monthly_revenue=("taxful_total_price", "sum"))
+                       .reset_index())
+    monthly["order_date"] = monthly["order_date"].dt.strftime("%Y-%m")
+    return monthly
+
+def item_aggregate(name, limit):
+    """Line-item aggregate of the pushed-down filters, grouped in MySQL (None without pushdown or on failure)."""
+    if item_filters is None:
+        return None
+    return load_item_aggregate(name, customer=item_filters["customer_search"], limit=limit, **item_filters)
+
+def line_items():
+    # in pushdown mode the line items are only loaded if their GROUP BY query failed
+    return items if items is not None else load_order_items_from_db()[0]
+
+def compute_categories():
+    pushed = item_aggregate("top_categories", 10)
+    if pushed is not None:
+        return pushed.rename(columns={"total_revenue": "total_sales"})[["category", "total_sales"]]
+    # per individual category: an order counts towards every category in its list
+    return (category_index.sum_by_category(filtered["category"], filtered["taxful_total_price"])
+                          .rename_axis("category").reset_index(name="total_sales")
+                          .sort_values("total_sales", ascending=False).head(10))
+
+def compute_top_customers():
+    return (filtered.groupby("customer_full_name", observed=True)
+                    .agg(total_spent=("taxful_total_price", "sum"), orders=count_col(filtered))
+                    .reset_index()
+                    .sort_values("total_spent", ascending=False).head(20))
+
+def sample_filtered():
+    # stratified by month so every month of the range is represented, on the keys stored with the rows
+    keys = (filtered[sampling.SAMPLE_KEY] if sampling.SAMPLE_KEY in filtered.columns
+            else sampling.sample_keys(filtered["id"]))
+    return sampling.stratified_sample(filtered, sampling.month_strata(filtered["order_date"]), keys)
+
+def compute_country_sampled():
+    estimate = sampling.estimate_totals(aggregate("sample", sample_filtered), country_col, "taxful_total_price")
+    return estimate.rename(columns={"total": "total_sales"}).sort_values("total_sales", ascending=False)
+
+def compute_monthly_sampled():
+    sample = aggregate("sample", sample_filtered).assign(month=lambda f: f["order_date"].dt.strftime("%Y-%m"))
+    estimate = sampling.estimate_totals(sample, "month", "taxful_total_price")
+    return estimate.rename(columns={"month": "order_date", "total": "monthly_revenue"})
+
+def compute_gender():
+    gender = filtered["customer_gender"].value_counts()
+    gender = gender[gender > 0].reset_index()
+    gender.columns = ["gender", "count"]
+    return gender
+
+def compute_cohorts():
+    # one pass over the filtered orders into the sparse customer × month table feeds all three reports
+    customer_col = "customer_id" if "customer_id" in filtered.columns else "customer_full_name"
+    activity = cohorts.CustomerActivity().update(filtered, customer_col=customer_col)
+    return (cohorts.retention_matrix(activity), cohorts.repeat_purchases(activity),
+            cohorts.rfm_segments(cohorts.rfm(activity)))
+
+def filtered_items():
+    line = line_items()
+    return line[line["order_id"].isin(filtered["order_id"])]
+
+def compute_sku():
+    pushed = item_aggregate("top_skus", 20)
+    if pushed is not None:
+        return pushed[["sku", "total_sales", "qty"]]
+    if not line_items().empty:
+        return (filtered_items().groupby("sku", observed=True)
+                                .agg(total_sales=("taxful_price", "sum"), qty=("quantity", "sum"))
+                                .reset_index()
+                                .sort_values("total_sales", ascending=False).head(20))
+    return (filtered.groupby("sku", observed=True)
+                    .agg(total_sales=("taxful_total_price", "sum"), qty=("total_quantity", "sum"))
+                    .reset_index()
+                    .sort_values("total_sales", ascending=False).head(20))
+
+def compute_manufacturers():
+    pushed = item_aggregate("top_manufacturers", 10)
+    if pushed is not None:
+        return pushed[["manufacturer", "total_sales"]]
+    if not line_items().empty:
+        return (filtered_items().groupby("manufacturer", observed=True)
+                                .agg(total_sales=("taxful_price", "sum"))
+                                .reset_index()
+                                .sort_values("total_sales", ascending=False).head(10))
+    return (filtered.groupby("manufacturer", observed=True)
+                    .agg(total_sales=("taxful_total_price", "sum"))
+                    .reset_index()
+                    .sort_values("total_sales", ascending=False).head(10))
+
+def show_approx_top(top, floor, key, value, title):
+    """Table and chart of a merged top-k summary, with its error bounds."""
+    top = top.rename(columns={"key": key, "estimate": value, "lower": f"{value} (lower bound)"})
+    st.dataframe(top, use_container_width=True)
+    head = top.head(10)
+    fig = px.bar(head, x=key, y=value, error_y=[0] * len(head),
+                 error_y_minus=head[value] - head[f"{value} (lower bound)"], title=f"{title} (approximate)")
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"Bars are upper bounds and whiskers reach the guaranteed lower bound; "
+               f"anything the summaries did not keep totals at most {floor:,.2f}.")
 
 # -------------------------
 # Top-level KPIs
@@ -98,119 +565,340 @@ if customer_search:
 st.title("🛒 E-commerce Analytics Dashboard")
 kpi1, kpi2, kpi3, kpi4 = st.columns(4)
 
-total_revenue = filtered["taxful_total_price"].sum()
-total_orders = filtered.shape[0]
+kpi_totals = load_rollup_chart("totals", start, end, rollup_countries) if approximate and use_rollups else None
+if kpi_totals is not None:
+    # revenue and orders are exact sums of the rollup; distinct customers merge the per-day sketches
+    total_revenue, total_orders = kpi_totals
+    total_unique_customers = load_rollup_chart("unique_customers", start, end, rollup_countries) or 0
+else:
+    total_revenue, total_orders, total_unique_customers = aggregate("kpis", compute_kpis)
 avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
-total_unique_customers = filtered["customer_id"].nunique() if "customer_id" in filtered.columns else filtered["customer_full_name"].nunique()
 
 kpi1.metric("Total Revenue", f"{total_revenue:,.2f}")
 kpi2.metric("Total Orders", f"{total_orders:,}")
 kpi3.metric("Avg Order Value", f"{avg_order_value:,.2f}")
-kpi4.metric("Unique Customers", f"{total_unique_customers:,}")
+if kpi_totals is not None:
+    kpi4.metric("Unique Customers", f"≈ {total_unique_customers:,.0f}",
+                help=f"HyperLogLog estimate, ±{HLL_ERROR:.1%} standard error")
+else:
+    kpi4.metric("Unique Customers", f"{total_unique_customers:,}")
 
 st.markdown("---")
 
 # -------------------------
 # Tabs for dashboards
 # -------------------------
-tab_overview, tab_customers, tab_products, tab_data = st.tabs([
-    "Overview", "Customer Insights", "Product Performance", "Data Explorer"
-])
+# on_change="rerun" makes the tabs stateful: only the open tab's aggregations are computed
+tab_overview, tab_customers, tab_cohorts, tab_products, tab_map, tab_data = st.tabs([
+    "Overview", "Customer Insights", "Cohorts & Retention", "Product Performance", "Map", "Data Explorer"
+], key="active_tab", on_change="rerun")
 
 # -------------------------
 # Overview Tab
 # -------------------------
-with tab_overview:
-    st.subheader("Overview")
-
-    # Sales by country
-    if country_col:
-        agg_country = (filtered.groupby(country_col)
-                               .agg(total_sales=("taxful_total_price", "sum"),
-                                    total_orders=("order_id", "count") if "order_id" in filtered.columns else ("taxful_total_price","count"))
-                               .reset_index()
-                               .sort_values("total_sales", ascending=False))
-        fig_country = px.bar(agg_country, x=country_col, y="total_sales", title="Sales by Country", text_auto=".2s")
-        st.plotly_chart(fig_country, use_container_width=True)
-    else:
-        st.info("Country column not found in dataset.")
-
-    # Monthly revenue
-    if "order_date" in filtered.columns:
-        monthly = (filtered.groupby(filtered["order_date"].dt.to_period("M"))
-                          .agg(monthly_revenue=("taxful_total_price", "sum"))
-                          .reset_index())
-        monthly["order_date"] = monthly["order_date"].dt.strftime("%Y-%m")
-        fig_month = px.line(monthly, x="order_date", y="monthly_revenue", title="Monthly Revenue", markers=True)
-        fig_month.update_layout(xaxis_title="Month", yaxis_title="Revenue")
-        st.plotly_chart(fig_month, use_container_width=True)
-    else:
-        st.info("order_date column not found in dataset.")
-
-    # Top categories
-    if "category" in filtered.columns:
-        # categories may be lists stored as strings; aggregate by string
-        cat_agg = filtered.groupby("category").agg(total_sales=("taxful_total_price", "sum")).reset_index().sort_values("total_sales", ascending=False).head(10)
-        fig_cat = px.bar(cat_agg, x="category", y="total_sales", title="Top Categories by Revenue", text_auto=True)
-        st.plotly_chart(fig_cat, use_container_width=True)
+if tab_overview.open:
+    with tab_overview, span("render.Overview"):
+        st.subheader("Overview")
+
+        # Sales by country
+        agg_country = load_rollup_chart("sales_by_country", start, end, rollup_countries) if use_rollups else None
+        if agg_country is not None:
+            agg_country = agg_country.rename(columns={"country": country_col or "country"})
+            fig_country = px.bar(agg_country, x=country_col or "country", y="total_sales", title="Sales by Country", text_auto=".2s")
+            st.plotly_chart(fig_country, use_container_width=True)
+        elif country_col and approximate:
+            agg_country = aggregate("agg_country_sampled", compute_country_sampled)
+            fig_country = px.bar(agg_country, x=country_col, y="total_sales", error_y="error",
+                                 title="Sales by Country (estimated from a sample, 95% interval)")
+            st.plotly_chart(fig_country, use_container_width=True)
+        elif country_col:
+            agg_country = aggregate("agg_country", compute_country)
+            fig_country = px.bar(agg_country, x=country_col, y="total_sales", title="Sales by Country", text_auto=".2s")
+            st.plotly_chart(fig_country, use_container_width=True)
+        else:
+            st.info("Country column not found in dataset.")
+
+        # Monthly revenue
+        monthly = load_rollup_chart("monthly_revenue", start, end, rollup_countries) if use_rollups else None
+        if monthly is not None:
+            fig_month = px.line(monthly, x="month", y="monthly_revenue", title="Monthly Revenue", markers=True)
+            fig_month.update_layout(xaxis_title="Month", yaxis_title="Revenue")
+            st.plotly_chart(fig_month, use_container_width=True)
+        elif "order_date" in filtered.columns and approximate:
+            monthly = aggregate("monthly_sampled", compute_monthly_sampled)
+            fig_month = px.line(monthly, x="order_date", y="monthly_revenue", error_y="error", markers=True,
+                                title="Monthly Revenue (estimated from a sample, 95% interval)")
+            fig_month.update_layout(xaxis_title="Month", yaxis_title="Revenue")
+            st.plotly_chart(fig_month, use_container_width=True)
+        elif "order_date" in filtered.columns:
+            monthly = aggregate("monthly", compute_monthly)
+            fig_month = px.line(monthly, x="order_date", y="monthly_revenue", title="Monthly Revenue", markers=True)
+            fig_month.update_layout(xaxis_title="Month", yaxis_title="Revenue")
+            st.plotly_chart(fig_month, use_container_width=True)
+        else:
+            st.info("order_date column not found in dataset.")
+
+        # Top categories
+        cat_agg = load_rollup_chart("top_categories", start, end, rollup_countries) if use_rollups else None
+        if cat_agg is not None:
+            fig_cat = px.bar(cat_agg, x="category", y="total_revenue", title="Top Categories by Revenue", text_auto=True)
+            st.plotly_chart(fig_cat, use_container_width=True)
+        elif "category" in filtered.columns:
+            cat_agg = aggregate("cat_agg", compute_categories)
+            fig_cat = px.bar(cat_agg, x="category", y="total_sales", title="Top Categories by Revenue", text_auto=True)
+            st.plotly_chart(fig_cat, use_container_width=True)
 
 # -------------------------
 # Customer Insights Tab
 # -------------------------
-with tab_customers:
-    st.subheader("Customer Insights")
-
-    # Top customers
-    top_customers = (filtered.groupby("customer_full_name")
-                               .agg(total_spent=("taxful_total_price", "sum"),
-                                    orders=("order_id", "count") if "order_id" in filtered.columns else ("taxful_total_price","count"))
-                               .reset_index()
-                               .sort_values("total_spent", ascending=False).head(20))
-    st.markdown("**Top Customers**")
-    st.dataframe(top_customers, use_container_width=True)
-    fig_cust = px.bar(top_customers.head(10), x="customer_full_name", y="total_spent", title="Top 10 Customers by Spend")
-    st.plotly_chart(fig_cust, use_container_width=True)
-
-    # Gender split (if present)
-    if "customer_gender" in filtered.columns:
-        gender = filtered["customer_gender"].value_counts().reset_index()
-        gender.columns = ["gender", "count"]
-        fig_gender = px.pie(gender, names="gender", values="count", title="Gender Distribution")
-        st.plotly_chart(fig_gender, use_container_width=True)
-    else:
-        st.info("No 'customer_gender' column available.")
+if tab_customers.open:
+    with tab_customers, span("render.Customer Insights"):
+        st.subheader("Customer Insights")
+
+        # Top customers (rollups are monthly, so only whole-month ranges are served from them;
+        # approximate mode merges the per-day top-k summaries for any range)
+        approx_top = (load_rollup_chart("approx_top", start, end, rollup_countries, kind="customer")
+                      if approximate and use_rollups else None)
+        top_customers = load_rollup_chart("top_customers", start, end, rollup_countries) if use_rollups else None
+        if approx_top is not None:
+            show_approx_top(*approx_top, "customer_full_name", "total_spent", "Top 10 Customers by Spend")
+        elif top_customers is not None:
+            top_customers = top_customers.rename(columns={"customer": "customer_full_name"}).head(20)
+        else:
+            top_customers = aggregate("top_customers", compute_top_customers)
+        if approx_top is None:
+            st.markdown("**Top Customers**")
+            st.dataframe(top_customers, use_container_width=True)
+            fig_cust = px.bar(top_customers.head(10), x="customer_full_name", y="total_spent", title="Top 10 Customers by Spend")
+            st.plotly_chart(fig_cust, use_container_width=True)
+
+        # Gender split (if present)
+        if "customer_gender" in filtered.columns:
+            gender = aggregate("gender", compute_gender)
+            fig_gender = px.pie(gender, names="gender", values="count", title="Gender Distribution")
+            st.plotly_chart(fig_gender, use_container_width=True)
+        else:
+            st.info("No 'customer_gender' column available.")
 
 # -------------------------
-# Product Performance Tab
+# Cohorts & Retention Tab
 # -------------------------
-with tab_products:
-    st.subheader("Product Performance")
+if tab_cohorts.open:
+    with tab_cohorts, span("render.Cohorts & Retention"):
+        st.subheader("Cohorts & Retention")
+        if "order_date" not in filtered.columns or filtered.empty:
+            st.info("No orders match the current filters.")
+        else:
+            retention, repeat, segments = aggregate("cohorts", compute_cohorts)
+            st.caption("Customers are grouped by the month of their first order within the current filters.")
+
+            overall = repeat.iloc[-1]
+            col1, col2 = st.columns(2)
+            col1.metric("Customers", f"{int(overall['customers']):,}")
+            col2.metric("Repeat-purchase rate", f"{overall['repeat_rate']:.1%}",
+                        help="Share of customers with two or more orders")
+
+            # Retention heatmap: share of each cohort ordering again N months after its first order
+            ages = retention.drop(columns="customers")
+            fig_ret = px.imshow(ages, text_auto=".0%", aspect="auto", color_continuous_scale="Blues",
+                                labels={"x": "Months since first order", "y": "Cohort", "color": "Retention"},
+                                title="Cohort Retention")
+            st.plotly_chart(fig_ret, use_container_width=True)
+
+            fig_repeat = px.bar(repeat.iloc[:-1], x="cohort", y="repeat_rate", hover_data=["customers"],
+                                title="Repeat-Purchase Rate by Cohort")
+            fig_repeat.update_layout(yaxis_tickformat=".0%")
+            st.plotly_chart(fig_repeat, use_container_width=True)
+
+            # RFM segments from recency / frequency / monetary quintile scores
+            st.markdown("**RFM Segments**")
+            st.dataframe(segments, use_container_width=True)
+            fig_rfm = px.bar(segments, x="segment", y="customers", color="revenue", title="Customers per RFM Segment")
+            st.plotly_chart(fig_rfm, use_container_width=True)
 
-    # Top SKUs / manufacturers
-    if "sku" in filtered.columns:
-        sku_agg = filtered.groupby("sku").agg(total_sales=("taxful_total_price","sum"), qty=("total_quantity","sum")).reset_index().sort_values("total_sales", ascending=False).head(20)
-        st.dataframe(sku_agg, use_container_width=True)
-        fig_sku = px.bar(sku_agg.head(10), x="sku", y="total_sales", title="Top SKUs by Revenue")
-        st.plotly_chart(fig_sku, use_container_width=True)
+# -------------------------
+# Product Performance Tab
+# -------------------------
+if tab_products.open:
+    with tab_products, span("render.Product Performance"):
+        st.subheader("Product Performance")
+
+        # Top SKUs / manufacturers, aggregated per line item when order_items is there
+        has_items = item_filters is not None or not line_items().empty
+        approx_skus = (load_rollup_chart("approx_top", start, end, rollup_countries, kind="sku")
+                       if approximate and use_rollups else None)
+        if approx_skus is not None:
+            show_approx_top(*approx_skus, "sku", "total_sales", "Top SKUs by Revenue")
+        elif "sku" in filtered.columns or has_items:
+            sku_agg = aggregate("sku_agg", compute_sku)
+            st.dataframe(sku_agg, use_container_width=True)
+            fig_sku = px.bar(sku_agg.head(10), x="sku", y="total_sales", title="Top SKUs by Revenue")
+            st.plotly_chart(fig_sku, use_container_width=True)
+
+        if "manufacturer" in filtered.columns or has_items:
+            man_agg = aggregate("man_agg", compute_manufacturers)
+            fig_man = px.bar(man_agg, x="manufacturer", y="total_sales", title="Top Manufacturers by Revenue")
+            st.plotly_chart(fig_man, use_container_width=True)
 
-    if "manufacturer" in filtered.columns:
-        man_agg = filtered.groupby("manufacturer").agg(total_sales=("taxful_total_price","sum")).reset_index().sort_values("total_sales", ascending=False).head(10)
-        fig_man = px.bar(man_agg, x="manufacturer", y="total_sales", title="Top Manufacturers by Revenue")
-        st.plotly_chart(fig_man, use_container_width=True)
+# -------------------------
+# Map Tab
+# -------------------------
+if tab_map.open:
+    with tab_map, span("render.Map"):
+        st.subheader("Revenue Map")
+        zoom = st.select_slider("Grid cell size", options=list(geo.ZOOM_LEVELS), value=geo.DEFAULT_ZOOM, key="map_zoom",
+                                format_func=lambda z: f"{geo.ZOOM_NAMES[z]} ({geo.ZOOM_LEVELS[z]:g}°)")
+
+        # only the binned cells reach the browser: from the monthly geo rollup, or binned from the filtered rows
+        cells = load_rollup_chart("geo_cells", start, end, rollup_countries, zoom=zoom) if use_rollups else None
+        if cells is None and "geoip_lat" in filtered.columns:
+            cells = aggregate(f"geo_cells_{zoom}", lambda: geo.bin_orders(filtered, zoom, "geoip_lat", "geoip_lon"))
+        if cells is None:
+            st.info("No coordinates loaded yet: rerun load_to_mysql.py to parse geoip.location into geoip.lat / geoip.lon.")
+        elif cells.empty:
+            st.info("No orders with a location match the current filters.")
+        else:
+            fig_map = px.scatter_geo(cells, lat="lat", lon="lon", size="revenue", color="revenue",
+                                     hover_data={"order_count": True, "revenue": ":,.2f", "lat": False, "lon": False},
+                                     projection="natural earth", title="Revenue by Location")
+            st.plotly_chart(fig_map, use_container_width=True)
+            st.caption(f"{len(cells):,} cells for {int(cells['order_count'].sum()):,} orders with a location.")
 
 # -------------------------
 # Data Explorer Tab
 # -------------------------
-with tab_data:
-    st.subheader("Data Explorer")
-    st.markdown("Filter, search and export the filtered dataset below.")
+if tab_data.open:
+    with tab_data, span("render.Data Explorer"):
+        st.subheader("Data Explorer")
+        st.markdown("Filter, search and export the filtered dataset below.")
+
+        # Only the visible page is fetched (keyset seeks in MySQL) or sliced (in memory),
+        # so a page renders in the same time whatever the size of the result
+        # wide columns can be shown but not sorted on, under their MySQL or pandas names
+        wide = set(WIDE_COLUMNS) | {c.replace(".", "_") for c in WIDE_COLUMNS}
+        # in memory, the wide columns are not in the frame and are fetched by id for the page shown
+        lazy = [] if pushdown else [c.replace(".", "_") for c in WIDE_COLUMNS if c.replace(".", "_") not in filtered.columns]
+        browse_options = [c for c in (options["all_columns"] if pushdown else filtered.columns.tolist() + lazy)
+                          if c not in ("id", sampling.SAMPLE_KEY)]
+        default_columns = [c for c in browse_options if c not in wide]
+        sortable = ["id"] + default_columns
+        col_columns, col_sort, col_order, col_size = st.columns([4, 2, 1, 1])
+        shown = col_columns.multiselect("Columns", options=browse_options, default=default_columns, key="explorer_columns")
+        sort_col = col_sort.selectbox("Sort by", sortable, key="explorer_sort",
+                                      index=sortable.index("order_date") if "order_date" in sortable else 0)
+        descending = col_order.toggle("Descending", key="explorer_desc")
+        page_size = col_size.selectbox("Rows per page", PAGE_SIZES, index=1, key="explorer_page_size")
+
+        # the count comes with the filtered projection every tab already shares
+        total = filtered.shape[0]
+        pages = max(1, -(-total // page_size))
+        # a new result or ordering starts again from page 1 and forgets the page boundaries
+        browse_state = (data_version, repr(filter_state), sort_col, descending, page_size)
+        if st.session_state.get("explorer_state") != browse_state:
+            st.session_state["explorer_state"] = browse_state
+            st.session_state["explorer_page"] = 1
+            st.session_state["explorer_keys"] = {}
+        st.session_state["explorer_page"] = min(st.session_state["explorer_page"], pages)
+        page_no = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, step=1, key="explorer_page")
+        first_row = (page_no - 1) * page_size
+
+        page = None
+        if pushdown:
+            # (sort value, id) of the last row of the previous page, once that page has been shown
+            keys = st.session_state["explorer_keys"]
+            after = keys.get(page_no) if sort_col in KEYSET_COLUMNS else None
+            page = load_page(tuple(shown), sort_col, descending, after, 0 if after else first_row, page_size,
+                             data_version, **query_filters)
+            if page is not None:
+                if len(page) == page_size:
+                    # plain Python values: the connector cannot bind numpy scalars or pandas Timestamps
+                    value = page[sort_col].iloc[-1]
+                    if pd.isna(value):
+                        # a page ending among the NULL order dates (see build_page_query)
+                        value = None
+                    elif isinstance(value, pd.Timestamp):
+                        value = value.to_pydatetime()
+                    elif hasattr(value, "item"):
+                        value = value.item()
+                    keys[page_no + 1] = (value, int(page["id"].iloc[-1]))
+                page = prepare_orders(page[["id"] + list(shown)].copy())
+        if page is None:
+            # in memory: the sort order is computed once per filter state, a page is a slice of it
+            sort_key = sort_col.replace(".", "_")
+            order = aggregate(f"explorer_order.{sort_key}.{descending}",
+                              lambda: (filtered[sort_key].reset_index(drop=True)
+                                       .sort_values(ascending=not descending, kind="stable").index.to_numpy()))
+            page_columns = [c for c in ["id"] + [c.replace(".", "_") for c in shown] if c in filtered.columns]
+            page = filtered.iloc[order[first_row:first_row + page_size]][page_columns]
+            wanted = [c for c in lazy if c in shown]
+            if wanted and "id" in page.columns and len(page):
+                wide_columns = [c for c in WIDE_COLUMNS if c.replace(".", "_") in wanted]
+                wide = load_wide_columns(tuple(wide_columns), tuple(int(i) for i in page["id"]), use_snapshot)
+                if wide is not None:
+                    page = page.join(wide.set_index("id")[wanted], on="id")
+
+        st.write(f"Showing rows {min(first_row + 1, total):,}–{min(first_row + page_size, total):,} "
+                 f"of {total:,} after filters.")
+        st.dataframe(page, use_container_width=True, hide_index=True)
+
+        # Export filtered dataset: generated only when the button is clicked, written chunk by
+        # chunk to a temp file (straight from a server-side cursor when filters are pushed down)
+        if pushdown and query_filters is not None:
+            export_options = options["all_columns"]
+        else:
+            export_options = [c for c in filtered.columns if c != sampling.SAMPLE_KEY]
+        export_columns = st.multiselect("Columns to export", options=export_options, default=export_options)
+        export_format = st.selectbox("Export format", list(EXPORT_FORMATS))
+        extension, mime = EXPORT_FORMATS[export_format]
+
+        def make_export(columns=tuple(export_columns), fmt=export_format):
+            if pushdown and query_filters is not None:
+                sql, params = build_orders_query(list(columns), **query_filters)
+                conn = mysql.connector.connect(**DB_CONFIG)
+                try:
+                    return export_to_tempfile(iter_query_chunks(conn, sql, params), fmt)
+                finally:
+                    conn.close()
+            return export_to_tempfile(iter_frame_chunks(filtered, list(columns)), fmt)
+
+        st.download_button(f"📥 Download filtered data ({export_format})", data=make_export,
+                           file_name=f"filtered_orders{extension}", mime=mime, disabled=not export_columns)
 
-    st.write(f"Showing {filtered.shape[0]} rows after filters.")
-    st.dataframe(filtered, use_container_width=True)
+# -------------------------
+# Aggregation cache stats
+# -------------------------
+cache_stats = agg_cache.stats()
+st.sidebar.caption(f"Aggregation cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                   f"({cache_stats['hit_rate']:.0%}), {cache_stats['entries']} entries, "
+                   f"{cache_stats['bytes'] / 1e6:.1f} MB")
 
-    # Export filtered dataset
-    csv = filtered.to_csv(index=False).encode("utf-8")
-    st.download_button("📥 Download filtered data as CSV", data=csv, file_name="filtered_orders.csv", mime="text/csv")
+# -------------------------
+# Performance panel: spans of this rerun (cached loaders only show up when they ran)
+# -------------------------
+def request_profile():
+    st.session_state["profile_requested"] = True
+
+@st.cache_data
+def frame_memory(_df, version):
+    return int(_df.memory_usage(deep=True).sum())
+
+with st.sidebar.expander("Performance"):
+    lookups = run_metrics.counters["agg_cache.lookup"]
+    hits = lookups - run_metrics.counters["agg_cache.miss"]
+    st.caption(f"This rerun: {run_metrics.elapsed_ms():,.0f} ms, {filtered.shape[0]:,} rows in view, "
+               f"aggregations {hits}/{lookups} from cache")
+    if df is not None:
+        frame_bytes = frame_memory(df, data_version)
+        st.caption(f"In-memory orders frame: {frame_bytes / 1e6:,.1f} MB "
+                   f"({frame_bytes / max(len(df), 1):,.0f} MB per million rows)")
+    timings = run_metrics.summary()
+    timings["MB"] = timings.pop("bytes") / 1e6
+    st.dataframe(timings.round(1), use_container_width=True)
+    st.button("Profile the next rerun (cProfile)", on_click=request_profile)
+    if profiler is not None:
+        st.session_state["last_profile"] = instrumentation.stop_profile(profiler)
+    if "last_profile" in st.session_state:
+        st.code(st.session_state["last_profile"], language=None)
 
 # -------------------------
 # Footer
@@ -0,0 +1,340 @@
+# scripts/etl_pipeline.py
+"""Pipelined, multi-process version of load_to_mysql.load_chunks.
+
+    reader ──> process pool (clean + explode products) ──> bounded queue ──> writer thread(s)
+
+The main thread streams CSV chunks into a process pool, which does the
+CPU-bound parsing and cleaning; prepared chunks are handed to one or more
+writer threads, each with its own connection, doing the batched upserts and
+the rollup maintenance. At most `--workers + 2 * --writers` chunks are in
+flight at a time, so a slow database throttles the reader instead of
+filling memory.
+
+Chunks reach the writers in file order (or as soon as they are ready with
+`--unordered`). A chunk whose write fails is retried from the step that
+failed: the upserts are idempotent and the rollups are applied in a single
+transaction, so a retry never counts an order twice. A chunk that still
+fails, or one that cannot be parsed, stops the load; the watermark is not
+advanced and the run can simply be repeated.
+"""
+import multiprocessing
+import queue
+import threading
+import time
+from collections import Counter
+
+import pandas as pd
+from mysql.connector import Error
+
+import instrumentation
+from instrumentation import span
+from load_to_mysql import (clean_chunk, create_tables, delete_stale_items, existing_order_ids, explode_products,
+                           insert_batches, items_table_name, load_infile_batches, widen_columns)
+from rollups import apply_batch, refold_months, stale_months
+
+# write attempts per chunk after the first; the wait doubles every attempt
+RETRIES = 3
+RETRY_WAIT = 1.0
+
+
+class ChunkFailed(Exception):
+    """A chunk could not be prepared or written; the load stops.
+
+    `stored` is set when some of its rows were committed without their
+    rollups: a rerun sees those orders as old, so the rollups need a rebuild.
+    """
+
+    def __init__(self, chunk_no, error, stored=False):
+        super().__init__(chunk_no, error, stored)
+        self.chunk_no = chunk_no
+        self.error = error
+        self.stored = stored
+
+    def __str__(self):
+        return f"chunk {self.chunk_no + 1}: {self.error}"
+
+
+# -------------------------------
+# Process pool: parse and clean
+# -------------------------------
+def prepare_chunk(task):
+    """Clean one chunk and explode its products (runs in a worker process)."""
+    chunk_no, chunk, since = task
+    # spans are recorded here and shipped back with the chunk
+    recorder = instrumentation.activate(instrumentation.Recorder())
+    coerced = Counter()
+    try:
+        with span("clean", rows=len(chunk)):
+            chunk = clean_chunk(chunk, coerced)
+        if since is not None:
+            # >= keeps orders sharing the mark's timestamp, and orders without a date
+            # are never covered by the mark; the upsert absorbs repeats
+            chunk = chunk[chunk["order_date"].isna() | (chunk["order_date"] >= pd.Timestamp(since))]
+        with span("explode_products", rows=len(chunk)) as record:
+            items = explode_products(chunk)
+            record["items"] = len(items)
+    except Exception as e:
+        raise ChunkFailed(chunk_no, e) from None
+    return chunk_no, chunk, items, coerced, recorder.spans
+
+
+# -------------------------------
+# Writer threads: upsert and maintain the rollups
+# -------------------------------
+class Claims:
+    """New order ids of the chunks being written, so no two writers count the same order in the rollups."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inflight = {}
+
+    def new_orders(self, cursor, chunk_no, chunk):
+        """(orders of `chunk` neither stored nor claimed by another chunk in flight, stored orders of `chunk`)."""
+        with self.lock, span("existing_order_ids", rows=len(chunk)):
+            stored = existing_order_ids(cursor, chunk["order_id"])
+            taken = set(stored)
+            for ids in self.inflight.values():
+                taken |= ids
+            new = chunk[~chunk["order_id"].isin(taken)]
+            self.inflight[chunk_no] = set(int(i) for i in pd.unique(new["order_id"].dropna()))
+        return new, chunk[chunk["order_id"].isin(stored)]
+
+    def pending(self):
+        """Order ids written or about to be, but not yet folded into the rollups."""
+        with self.lock:
+            return set().union(*self.inflight.values())
+
+    def release(self, chunk_no):
+        # called once the chunk's orders are folded (or it failed), when the stored rows take over
+        with self.lock:
+            self.inflight.pop(chunk_no, None)
+
+
+class Writer(threading.Thread):
+    """Takes prepared chunks off `jobs` and writes them on its own connection."""
+
+    def __init__(self, connect, jobs, results, in_flight, failed, args, claims, rollup_lock, recorder):
+        super().__init__(daemon=True)
+        self.connect = connect
+        self.jobs = jobs
+        self.results = results
+        self.in_flight = in_flight
+        self.failed = failed
+        self.args = args
+        self.claims = claims
+        self.rollup_lock = rollup_lock
+        self.recorder = recorder
+        self.write = load_infile_batches if args.mode == "infile" else insert_batches
+        self.conn = self.cursor = None
+
+    def run(self):
+        instrumentation.activate(self.recorder)
+        try:
+            self.conn = self.connect()
+            self.cursor = self.conn.cursor()
+        except Exception as e:
+            # nothing can be written; fail every chunk handed to this writer
+            for job in iter(self.jobs.get, None):
+                self.finish(job[0], e)
+            return
+        try:
+            for chunk_no, chunk, items in iter(self.jobs.get, None):
+                if self.failed.is_set():
+                    # the load is stopping; queued chunks are dropped, not written
+                    self.finish(chunk_no, None)
+                    continue
+                try:
+                    self.finish(chunk_no, self.write_chunk(chunk_no, chunk, items))
+                except Exception as e:
+                    self.finish(chunk_no, e)
+        finally:
+            self.cursor.close()
+            self.conn.close()
+
+    def finish(self, chunk_no, result):
+        if isinstance(result, Exception):
+            # the other writers drop their chunks from now on
+            self.failed.set()
+        self.results.put((chunk_no, result))
+        # released here, not by the main thread, which may be waiting on the pool
+        self.in_flight.release()
+
+    def write_chunk(self, chunk_no, chunk, items):
+        """Write one chunk, retrying the failed step; returns (rows, items)."""
+        retries = getattr(self.args, "retries", RETRIES)
+        rollups = not self.args.no_rollups
+        new_orders = stale = None
+        done = set()
+        try:
+            for attempt in range(retries + 1):
+                try:
+                    if rollups and new_orders is None:
+                        # decided once: a retry must not treat its own committed rows as old
+                        claimed, reloaded = self.claims.new_orders(self.cursor, chunk_no, chunk)
+                        # re-loaded orders whose values changed: their months are recomputed once written
+                        stale = stale_months(self.conn, reloaded, items) if not reloaded.empty else set()
+                        new_orders = claimed
+                    done.add("started")
+                    if "orders" not in done:
+                        self.write(self.conn, self.cursor, chunk, self.args.batch_size)
+                        done.add("orders")
+                    if "items" not in done:
+                        delete_stale_items(self.conn, self.cursor, chunk, items, self.args.batch_size)
+                        self.write(self.conn, self.cursor, items, self.args.batch_size, table=items_table_name)
+                        done.add("items")
+                    if rollups and "rollups" not in done:
+                        # sketches are read, merged and written back: one chunk at a time
+                        with self.rollup_lock, span("rollups", rows=len(new_orders)):
+                            if not new_orders.empty:
+                                apply_batch(self.conn, new_orders,
+                                            items[items["order_id"].isin(new_orders["order_id"])])
+                            # folded: from here a refold may count these orders from the table
+                            self.claims.release(chunk_no)
+                        done.add("rollups")
+                    if stale:
+                        # orders other writers have stored but not folded yet are left to them
+                        with self.rollup_lock, span("refold_months", rows=len(stale)):
+                            refold_months(self.conn, stale, self.claims.pending())
+                    return len(chunk), len(items)
+                except Error as e:
+                    if attempt == retries or self.failed.is_set():
+                        raise ChunkFailed(chunk_no, e, stored=rollups and "started" in done) from None
+                    print(f"⚠️ chunk {chunk_no + 1}: {e}; retrying ({attempt + 1}/{retries})")
+                    self.reset()
+                    time.sleep(RETRY_WAIT * 2 ** attempt)
+        finally:
+            self.claims.release(chunk_no)
+
+    def reset(self):
+        """Drop the failed transaction, reconnecting if the connection was lost."""
+        try:
+            self.conn.rollback()
+        except Error:
+            pass
+        if not self.conn.is_connected():
+            self.conn.reconnect(attempts=3, delay=1)
+        self.cursor = self.conn.cursor()
+
+
+# -------------------------------
+# Pipeline
+# -------------------------------
+def load_chunks_parallel(conn, cursor, reader, args, connect, since=None):
+    """Same contract as load_chunks: returns (rows, items, max order_date, max order_id).
+
+    `conn` / `cursor` create the tables; `connect()` opens one connection per writer.
+    """
+    workers = max(1, getattr(args, "workers", 1))
+    writers = max(1, getattr(args, "writers", 1))
+    recorder = instrumentation.current()
+    failed = threading.Event()
+    # chunks read but not yet written; bounds the memory of the whole pipeline
+    in_flight = threading.BoundedSemaphore(workers + 2 * writers)
+    jobs = queue.Queue(maxsize=writers)
+    results = queue.Queue()
+
+    def tasks():
+        # consumed by the pool's feeder thread, which this recorder follows
+        instrumentation.activate(recorder)
+        for chunk_no, chunk in enumerate(instrumentation.timed_iter(reader, "read")):
+            while not in_flight.acquire(timeout=0.5):
+                if failed.is_set():
+                    return
+            if failed.is_set():
+                return
+            yield chunk_no, chunk, since
+
+    total_rows = total_items = 0
+    max_date, max_id = None, None
+    coerced = Counter()
+    error = None
+    sent = finished = 0
+
+    def collect(block=False):
+        nonlocal total_rows, total_items, error, finished
+        while True:
+            try:
+                chunk_no, result = results.get(block=block)
+            except queue.Empty:
+                return
+            finished += 1
+            if isinstance(result, Exception):
+                if error is None:
+                    error = result if isinstance(result, ChunkFailed) else ChunkFailed(chunk_no, result)
+                failed.set()
+            elif result is not None:
+                total_rows += result[0]
+                total_items += result[1]
+                print(f"   ↳ chunk {chunk_no + 1}: {total_rows} rows / {total_items} line items loaded so far")
+            if block:
+                return
+
+    # forked before any writer thread exists
+    pool = multiprocessing.Pool(workers)
+    claims, rollup_lock = Claims(), threading.Lock()
+    threads = [Writer(connect, jobs, results, in_flight, failed, args, claims, rollup_lock, recorder)
+               for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    try:
+        prepared = (pool.imap_unordered if getattr(args, "unordered", False) else pool.imap)(prepare_chunk, tasks())
+        tables_created = False
+        try:
+            for chunk_no, chunk, items, chunk_coerced, spans in prepared:
+                coerced.update(chunk_coerced)
+                if recorder is not None:
+                    for record in spans:
+                        recorder.add(record)
+                if chunk.empty:
+                    in_flight.release()
+                    continue
+                try:
+                    if not tables_created:
+                        types = create_tables(cursor, chunk, args)
+                        tables_created = True
+                    # before the chunk reaches a writer, so its values fit the columns
+                    with span("widen_columns", rows=len(chunk)):
+                        widen_columns(cursor, chunk, types)
+                except Error as e:
+                    raise ChunkFailed(chunk_no, e) from None
+                chunk_max_date, chunk_max_id = chunk["order_date"].max(), chunk["order_id"].max()
+                if pd.notna(chunk_max_date) and (max_date is None or chunk_max_date > max_date):
+                    max_date = chunk_max_date
+                if pd.notna(chunk_max_id) and (max_id is None or chunk_max_id > max_id):
+                    max_id = chunk_max_id
+
+                # blocks while every writer is busy: backpressure on the pool and the reader
+                while True:
+                    try:
+                        jobs.put((chunk_no, chunk, items), timeout=0.5)
+                        break
+                    except queue.Full:
+                        collect()
+                sent += 1
+                collect()
+                if failed.is_set():
+                    break
+        except Exception as e:
+            # a chunk the pool could not prepare, or tables that could not be created
+            error = error or (e if isinstance(e, ChunkFailed) else ChunkFailed(sent, e))
+            failed.set()
+    finally:
+        for _ in threads:
+            jobs.put(None)
+        while finished < sent:
+            collect(block=True)
+        for thread in threads:
+            thread.join()
+        collect()
+        if failed.is_set():
+            pool.terminate()
+        else:
+            pool.close()
+        pool.join()
+
+    for col, n in coerced.items():
+        if n:
+            print(f"⚠️ {n} unparseable '{col}' values were loaded as NULL")
+    if error is not None:
+        raise error
+    return total_rows, total_items, max_date, max_id
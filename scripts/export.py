@@ -0,0 +1,142 @@
+# scripts/export.py
+"""Chunked, on-demand export of filtered orders (CSV, gzip CSV, Parquet).
+
+Rows are pulled in fixed-size chunks, either from an in-memory frame or from
+an unbuffered (server-side) MySQL cursor, and written straight to an
+anonymous temp file, so an export never holds a second full copy of the
+data in memory.
+"""
+import gzip
+import io
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+try:
+    from mysql.connector import FieldType
+except ImportError:
+    FieldType = None
+
+EXPORT_CHUNK_ROWS = 50000
+
+# MySQL field type -> pandas dtype every chunk of a query result is given
+_INT_TYPES = {"TINY", "SHORT", "LONG", "INT24", "LONGLONG", "YEAR"}
+_FLOAT_TYPES = {"DECIMAL", "NEWDECIMAL", "FLOAT", "DOUBLE"}
+_DATE_TYPES = {"DATE", "NEWDATE", "DATETIME", "TIMESTAMP"}
+_TEXT_TYPES = {"VARCHAR", "VAR_STRING", "STRING", "ENUM", "JSON",
+               "TINY_BLOB", "MEDIUM_BLOB", "LONG_BLOB", "BLOB"}
+
+# label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+}
+if pa is not None:
+    EXPORT_FORMATS["Parquet (zstd)"] = (".parquet", "application/vnd.apache.parquet")
+
+
+def iter_frame_chunks(frame, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield successive row slices of `frame` restricted to `columns`."""
+    frame = frame[list(columns)] if columns else frame
+    for start in range(0, len(frame), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def _column_dtypes(description):
+    """{column: pandas dtype} from the column types MySQL reports for a result."""
+    dtypes = {}
+    for d in description if FieldType is not None else ():
+        kind = FieldType.get_info(d[1]) if isinstance(d[1], int) else None
+        if kind in _INT_TYPES:
+            dtypes[d[0]] = "Int64"
+        elif kind in _FLOAT_TYPES:
+            dtypes[d[0]] = "float64"
+        elif kind in _DATE_TYPES:
+            dtypes[d[0]] = "datetime64[us]"
+        elif kind in _TEXT_TYPES:
+            dtypes[d[0]] = "string"
+    return dtypes
+
+
+def iter_query_chunks(conn, sql, params=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield DataFrames of `chunk_rows` rows from an unbuffered cursor.
+
+    Columns are typed from the result's MySQL column types rather than from
+    each chunk's values, so a column that is all NULL (or has a NULL in an
+    INT) in one chunk gets the same dtype as in the others.
+    """
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(sql, params or ())
+        columns = list(cursor.column_names)
+        dtypes = _column_dtypes(cursor.description)
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield pd.DataFrame(rows, columns=columns).astype(dtypes)
+    finally:
+        cursor.close()
+
+
+def _plain(chunk):
+    """Categoricals become plain objects so every chunk has the same schema."""
+    categorical = [c for c in chunk.columns if isinstance(chunk[c].dtype, pd.CategoricalDtype)]
+    return chunk.astype({c: object for c in categorical}) if categorical else chunk
+
+
+def write_csv(chunks, fileobj, compress=False):
+    """Write chunks as one CSV (header once) to a binary file object."""
+    out = gzip.GzipFile(fileobj=fileobj, mode="wb") if compress else fileobj
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    rows = 0
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(text, index=False, header=(i == 0))
+        rows += len(chunk)
+    text.detach()
+    if compress:
+        out.close()
+    return rows
+
+
+def write_parquet(chunks, fileobj, compression="zstd"):
+    """Write chunks as row groups of one Parquet file.
+
+    The file's schema comes from the first chunk; a column with no values
+    there (Arrow type null) is written as string, which no later chunk
+    could otherwise be converted to.
+    """
+    if pa is None:
+        raise ImportError("Parquet export needs pyarrow (pip install pyarrow)")
+    writer, rows = None, 0
+    for chunk in chunks:
+        chunk = _plain(chunk)
+        if writer is None:
+            schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            schema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in schema],
+                               metadata=schema.metadata)
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            writer = pq.ParquetWriter(fileobj, table.schema, compression=compression)
+        else:
+            table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+        writer.write_table(table)
+        rows += len(chunk)
+    if writer is not None:
+        writer.close()
+    return rows
+
+
+def export_to_tempfile(chunks, fmt):
+    """Write `chunks` in format `fmt` to an anonymous temp file, rewound for reading."""
+    out = tempfile.TemporaryFile()
+    if fmt == "Parquet (zstd)":
+        write_parquet(chunks, out)
+    else:
+        write_csv(chunks, out, compress=(fmt == "CSV (gzip)"))
+    out.seek(0)
+    return out
@@ -1,102 +1,74 @@
+# scripts/generate_mock_sales.py
+"""Vectorized mock order generator for load and dashboard testing.
+
+Orders are generated in chunks with NumPy: customers (with repeat purchases),
+a product catalog, line items, seasonality (month_factors) and weekday/hour
+patterns. Every chunk is seeded from one SeedSequence, so the output only
+depends on --seed and --rows, not on the number of worker processes. Rows
+come out in the raw CSV format of data/ecom_dataset.csv, so they go through
+the same cleaning and loading path as the real data.
+
+    python scripts/generate_mock_sales.py --rows 10000000 --out data/mock --format parquet
+    python scripts/generate_mock_sales.py --rows 300 --to-mysql
 """
-import pandas as pd
-import random
-from datetime import datetime, timedelta
-import mysql.connector
-
-# Database connection
-conn = mysql.connector.connect(
-    host="localhost",
-    user="datauser",
-    password="Data@123",
-    database="ecom_db"   # change if your DB name is different
-)
-cursor = conn.cursor()
-
-# Generate mock sales for 6 months
-start_date = datetime(2019, 1, 1)
-months = ["2019-01", "2019-02", "2019-03", "2019-04", "2019-05", "2019-06"]
-rows = []
-
-for month in months:
-    # random number of orders per month
-    num_orders = random.randint(20, 50)
-    for i in range(num_orders):
-        order_date = start_date + timedelta(days=random.randint(0, 27))
-        rows.append({
-            "category": random.choice(["Electronics", "Clothing", "Home", "Toys", "Books"]),
-            "currency": "USD",
-            "customer_first_name": random.choice(["John", "Alice", "Mark", "Sophia", "David"]),
-            "customer_full_name": "",
-            "customer_gender": random.choice(["M", "F"]),
-            "customer_id": random.randint(1000, 9999),
-            "customer_last_name": random.choice(["Smith", "Johnson", "Brown", "Lee"]),
-            "customer_phone": None,
-            "day_of_week": order_date.strftime("%A"),
-            "day_of_week_i": order_date.weekday(),
-            "email": f"user{random.randint(1000,9999)}@example.com",
-            "geoip.city_name": random.choice(["New York", "Los Angeles", "London", "Paris", "Dubai"]),
-            "geoip.continent_name": "North America",
-            "geoip.country_iso_code": random.choice(["US", "GB", "AE", "FR", "CA"]),
-            "geoip.location": "",
-            "geoip.region_name": "",
-            "manufacturer": random.choice(["BrandA", "BrandB", "BrandC"]),
-            "order_date": order_date.strftime("%Y-%m-%d"),
-            "order_id": random.randint(10000, 99999),
-            "products": "Sample Product",
-            "products.created_on": order_date.strftime("%Y-%m-%d"),
-            "sku": f"SKU{random.randint(1000,9999)}",
-            "taxful_total_price": round(random.uniform(50, 500), 2),
-            "taxless_total_price": round(random.uniform(40, 480), 2),
-            "total_quantity": random.randint(1, 5),
-            "total_unique_products": random.randint(1, 3),
-            "type": "order",
-            "user": random.choice(["online", "mobile", "instore"]),
-        })
-
-# Convert to DataFrame
-df = pd.DataFrame(rows)
-
-# Insert into MySQL
-cols = ", ".join([f"`{c}`" for c in df.columns])
-placeholders = ", ".join(["%s"] * len(df.columns))
-insert_query = f"INSERT INTO orders ({cols}) VALUES ({placeholders})"
-
-for _, row in df.iterrows():
-    cursor.execute(insert_query, tuple(row))
-
-conn.commit()
-print(f"✅ Inserted {len(df)} mock rows into 'orders' table successfully!")
-cursor.close()
-conn.close()
-"""
-#####################################################################
-import mysql.connector
-import random
-from datetime import datetime, timedelta
+import argparse
+import os
+import time
+from argparse import Namespace
+from functools import lru_cache
+from multiprocessing import Pool
 
-# --------------------------
-# MySQL Connection
-# --------------------------
-conn = mysql.connector.connect(
-    host="localhost",
-    user="datauser",
-    password="Data@123",
-    database="ecom_db"   # ✅ use your actual DB name here
-)
-cursor = conn.cursor()
+import numpy as np
+import pandas as pd
 
 # --------------------------
 # Configuration
 # --------------------------
-countries = ["US", "AE", "EG", "FR", "GB", "MA", "MC", "SA", "CO", "TR"]
+START_DATE = "2019-01-01"
+END_DATE = "2020-12-31"
+CHUNK_ROWS = 250000
+DEFAULT_START_ID = 1_000_000
+
+# country -> (continent, region, city, lon, lat)
+countries = {
+    "US": ("North America", "New York", "New York", -74.0, 40.8),
+    "AE": ("Asia", "Dubai", "Dubai", 55.3, 25.3),
+    "EG": ("Africa", "Cairo Governorate", "Cairo", 31.3, 30.1),
+    "FR": ("Europe", "Alpes-Maritimes", "Nice", 7.3, 43.7),
+    "GB": ("Europe", "Birmingham", "Birmingham", -1.9, 52.5),
+    "MA": ("Africa", "Marrakech-Tensift-Al Haouz", "Marrakesh", -8.0, 31.6),
+    "MC": ("Europe", "", "Monte Carlo", 7.4, 43.7),
+    "SA": ("Asia", "", "Jeddah", 39.2, 21.5),
+    "CO": ("South America", "Bogota D.C.", "Bogotá", -74.1, 4.6),
+    "TR": ("Asia", "Istanbul", "Istanbul", 29.0, 41.0),
+}
+country_weights = [0.27, 0.09, 0.13, 0.12, 0.1, 0.06, 0.05, 0.06, 0.05, 0.07]
 categories = [
     "Men's Clothing", "Women's Clothing", "Men's Shoes",
-    "Women's Shoes", "Accessories", "Electronics"
+    "Women's Shoes", "Men's Accessories", "Women's Accessories"
 ]
-manufacturers = ["Nike", "Adidas", "Puma", "Apple", "Samsung", "Sony"]
+manufacturers = [
+    "Low Tide Media", "Elitelligence", "Oceanavigations", "Tigress Enterprises", "Pyramidustries",
+    "Angeldale", "Spherecords", "Primemaster", "Champion Arts", "Microlutions",
+]
+product_kinds = {
+    "Men's Clothing": ["Sweatshirt", "Chinos", "Shirt", "Jumper", "Jacket", "Tracksuit bottoms"],
+    "Women's Clothing": ["Jersey dress", "Blouse", "Summer dress", "Cardigan", "Jeans", "Tights"],
+    "Men's Shoes": ["Trainers", "Lace-ups", "Boots", "Slip-ons"],
+    "Women's Shoes": ["Classic heels", "Ankle boots", "Sandals", "Ballet pumps"],
+    "Men's Accessories": ["Belt", "Watch", "Wallet", "Hat"],
+    "Women's Accessories": ["Handbag", "Scarf", "Sunglasses", "Earrings"],
+}
+colours = ["black", "white", "navy", "grey", "red", "petrol", "beige", "khaki", "pink", "brown"]
+male_first_names = ["Eddie", "Yahya", "Youssef", "Jackson", "Kamal", "Yuri", "Robert", "Abd", "Oliver", "Sultan"]
+female_first_names = ["Gwen", "Brigitte", "Yasmine", "Rabbia Al", "Elyssa", "Wilhemina St.", "Mary", "Diane",
+                      "Sonya", "Betty"]
+# last names are built from syllables so large runs still have mostly distinct full names
+last_name_syllables = ["lo", "ve", "ben", "son", "bry", "an", "lam", "bert", "smi", "th", "bai", "ley", "mor",
+                       "gan", "wat", "kins", "un", "der", "wood", "per", "gra", "ves", "mc", "car", "ri", "ra",
+                       "han", "sen", "sha", "w", "ja", "cob", "mil", "ler", "tor", "res", "ke", "lly", "gar", "cia"]
 
-# Random monthly variation factors
+# Random monthly variation factors (order volume per month)
 month_factors = {
     1: 0.7,   # January - low season
     2: 0.8,
@@ -111,49 +83,264 @@ month_factors = {
     11: 1.5,  # November - Black Friday
     12: 1.6   # December - holidays
 }
+# Monday .. Sunday
+weekday_factors = [0.9, 0.85, 0.9, 0.95, 1.1, 1.25, 1.2]
+# share of orders per hour of day: quiet nights, lunch bump, evening peak
+hour_weights = [2, 1, 1, 1, 1, 2, 3, 4, 5, 6, 6, 7, 8, 7, 6, 6, 6, 7, 8, 9, 9, 8, 6, 4]
+# line items per order (1..4), roughly as in the real dataset
+items_per_order = [0.05, 0.85, 0.02, 0.08]
+
+MONTH_NAMES = np.array(["", "January", "February", "March", "April", "May", "June", "July", "August",
+                        "September", "October", "November", "December"], dtype=object)
+DAY_SUFFIXES = np.array([""] + ["th" if 11 <= d <= 13 else {1: "st", 2: "nd", 3: "rd"}.get(d % 10, "th")
+                                for d in range(1, 32)], dtype=object)
+WEEKDAY_NAMES = np.array(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
+                         dtype=object)
+
+# One line item of the `products` JSON. The product's own fields are filled in once per
+# catalog entry; the %%-escaped ones (quantity, line totals, order_id, created_on) per item.
+ITEM_TEMPLATE = ('{"base_price":%.2f,"discount_percentage":0,"quantity":%%d,"manufacturer":"%s",'
+                 '"tax_amount":0,"product_id":%d,"category":"%s","sku":"%s","taxless_price":%%.2f,'
+                 '"unit_discount_amount":0,"min_price":%.2f,"_id":"sold_product_%%d_%d","discount_amount":0,'
+                 '"created_on":"%%s","product_name":"%s","price":%.2f,"taxful_price":%%.2f,"base_unit_price":%.2f}')
 
-# --------------------------
-# Generate mock orders
-# --------------------------
-mock_data = []
-start_date = datetime(2019, 1, 1)
-
-for i in range(1, 301):  # 300 rows for realism
-    country = random.choice(countries)
-    category = random.choice(categories)
-    manufacturer = random.choice(manufacturers)
-    order_date = start_date + timedelta(days=random.randint(0, 365 * 2))  # 2019–2020
-    base_price = round(random.uniform(20, 250), 2)
-    quantity = random.randint(1, 5)
-    total = round(base_price * quantity, 2)
-    month_factor = month_factors.get(order_date.month, 1.0)
-    total = round(total * month_factor, 2)
-
-    mock_data.append((
-        category,
-        manufacturer,
-        country,
-        order_date.strftime("%Y-%m-%d"),
-        quantity,
-        total
-    ))
 
 # --------------------------
-# Insert mock data
+# Reference data (rebuilt identically in every worker from the seed)
 # --------------------------
-insert_query = """
-INSERT INTO orders (category, manufacturer, `geoip.country_iso_code`, order_date, total_quantity, taxful_total_price)
-VALUES (%s, %s, %s, %s, %s, %s)
-"""
+@lru_cache(maxsize=4)
+def build_catalog(seed, n_products=2000):
+    """Product catalog as a dict of NumPy arrays (JSON-quoted strings ready for splicing)."""
+    rng = np.random.default_rng([seed, 1])
+    category = np.array(categories, dtype=object)[rng.integers(0, len(categories), n_products)]
+    names = np.array([f"{product_kinds[c][i % len(product_kinds[c])]} - {colours[j]}" for c, i, j in
+                      zip(category, rng.integers(0, 1000, n_products), rng.integers(0, len(colours), n_products))],
+                     dtype=object)
+    manufacturer = np.array(manufacturers, dtype=object)[rng.integers(0, len(manufacturers), n_products)]
+    sku = np.array([f"ZO{p:05d}{p:05d}" for p in rng.permutation(100000)[:n_products]], dtype=object)
+    base_price = np.round(rng.lognormal(3.5, 0.5, n_products), 0) - 0.01
+    min_price = np.round(base_price * rng.uniform(0.45, 0.6, n_products), 2)
+    product_id = np.arange(n_products) + 5000
+    quote = np.frompyfunc('"{}"'.format, 1, 1)
+    return {
+        "base_price": base_price,
+        "category": quote(category),
+        "manufacturer": quote(manufacturer),
+        "sku": quote(sku),
+        "item_template": np.array([ITEM_TEMPLATE % (p, m, i, c, s, lo, i, n, p, p) for p, m, i, c, s, lo, n in
+                                   zip(base_price, manufacturer, product_id, category, sku, min_price, names)],
+                                  dtype=object),
+    }
+
+
+@lru_cache(maxsize=4)
+def build_customers(seed, n_customers):
+    rng = np.random.default_rng([seed, 2])
+    female = rng.random(n_customers) < 0.5
+    first = np.where(female,
+                     np.array(female_first_names, dtype=object)[rng.integers(0, len(female_first_names), n_customers)],
+                     np.array(male_first_names, dtype=object)[rng.integers(0, len(male_first_names), n_customers)])
+    syllables = np.array(last_name_syllables, dtype=object)
+    picks = rng.integers(0, len(syllables), (3, n_customers))
+    last = syllables[picks[0]] + syllables[picks[1]] + np.where(rng.random(n_customers) < 0.5, syllables[picks[2]], "")
+    last = pd.Series(last).str.capitalize().to_numpy(dtype=object)
+    customers = pd.DataFrame({
+        "customer_id": np.arange(n_customers) + 1000,
+        "customer_first_name": first,
+        "customer_last_name": last,
+        "customer_gender": np.where(female, "FEMALE", "MALE"),
+        "country": np.array(list(countries), dtype=object)[
+            rng.choice(len(countries), n_customers, p=np.array(country_weights) / sum(country_weights))],
+    })
+    customers["customer_full_name"] = customers["customer_first_name"] + " " + customers["customer_last_name"]
+    lowered = customers["customer_first_name"].str.lower()
+    customers["email"] = lowered + "@" + customers["customer_last_name"].str.lower() + "-family.zzz"
+    customers["user"] = lowered.str.split(" ").str[0]
+    geo = {iso: {"continent": c, "region": r, "city": city, "location": f'{{\n  "lon": {lon},\n  "lat": {lat}\n}}'}
+           for iso, (c, r, city, lon, lat) in countries.items()}
+    for field in ["city", "continent", "region", "location"]:
+        customers[field] = customers["country"].map({iso: g[field] for iso, g in geo.items()})
+    customers["region"] = customers["region"].replace("", np.nan)
+    # a few loyal customers place most orders: heavy-tailed purchase frequency
+    weights = 1.0 / (np.arange(n_customers) + 10.0) ** 0.8
+    rng.shuffle(weights)
+    customers.attrs["cdf"] = np.cumsum(weights) / weights.sum()
+    return customers
+
+
+@lru_cache(maxsize=4)
+def day_distribution(start, end):
+    days = pd.date_range(start, end, freq="D")
+    weights = (days.month.map(month_factors).to_numpy(dtype=float)
+               * np.asarray(weekday_factors)[days.weekday])
+    return days.to_numpy(dtype="datetime64[s]"), np.cumsum(weights) / weights.sum()
+
+
+def _iso_seconds(ts):
+    return np.datetime_as_string(ts, unit="s")
 
-cursor.executemany(insert_query, mock_data)
-conn.commit()
 
-print(f"✅ Inserted {cursor.rowcount} mock rows into 'orders' table successfully!")
+def _kibana_dates(ts):
+    """Format timestamps like the source export: 'March 30th 2019, 16:12:00.000'."""
+    iso = _iso_seconds(ts)
+    chars = iso.astype("U19").view("U1").reshape(-1, 19)
+    year = np.ascontiguousarray(chars[:, :4]).view("U4").ravel().astype(object)
+    clock = np.ascontiguousarray(chars[:, 11:]).view("U8").ravel().astype(object)
+    month = ts.astype("datetime64[M]").astype(int) % 12 + 1
+    day = (ts.astype("datetime64[D]") - ts.astype("datetime64[M]")).astype(int) + 1
+    return (MONTH_NAMES[month] + " " + day.astype(str).astype(object) + DAY_SUFFIXES[day] + " "
+            + year + ", " + clock + ".000")
+
+
+def _json_list(quoted, starts, ends):
+    return ["[" + ",".join(quoted[a:b]) + "]" for a, b in zip(starts, ends)]
+
 
 # --------------------------
-# Close connection
+# Generate one chunk of orders
 # --------------------------
-cursor.close()
-conn.close()
-print("🔒 MySQL connection closed.")
+def generate_chunk(task):
+    """Return the orders of one chunk as a DataFrame in the raw dataset format."""
+    seed, chunk_no, rows, first_id, n_customers, start, end = task
+    rng = np.random.default_rng(np.random.SeedSequence(seed).spawn(chunk_no + 1)[chunk_no])
+    catalog = build_catalog(seed)
+    customers = build_customers(seed, n_customers)
+    days, day_cdf = day_distribution(start, end)
+
+    # order header: customer, timestamp
+    cust = customers.iloc[np.searchsorted(customers.attrs["cdf"], rng.random(rows))].reset_index(drop=True)
+    hour_cdf = np.cumsum(hour_weights) / np.sum(hour_weights)
+    seconds = (np.searchsorted(hour_cdf, rng.random(rows)) * 3600 + rng.integers(0, 3600, rows))
+    order_ts = days[np.searchsorted(day_cdf, rng.random(rows))] + seconds.astype("timedelta64[s]")
+    order_id = np.arange(rows) + first_id
+
+    # line items, grouped by order
+    n_items = rng.choice(len(items_per_order), rows, p=items_per_order) + 1
+    ends = np.cumsum(n_items)
+    starts = ends - n_items
+    item_order = np.repeat(np.arange(rows), n_items)
+    product = rng.integers(0, len(catalog["base_price"]), len(item_order))
+    quantity = np.where(rng.random(len(item_order)) < 0.9, 1, 2)
+    line_total = np.round(catalog["base_price"][product] * quantity, 2)
+    order_total = np.bincount(item_order, weights=line_total, minlength=rows)
+    total_quantity = np.bincount(item_order, weights=quantity, minlength=rows).astype(int)
+
+    item_ts = order_ts[item_order]
+    created_on = (_iso_seconds(item_ts).astype(object) + "+00:00")
+    item_json = [template % (q, total, oid, created, total) for template, q, total, oid, created in zip(
+        catalog["item_template"][product], quantity.tolist(), line_total.tolist(),
+        order_id[item_order].tolist(), created_on)]
+    kibana = _kibana_dates(order_ts)
+
+    order_ts = pd.Series(order_ts)
+    money = np.char.add(np.char.add("$", np.char.mod("%.2f", order_total)), " ")
+    return pd.DataFrame({
+        "category": _json_list(catalog["category"][product], starts, ends),
+        "currency": "EUR",
+        "customer_first_name": cust["customer_first_name"],
+        "customer_full_name": cust["customer_full_name"],
+        "customer_gender": cust["customer_gender"],
+        "customer_id": cust["customer_id"],
+        "customer_last_name": cust["customer_last_name"],
+        "customer_phone": np.nan,
+        "day_of_week": WEEKDAY_NAMES[order_ts.dt.weekday.to_numpy()],
+        "day_of_week_i": order_ts.dt.weekday,
+        "email": cust["email"],
+        "geoip.city_name": cust["city"],
+        "geoip.continent_name": cust["continent"],
+        "geoip.country_iso_code": cust["country"],
+        "geoip.location": cust["location"],
+        "geoip.region_name": cust["region"],
+        "manufacturer": _json_list(catalog["manufacturer"][product], starts, ends),
+        "order_date": kibana,
+        "order_id": order_id,
+        "products": _json_list(item_json, starts, ends),
+        "products.created_on": _json_list('"' + kibana[item_order] + '"', starts, ends),
+        "sku": _json_list(catalog["sku"][product], starts, ends),
+        "taxful_total_price": money,
+        "taxless_total_price": np.round(order_total, 2),
+        "total_quantity": total_quantity,
+        "total_unique_products": n_items,
+        "type": "order",
+        "user": cust["user"],
+    })
+
+
+def write_chunk(task, out_dir, fmt):
+    """Worker: generate one chunk and write it to its own file; returns the row count."""
+    df = generate_chunk(task)
+    path = os.path.join(out_dir, f"mock_orders_{task[1]:05d}.{fmt}")
+    if fmt == "parquet":
+        df.to_parquet(path, index=False, compression="zstd")
+    else:
+        df.to_csv(path, index=False)
+    return len(df)
+
+
+def _write_task(args):
+    return write_chunk(*args)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate realistic mock e-commerce orders.")
+    parser.add_argument("--rows", type=int, default=300, help="number of orders to generate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--customers", type=int, default=None,
+                        help="distinct customers (default: rows / 8, so customers order repeatedly)")
+    parser.add_argument("--start", default=START_DATE, help="first order date")
+    parser.add_argument("--end", default=END_DATE, help="last order date")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="orders per chunk / output file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="generator processes")
+    parser.add_argument("--start-id", type=int, default=None,
+                        help=f"first order_id (default: after MAX(order_id) with --to-mysql, else {DEFAULT_START_ID})")
+    parser.add_argument("--out", default="data/mock", help="output directory for CSV/Parquet chunks")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--to-mysql", action="store_true",
+                        help="bulk insert into MySQL (with line items and rollups) instead of writing files")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per INSERT with --to-mysql")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    started = time.time()
+    conn = None
+    if args.to_mysql:
+        import mysql.connector
+        from load_to_mysql import DB_CONFIG
+
+        conn = mysql.connector.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+        if args.start_id is None:
+            # Continue after the highest existing order_id so mock orders never collide with real ones
+            cursor.execute("SELECT COALESCE(MAX(order_id), 0) FROM orders")
+            args.start_id = int(cursor.fetchone()[0]) + 1
+    start_id = DEFAULT_START_ID if args.start_id is None else args.start_id
+
+    n_customers = args.customers or max(1, args.rows // 8)
+    tasks = [(args.seed, no, min(args.chunk_rows, args.rows - first), start_id + first, n_customers,
+              args.start, args.end)
+             for no, first in enumerate(range(0, args.rows, args.chunk_rows))]
+    workers = max(1, min(args.workers or 1, len(tasks)))
+
+    with Pool(workers) as pool:
+        if conn is not None:
+            from load_to_mysql import load_chunks
+
+            # chunks are generated in parallel and loaded in order through the loader's path
+            load_args = Namespace(mode="batch", batch_size=args.batch_size, no_rollups=False)
+            rows, items, _, _ = load_chunks(conn, cursor, pool.imap(generate_chunk, tasks), load_args)
+            cursor.close()
+            conn.close()
+            print(f"✅ Inserted {rows} mock orders ({items} line items) into MySQL successfully!")
+        else:
+            os.makedirs(args.out, exist_ok=True)
+            rows = sum(pool.imap_unordered(_write_task, [(t, args.out, args.format) for t in tasks]))
+            print(f"✅ Wrote {rows} mock orders as {len(tasks)} {args.format} file(s) to {args.out}")
+
+    elapsed = time.time() - started
+    print(f"⏱️ {elapsed:.1f}s ({rows / elapsed:,.0f} orders/sec, {workers} worker(s))")
+
+
+if __name__ == "__main__":
+    main()
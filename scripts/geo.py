@@ -0,0 +1,86 @@
+# scripts/geo.py
+"""Spatial grid for map views of order locations.
+
+Orders are binned by their `geoip.lat` / `geoip.lon` into square cells of a
+fixed size in degrees, at a few zoom levels. A cell is addressed by two
+integers (row, column from the south-west corner), so binning is integer
+arithmetic plus one groupby, and cells of a zoom level add up across
+partitions: the loader keeps them per month in `rollup_monthly_geo`, and a
+map only ever receives the cells, never the individual orders.
+"""
+import numpy as np
+import pandas as pd
+
+from cleaning import LAT_COL, LON_COL
+
+# zoom level -> cell size in degrees (about 1100, 220, 55 and 11 km at the equator)
+ZOOM_LEVELS = {0: 10.0, 1: 2.0, 2: 0.5, 3: 0.1}
+ZOOM_NAMES = {0: "Continent", 1: "Country", 2: "Region", 3: "City"}
+DEFAULT_ZOOM = 1
+
+CELL_COLUMNS = ["zoom", "cell_lat", "cell_lon", "order_count", "revenue"]
+
+
+def cell_index(lat, lon, zoom):
+    """Integer (row, column) of the cell holding each point; NaN coordinates give -1."""
+    size = ZOOM_LEVELS[zoom]
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    known = ~(np.isnan(lat) | np.isnan(lon))
+    rows = np.full(len(lat), -1, np.int64)
+    cols = np.full(len(lon), -1, np.int64)
+    # the north pole and the antimeridian fall into the last row / column, not a new one
+    rows[known] = np.minimum(np.floor((lat[known] + 90) / size), 180 / size - 1)
+    cols[known] = np.minimum(np.floor((lon[known] + 180) / size), 360 / size - 1)
+    return rows, cols
+
+
+def cell_center(cell_lat, cell_lon, zoom):
+    size = ZOOM_LEVELS[zoom]
+    return (np.asarray(cell_lat) + 0.5) * size - 90, (np.asarray(cell_lon) + 0.5) * size - 180
+
+
+def bin_points(lat, lon, revenue, zooms=tuple(ZOOM_LEVELS), keys=None):
+    """Order count and revenue per cell at every zoom in `zooms`.
+
+    `keys` is an optional dict of extra key columns (e.g. month, country),
+    aligned with the points, that the cells are also grouped by.
+    """
+    keys = keys or {}
+    revenue = pd.to_numeric(pd.Series(np.asarray(revenue)), errors="coerce").fillna(0.0).to_numpy()
+    if keys:
+        # the extra keys are factorized once; each zoom then counts one int64 key per point
+        groups, key_values = pd.factorize(pd.MultiIndex.from_arrays([np.asarray(v) for v in keys.values()]))
+        key_values = key_values.to_frame(index=False, name=list(keys))
+    else:
+        groups, key_values = np.zeros(len(revenue), np.int64), pd.DataFrame(index=[0])
+    frames = []
+    for zoom in zooms:
+        n_rows, n_cols = round(180 / ZOOM_LEVELS[zoom]), round(360 / ZOOM_LEVELS[zoom])
+        rows, cols = cell_index(lat, lon, zoom)
+        located = rows >= 0
+        flat = (groups[located].astype(np.int64) * n_rows + rows[located]) * n_cols + cols[located]
+        cells, inverse = np.unique(flat, return_inverse=True)
+        part = key_values.iloc[cells // (n_rows * n_cols)].reset_index(drop=True)
+        part["zoom"] = zoom
+        part["cell_lat"] = cells // n_cols % n_rows
+        part["cell_lon"] = cells % n_cols
+        part["order_count"] = np.bincount(inverse, minlength=len(cells))
+        part["revenue"] = np.bincount(inverse, weights=revenue[located], minlength=len(cells))
+        frames.append(part)
+    if not frames:
+        return pd.DataFrame(columns=list(keys) + CELL_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def bin_orders(orders, zoom, lat_col=LAT_COL, lon_col=LON_COL):
+    """Cells of one zoom level for an orders frame, with their center coordinates."""
+    cells = bin_points(orders[lat_col], orders[lon_col], orders["taxful_total_price"], zooms=(zoom,))
+    return with_centers(cells, zoom)
+
+
+def with_centers(cells, zoom):
+    """Add the `lat` / `lon` of each cell's center, for plotting."""
+    cells = cells.copy()
+    cells["lat"], cells["lon"] = cell_center(cells["cell_lat"].to_numpy(dtype=np.int64),
+                                             cells["cell_lon"].to_numpy(dtype=np.int64), zoom)
+    return cells.sort_values("revenue", ascending=False).reset_index(drop=True)
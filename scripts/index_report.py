@@ -0,0 +1,71 @@
+# scripts/index_report.py
+"""Before/after timing of the analyze_views.py queries with and without the
+analytic indexes created by load_to_mysql.py.
+
+Run:  python scripts/index_report.py --repeat 5
+"""
+import argparse
+import statistics
+import time
+
+import mysql.connector
+from mysql.connector import Error
+
+from load_to_mysql import DB_CONFIG, create_indexes, drop_indexes, missing_indexes
+from queries import REPORT_QUERIES
+
+
+def time_queries(cursor, repeat):
+    """Return the median wall time (ms) of each report query."""
+    timings = {}
+    for name, query in REPORT_QUERIES.items():
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cursor.execute(query)
+            cursor.fetchall()
+            samples.append((time.perf_counter() - started) * 1000)
+        timings[name] = statistics.median(samples)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare report query times before/after analytic indexes.")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query (median is reported)")
+    args = parser.parse_args()
+
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+        print("✅ Connected to MySQL successfully!")
+    except Error as e:
+        print(f"❌ MySQL Connection Error: {e}")
+        exit()
+
+    try:
+        print("🧹 Dropping analytic indexes for the baseline run...")
+        drop_indexes(cursor)
+        before = time_queries(cursor, args.repeat)
+
+        print("🔧 Creating analytic indexes...")
+        create_indexes(cursor)
+        missing = missing_indexes(cursor)
+        after = time_queries(cursor, args.repeat)
+    except Error as e:
+        print(f"❌ MySQL Error: {e}")
+        return
+    finally:
+        cursor.close()
+        conn.close()
+
+    if missing:
+        print(f"⚠️ Not created, so the 'after' runs are without them: {', '.join(missing)}")
+    print(f"\n⏱️ Median query time over {args.repeat} runs (ms)")
+    print(f"{'query':<18}{'before':>12}{'after':>12}{'speedup':>10}")
+    for name in REPORT_QUERIES:
+        speedup = before[name] / after[name] if after[name] > 0 else float("inf")
+        print(f"{name:<18}{before[name]:>12.2f}{after[name]:>12.2f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# scripts/instrumentation.py
+"""Timing spans and counters for the ETL and the dashboard.
+
+A span times one stage (read, clean, insert, a DB fetch, an aggregation, a
+tab render) and carries optional fields such as rows and bytes. Finished
+spans go to the recorder active in the current thread (one per loader run
+or dashboard rerun) and, once JSON logging is enabled, are written one JSON
+object per line to the "ecom.metrics" logger.
+
+    recorder = activate(Recorder())
+    with span("clean", rows=len(chunk)):
+        ...
+    print(recorder.summary())
+"""
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import pandas as pd
+
+logger = logging.getLogger("ecom.metrics")
+# file path (or "-" for stderr) that JSON metrics are logged to, e.g. for the dashboard
+LOG_ENV = "ECOM_METRICS_LOG"
+
+_local = threading.local()
+
+
+class Recorder:
+    """Spans and counters of one run."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+        self.counters = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def summary(self):
+        """One row per span name: calls, total / max time, rows and bytes."""
+        with self._lock:
+            spans = pd.DataFrame(self.spans)
+        if spans.empty:
+            return pd.DataFrame(columns=["calls", "total_ms", "max_ms", "rows", "bytes"])
+        spans = spans.reindex(columns=spans.columns.union(["rows", "bytes"], sort=False))
+        return (spans.groupby("span", sort=False)
+                     .agg(calls=("ms", "size"), total_ms=("ms", "sum"), max_ms=("ms", "max"),
+                          rows=("rows", "sum"), bytes=("bytes", "sum"))
+                     .sort_values("total_ms", ascending=False))
+
+
+def activate(recorder):
+    """Make `recorder` collect the spans of the current thread; returns it."""
+    _local.recorder = recorder
+    return recorder
+
+
+def current():
+    return getattr(_local, "recorder", None)
+
+
+def _emit(record):
+    recorder = current()
+    if recorder is not None:
+        recorder.add(record)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({"ts": round(time.time(), 3), **record}, default=str))
+
+
+@contextmanager
+def span(name, **fields):
+    """Time the block; fields set on the yielded dict (rows, bytes, ...) are recorded with it."""
+    record = {"span": name, **fields}
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["ms"] = round((time.perf_counter() - started) * 1000, 3)
+        _emit(record)
+
+
+def timed_iter(iterable, name, **fields):
+    """Yield from `iterable`, recording the time spent producing each item as a span."""
+    iterator = iter(iterable)
+    while True:
+        with span(name, **fields) as record:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                record["rows"] = 0
+                return
+            if hasattr(item, "__len__"):
+                record["rows"] = len(item)
+        yield item
+
+
+def timed(name, measure_bytes=False):
+    """Decorator: record every call as a span, with rows when it returns a DataFrame.
+
+    `measure_bytes` also records the frame's deep size, which reads every
+    string; leave it off for calls that hand back an already built frame.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name) as record:
+                result = fn(*args, **kwargs)
+                # loaders may return (orders, items); the first frame is the one reported
+                frame = result[0] if isinstance(result, tuple) and result else result
+                if isinstance(frame, pd.DataFrame):
+                    record["rows"] = len(frame)
+                    if measure_bytes:
+                        record["bytes"] = frame_bytes(frame)
+            return result
+        return wrapper
+    return decorate
+
+
+def count(name, n=1):
+    recorder = current()
+    if recorder is not None:
+        recorder.count(name, n)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({"ts": round(time.time(), 3), "counter": name, "n": n}))
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def enable_json_logs(path=None):
+    """Log spans and counters as JSON lines to `path` ("-" or None: stderr); safe to call repeatedly."""
+    target = os.path.abspath(path) if path and path != "-" else "<stderr>"
+    if any(getattr(h, "_metrics_target", None) == target for h in logger.handlers):
+        return
+    handler = logging.StreamHandler(sys.stderr) if target == "<stderr>" else logging.FileHandler(target)
+    handler._metrics_target = target
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def enable_json_logs_from_env():
+    if os.environ.get(LOG_ENV):
+        enable_json_logs(os.environ[LOG_ENV])
+
+
+# -------------------------------
+# cProfile hook
+# -------------------------------
+def start_profile():
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def stop_profile(profiler, limit=40):
+    """Stop `profiler` and return its top functions by cumulative time as text."""
+    profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
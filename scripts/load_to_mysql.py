@@ -1,119 +1,692 @@
+import argparse
+import csv
+import json
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
 import pandas as pd
 import mysql.connector
 from mysql.connector import Error
-import re
+
+import instrumentation
+from cleaning import MONEY_COLS, clean_orders
+from instrumentation import span
+from rollups import apply_batch, create_rollup_tables, refold_months, stale_months
+from watermarks import create_watermark_table, file_fingerprint, get_watermark, open_incremental, save_watermark
 
 # -------------------------------
-# STEP 1: Load Dataset
+# Config
 # -------------------------------
 file_path = "data/ecom_dataset.csv"
+table_name = "orders"
+items_table_name = "order_items"
+
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "datauser",
+    "password": "Data@123",
+    "database": "ecom_db"
+}
+
+# Rows per INSERT / LOAD DATA statement (one commit per batch)
+BATCH_SIZE = 5000
+# Rows read from the CSV at a time; bounds memory regardless of file size
+CHUNK_SIZE = 50000
+
+money_cols = MONEY_COLS
 
-try:
-    df = pd.read_csv(file_path)
-    print(f"✅ Dataset loaded successfully with shape: {df.shape}")
-except FileNotFoundError:
-    print(f"❌ File not found at {file_path}. Please check the path.")
-    exit()
-except Exception as e:
-    print(f"❌ Error loading dataset: {e}")
-    exit()
 
 # -------------------------------
 # STEP 2: Data Cleaning
 # -------------------------------
-# Clean 'order_date'
-if "order_date" in df.columns:
-    df["order_date"] = pd.to_datetime(df["order_date"], errors="coerce").dt.strftime("%Y-%m-%d %H:%M:%S")
-    print("🧹 Cleaned 'order_date' format for MySQL compatibility.")
-
-# Clean money columns
-money_cols = ["taxful_total_price", "taxless_total_price"]
-
-for col in money_cols:
-    if col in df.columns:
-        df[col] = (
-            df[col]
-            .astype(str)
-            .apply(lambda x: re.sub(r"[^0-9.\-]", "", x.strip()) if x.strip() != "" else "0")
-            .astype(float)
-        )
-        print(f"🧹 Cleaned '{col}' column — removed symbols and converted to float.")
-
-# Replace NaNs with empty string
-df = df.fillna("")
-
-# Truncate long text fields
-if "products" in df.columns:
-    df["products"] = df["products"].astype(str).str.slice(0, 5000)
+def clean_chunk(df, coerced=None):
+    """Clean one chunk of the dataset in place and return it.
+
+    order_date is kept as datetime64 so schema inference maps it to DATETIME,
+    not TEXT. Unparseable values are tallied per column into `coerced`.
+    """
+    return clean_orders(df, coerced)
+
+
+# Line-item fields kept in order_items, in table column order
+ITEM_FIELDS = [
+    "product_id", "sku", "product_name", "manufacturer", "category",
+    "base_price", "quantity", "discount_amount", "taxless_price", "taxful_price", "created_on",
+]
+
+
+def _decode_products(values):
+    """Decode a column of JSON arrays in one json.loads call.
+
+    The strings are spliced into a single outer array so the C decoder runs
+    once per chunk; if any value is malformed we fall back to per-row decoding
+    and treat the bad rows as having no line items. Malformed values can also
+    splice into valid JSON (two half arrays, or a bare `1,2`), so the spliced
+    result only counts when it is one list per value; otherwise baskets
+    would land on the wrong orders.
+    """
+    values = [v if isinstance(v, str) and v.strip() != "" else "[]" for v in values]
+    if all(v.lstrip().startswith("[") and v.rstrip().endswith("]") for v in values):
+        try:
+            decoded = json.loads("[" + ",".join(values) + "]")
+            if len(decoded) == len(values) and all(isinstance(b, list) for b in decoded):
+                return decoded
+        except ValueError:
+            pass
+    decoded = []
+    for v in values:
+        try:
+            decoded.append(json.loads(v))
+        except ValueError:
+            decoded.append([])
+    return decoded
+
+
+def explode_products(df):
+    """Explode the `products` JSON of a chunk into one row per line item."""
+    if "products" not in df.columns or "order_id" not in df.columns:
+        return pd.DataFrame(columns=["order_id", "line_no"] + ITEM_FIELDS)
+
+    baskets = [b if isinstance(b, list) else [] for b in _decode_products(df["products"].tolist())]
+    lengths = np.fromiter((len(b) for b in baskets), dtype=np.int64, count=len(baskets))
+    items = pd.DataFrame.from_records([item for basket in baskets for item in basket], columns=ITEM_FIELDS)
+
+    items.insert(0, "order_id", np.repeat(df["order_id"].to_numpy(), lengths))
+    # position of each item inside its order: 0..n-1
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    items.insert(1, "line_no", np.arange(len(items)) - offsets)
+    items["created_on"] = pd.to_datetime(items["created_on"], errors="coerce", utc=True).dt.tz_localize(None)
+    return items
+
+
+def to_rows(df):
+    """Convert a cleaned chunk into MySQL-ready tuples, column by column.
+
+    NaN and blank strings become None; numpy scalars are boxed into plain
+    Python values by ``tolist()`` so the connector can bind them.
+    """
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        mask = series.isna()
+        if not pd.api.types.is_numeric_dtype(series):
+            mask |= series.astype(str).str.strip() == ""
+        columns.append(series.astype(object).where(~mask, None).tolist())
+    return list(zip(*columns))
 
-# -------------------------------
-# STEP 3: Connect to MySQL
-# -------------------------------
-try:
-    conn = mysql.connector.connect(
-        host="localhost",
-        user="datauser",
-        password="Data@123",
-        database="ecom_db"
-    )
-    cursor = conn.cursor()
-    print("✅ Connected to MySQL successfully!")
-except Error as e:
-    print(f"❌ MySQL Connection Error: {e}")
-    exit()
 
 # -------------------------------
 # STEP 4: Create Table Dynamically
 # -------------------------------
-table_name = "orders"
+# Closed value domains that may safely become ENUMs; other low-cardinality
+# strings stay VARCHAR so values unseen in the sample still load.
+ENUM_DOMAINS = {
+    "day_of_week": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
+    "customer_gender": ["MALE", "FEMALE"],
+}
+
+# Longest VARCHAR we emit; anything longer in the sample becomes MEDIUMTEXT.
+# An InnoDB index key holds at most 3072 bytes (768 utf8mb4 chars); 752 leaves
+# room for the numeric columns appended to the analytic indexes below.
+MAX_VARCHAR = 752
 
-columns = []
-for col, dtype in zip(df.columns, df.dtypes):
-    if "int" in str(dtype):
-        sql_type = "INT"
-    elif "float" in str(dtype):
-        sql_type = "FLOAT"
-    elif "datetime" in str(dtype):
-        sql_type = "DATETIME"
-    else:
-        sql_type = "TEXT"
-    columns.append(f"`{col}` {sql_type}")
-
-create_table_query = f"""
-CREATE TABLE IF NOT EXISTS {table_name} (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    {', '.join(columns)}
-);
-"""
-
-try:
+# Secondary indexes derived from the GROUP BYs in analyze_views.py and the
+# dashboard filters. Money / quantity columns are appended so each report
+# query can be answered from the index alone.
+ANALYTIC_INDEXES = [
+    ("uq_order_id", True, ["order_id"]),
+    ("idx_order_date_sales", False, ["order_date", "taxful_total_price"]),
+    ("idx_country_date", False, ["geoip.country_iso_code", "order_date"]),
+    ("idx_country_sales", False, ["geoip.country_iso_code", "taxful_total_price"]),
+    ("idx_customer_id", False, ["customer_id"]),
+    ("idx_customer_name_sales", False, ["customer_full_name", "taxful_total_price"]),
+    ("idx_category_sales", False, ["category", "total_quantity", "taxful_total_price"]),
+]
+
+
+def _varchar_length(max_len):
+    """Round the observed max length up with 2x headroom to a power of two."""
+    length = 32
+    while length < max_len * 2:
+        length *= 2
+    return min(length, MAX_VARCHAR)
+
+
+def infer_sql_type(col, series):
+    """Infer a MySQL column type from a sample of values."""
+    values = series.dropna()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "DATETIME"
+    if pd.api.types.is_bool_dtype(series):
+        return "TINYINT(1)"
+    if col in money_cols:
+        return "DECIMAL(12,2)"
+    if pd.api.types.is_integer_dtype(series):
+        if values.empty or (values.min() >= -2**31 and values.max() < 2**31):
+            return "INT"
+        return "BIGINT"
+    if pd.api.types.is_float_dtype(series) and not values.empty:
+        return "DOUBLE"
+
+    # Strings (or all-null columns, which pandas reads as float)
+    return _string_type(col, values)
+
+
+def _max_length(values):
+    if values.empty:
+        return 0
+    return int(values.astype(str).str.len().max())
+
+
+def _string_type(col, values):
+    """ENUM / VARCHAR / MEDIUMTEXT for the non-null `values` of a text column."""
+    if col in ENUM_DOMAINS and not values.empty and set(values.astype(str).unique()) <= set(ENUM_DOMAINS[col]):
+        return "ENUM({})".format(", ".join(f"'{v}'" for v in ENUM_DOMAINS[col]))
+    max_len = _max_length(values)
+    if max_len * 2 > MAX_VARCHAR:
+        return "MEDIUMTEXT"
+    return f"VARCHAR({_varchar_length(max_len)})"
+
+
+def infer_schema(df):
+    """Map every column of a sample chunk to a MySQL type."""
+    return {col: infer_sql_type(col, df[col]) for col in df.columns}
+
+
+def column_types(cursor, table=table_name):
+    """{column: declared type} of an existing table, e.g. 'varchar(64)' or "enum('MALE','FEMALE')"."""
+    cursor.execute(
+        "SELECT column_name, column_type FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = %s",
+        (table,),
+    )
+    return {name: ctype.decode() if isinstance(ctype, (bytes, bytearray)) else str(ctype)
+            for name, ctype in cursor.fetchall()}
+
+
+def _widened_type(cursor, col, current, series, table):
+    """A type for a column declared `current` that also holds `series`, or None if it already does."""
+    values = series.dropna()
+    kind = current.lower()
+    if values.empty or kind.endswith("text") or pd.api.types.is_bool_dtype(series):
+        return None
+    if kind.startswith(("int", "bigint")) and pd.api.types.is_numeric_dtype(series):
+        if (values % 1 != 0).any():
+            return "DOUBLE"
+        if kind.startswith("int") and (values.min() < -2**31 or values.max() >= 2**31):
+            return "BIGINT"
+        return None
+    if kind.startswith("enum"):
+        domain = re.findall(r"'((?:[^']|'')*)'", current)
+        if set(values.astype(str).unique()) <= set(domain):
+            return None
+        # a VARCHAR is at least 32 wide, so the enum's own values still fit
+        return _string_type(None, values)
+    if kind.startswith("varchar"):
+        if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            # typed VARCHAR(32) because it was all NULL in the first chunk: retype it while still empty
+            cursor.execute(f"SELECT 1 FROM {table} WHERE `{col}` IS NOT NULL LIMIT 1")
+            if not cursor.fetchall():
+                return infer_sql_type(col, series)
+        width = int(re.search(r"\d+", kind).group())
+        if _max_length(values) <= width:
+            return None
+        return _string_type(None, values)
+    return None
+
+
+def widen_columns(cursor, df, types, table=table_name):
+    """ALTER the columns of `table` whose type cannot hold the values of chunk `df`.
+
+    Types are inferred from the first chunk, so a later chunk may bring a
+    longer string, a larger integer or a value outside an ENUM, which strict
+    mode rejects and non-strict mode truncates. `types` (from column_types)
+    is updated in place; returns the widened columns.
+    """
+    widened = []
+    for col in df.columns:
+        if col not in types:
+            continue
+        wider = _widened_type(cursor, col, types[col], df[col], table)
+        if wider is None:
+            continue
+        # a TEXT column can only be indexed on a prefix: its indexes are dropped and recreated
+        reindex = [name for name, _, cols in ANALYTIC_INDEXES if col in cols] if wider.endswith("TEXT") else []
+        try:
+            if reindex:
+                present = existing_indexes(cursor, table)
+                for name in reindex:
+                    if name in present:
+                        cursor.execute(f"DROP INDEX `{name}` ON {table}")
+            cursor.execute(f"ALTER TABLE {table} MODIFY `{col}` {wider}")
+        except Error as e:
+            print(f"⚠️ Could not widen '{col}' to {wider}: {e}")
+            continue
+        finally:
+            if reindex:
+                create_indexes(cursor, table)
+        print(f"✅ Widened '{col}': {types[col]} -> {wider}")
+        types[col] = wider
+        widened.append(col)
+    return widened
+
+
+def create_table(cursor, df):
+    """Create the target table with types inferred from the first chunk."""
+    schema = infer_schema(df)
+    columns = [f"`{col}` {sql_type}" for col, sql_type in schema.items()]
+
+    create_table_query = f"""
+    CREATE TABLE IF NOT EXISTS {table_name} (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        {', '.join(columns)}
+    );
+    """
     cursor.execute(create_table_query)
-    print(f"✅ Created table '{table_name}' dynamically based on dataset columns.")
-except Error as e:
-    print(f"❌ Error creating table: {e}")
-    conn.close()
-    exit()
+    return schema
+
+
+def add_missing_columns(cursor, schema, table=table_name):
+    """Add the columns of `schema` an existing table lacks (e.g. geoip.lat / geoip.lon); returns their names."""
+    cursor.execute(
+        "SELECT column_name, data_type FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = %s",
+        (table,),
+    )
+    present = {name for name, _ in cursor.fetchall()}
+    missing = [col for col in schema if col not in present]
+    for col in missing:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN `{col}` {schema[col]}")
+    return missing
+
+
+def create_items_table(cursor):
+    """Create the order_items fact table (one row per product in an order)."""
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {items_table_name} (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        order_id INT NOT NULL,
+        line_no SMALLINT NOT NULL,
+        product_id INT,
+        sku VARCHAR(64),
+        product_name VARCHAR(255),
+        manufacturer VARCHAR(128),
+        category VARCHAR(128),
+        base_price DECIMAL(12,2),
+        quantity INT,
+        discount_amount DECIMAL(12,2),
+        taxless_price DECIMAL(12,2),
+        taxful_price DECIMAL(12,2),
+        created_on DATETIME,
+        UNIQUE KEY uq_order_line (order_id, line_no),
+        KEY idx_sku_sales (sku, taxful_price, quantity),
+        KEY idx_manufacturer_sales (manufacturer, taxful_price),
+        KEY idx_category_sales (category, taxful_price, quantity)
+    );
+    """)
+
+
+def existing_indexes(cursor, table):
+    cursor.execute(
+        "SELECT DISTINCT index_name FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = %s",
+        (table,),
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _key_part(col, declared):
+    """Index key part for a column: TEXT, and VARCHARs too wide for a key (older loads), on a prefix."""
+    kind = declared.lower()
+    width = re.search(r"\((\d+)\)", kind)
+    if kind.endswith("text") or (kind.startswith("varchar") and width and int(width.group(1)) > MAX_VARCHAR):
+        return f"`{col}`({MAX_VARCHAR})"
+    return f"`{col}`"
+
+
+def create_indexes(cursor, table=table_name):
+    """Create the analytic indexes that are missing on `table`.
+
+    Indexes over columns that do not exist are skipped, and any index that
+    cannot be created, with a warning; index_report.py lists them.
+    """
+    declared = column_types(cursor, table)
+    present = existing_indexes(cursor, table)
+
+    created = []
+    for name, unique, cols in ANALYTIC_INDEXES:
+        if name in present:
+            continue
+        if any(c not in declared for c in cols):
+            print(f"⚠️ Skipping index '{name}': columns missing.")
+            continue
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        try:
+            cursor.execute(f"CREATE {kind} `{name}` ON {table} ({', '.join(_key_part(c, declared[c]) for c in cols)})")
+            created.append(name)
+        except Error as e:
+            print(f"⚠️ Could not create index '{name}': {e}")
+    return created
+
+
+def missing_indexes(cursor, table=table_name):
+    """Names of the analytic indexes `table` does not have."""
+    present = existing_indexes(cursor, table)
+    return [name for name, _, _ in ANALYTIC_INDEXES if name not in present]
+
+
+def drop_indexes(cursor, table=table_name):
+    """Drop the analytic indexes from `table`; used by index_report.py."""
+    present = existing_indexes(cursor, table)
+    for name, _, _ in ANALYTIC_INDEXES:
+        if name in present:
+            cursor.execute(f"DROP INDEX `{name}` ON {table}")
+
 
 # -------------------------------
 # STEP 5: Insert Data
 # -------------------------------
-insert_query = f"""
-INSERT INTO {table_name} ({', '.join([f'`{c}`' for c in df.columns])})
-VALUES ({', '.join(['%s'] * len(df.columns))});
-"""
-
-def clean_row(row):
-    """Convert values to correct MySQL-friendly types."""
-    return tuple(None if str(x).strip() == "" else x for x in row)
-
-try:
-    for _, row in df.iterrows():
-        cursor.execute(insert_query, clean_row(row))
+def insert_batches(conn, cursor, df, batch_size, table=table_name):
+    """Upsert a chunk with multi-row INSERTs, committing after every batch.
+
+    Rows that collide on the table's natural key (order_id, or
+    order_id + line_no for line items) overwrite the stored row, so loading
+    the same records twice is a no-op.
+    """
+    cols = [f"`{c}`" for c in df.columns]
+    insert_query = (
+        f"INSERT INTO {table} ({', '.join(cols)}) "
+        f"VALUES ({', '.join(['%s'] * len(cols))}) "
+        f"ON DUPLICATE KEY UPDATE {', '.join(f'{c} = VALUES({c})' for c in cols)}"
+    )
+    rows = to_rows(df)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        with span(f"insert.{table}", rows=len(batch)):
+            # executemany() rewrites a plain INSERT ... VALUES into one multi-row statement
+            cursor.executemany(insert_query, batch)
+            conn.commit()
+    return len(rows)
+
+
+def load_infile_batches(conn, cursor, df, batch_size, table=table_name):
+    """Load a chunk through LOAD DATA LOCAL INFILE, one temp file per batch.
+
+    REPLACE makes rows that collide on a unique key replace the stored row.
+    """
+    load_query = (
+        f"LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE {table} "
+        "CHARACTER SET utf8mb4 "
+        "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+        "LINES TERMINATED BY '\\n' "
+        f"({', '.join([f'`{c}`' for c in df.columns])})"
+    )
+    for col in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].where(df[col].astype(str).str.strip() != "")
+
+    loaded = 0
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start:start + batch_size]
+        tmp = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8", newline="")
+        try:
+            # NULL is written unquoted so LOAD DATA reads it as SQL NULL
+            batch.to_csv(tmp, index=False, header=False, na_rep="NULL",
+                         quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
+            tmp.close()
+            with span(f"insert.{table}", rows=len(batch), bytes=os.path.getsize(tmp.name)):
+                cursor.execute(load_query, (tmp.name,))
+                conn.commit()
+            loaded += len(batch)
+        finally:
+            tmp.close()
+            os.remove(tmp.name)
+    return loaded
+
+
+def delete_stale_items(conn, cursor, chunk, items, batch_size=BATCH_SIZE):
+    """Delete stored line items past the end of each order's basket in `items`.
+
+    The upsert only overwrites lines 0..n-1, so an order re-loaded with a
+    shorter products list would keep its old trailing lines. Orders are
+    grouped by basket size: one DELETE per size and batch.
+    """
+    sizes = items.groupby("order_id").size()
+    order_ids = pd.Series(pd.unique(chunk["order_id"].dropna()))
+    lines = order_ids.map(sizes).fillna(0).astype(int)
+    deleted = 0
+    for n, ids in order_ids.groupby(lines.to_numpy()):
+        ids = [int(i) for i in ids]
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            cursor.execute(
+                f"DELETE FROM {items_table_name} WHERE line_no >= %s "
+                f"AND order_id IN ({', '.join(['%s'] * len(batch))})", [int(n)] + batch)
+            deleted += max(cursor.rowcount, 0)
     conn.commit()
-    print(f"✅ Successfully inserted {len(df)} rows into '{table_name}'!")
-except Error as e:
-    print(f"❌ MySQL Error: {e}")
-finally:
-    cursor.close()
-    conn.close()
-    print("🔒 MySQL connection closed.")
+    return deleted
+
+
+def existing_order_ids(cursor, order_ids, batch_size=BATCH_SIZE):
+    """Return the subset of `order_ids` already present in the orders table."""
+    ids = [int(i) for i in pd.unique(order_ids.dropna())]
+    found = set()
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        cursor.execute(
+            f"SELECT order_id FROM {table_name} WHERE order_id IN ({', '.join(['%s'] * len(batch))})", batch)
+        found.update(row[0] for row in cursor.fetchall())
+    return found
+
+
+def create_tables(cursor, chunk, args):
+    """Create orders (typed from the first chunk), its indexes, order_items and the rollups.
+
+    Returns the declared column types of orders, for widen_columns().
+    """
+    with span("create_table"):
+        existed = bool(column_types(cursor))
+        schema = create_table(cursor, chunk)
+        if not existed:
+            print(f"✅ Created table '{table_name}' with inferred types:")
+            for col, sql_type in schema.items():
+                print(f"   {col}: {sql_type}")
+        added = add_missing_columns(cursor, schema)
+        if added:
+            print(f"✅ Added columns to the existing '{table_name}' table: {', '.join(added)}")
+        created = create_indexes(cursor)
+        if created:
+            print(f"✅ Created indexes: {', '.join(created)}")
+        create_items_table(cursor)
+        if not args.no_rollups:
+            create_rollup_tables(cursor)
+        return column_types(cursor)
+
+
+def load_chunks(conn, cursor, reader, args, since=None):
+    """Clean and write every chunk of `reader`; returns (rows, items, max order_date, max order_id)."""
+    write_chunk = load_infile_batches if args.mode == "infile" else insert_batches
+    total_rows = 0
+    total_items = 0
+    max_date, max_id = None, None
+    coerced = Counter()
+
+    for chunk_no, chunk in enumerate(instrumentation.timed_iter(reader, "read")):
+        with span("clean", rows=len(chunk)):
+            chunk = clean_chunk(chunk, coerced)
+        if since is not None:
+            # >= keeps orders sharing the mark's timestamp, and orders without a date
+            # are never covered by the mark; the upsert absorbs repeats
+            chunk = chunk[chunk["order_date"].isna() | (chunk["order_date"] >= pd.Timestamp(since))]
+            if chunk.empty:
+                continue
+        if total_rows == 0:
+            types = create_tables(cursor, chunk, args)
+        with span("widen_columns", rows=len(chunk)):
+            widen_columns(cursor, chunk, types)
+
+        with span("explode_products", rows=len(chunk)) as record:
+            items = explode_products(chunk)
+            record["items"] = len(items)
+        # only orders not loaded before may be added to the rollup counters; re-loaded
+        # orders whose values changed have their months recomputed once they are written
+        new_orders, stale = chunk, set()
+        if not args.no_rollups:
+            with span("existing_order_ids", rows=len(chunk)):
+                reloaded = chunk["order_id"].isin(existing_order_ids(cursor, chunk["order_id"]))
+                new_orders = chunk[~reloaded]
+            if reloaded.any():
+                with span("stale_months", rows=int(reloaded.sum())):
+                    stale = stale_months(conn, chunk[reloaded], items)
+
+        total_rows += write_chunk(conn, cursor, chunk, args.batch_size)
+        with span("delete_stale_items", rows=len(chunk)):
+            delete_stale_items(conn, cursor, chunk, items, args.batch_size)
+        total_items += write_chunk(conn, cursor, items, args.batch_size, table=items_table_name)
+        if not args.no_rollups and not new_orders.empty:
+            with span("rollups", rows=len(new_orders)):
+                apply_batch(conn, new_orders, items[items["order_id"].isin(new_orders["order_id"])])
+        if stale:
+            with span("refold_months", rows=len(stale)):
+                refold_months(conn, stale)
+        print(f"   ↳ chunk {chunk_no + 1}: {total_rows} rows / {total_items} line items loaded so far")
+
+        chunk_max_date, chunk_max_id = chunk["order_date"].max(), chunk["order_id"].max()
+        if pd.notna(chunk_max_date) and (max_date is None or chunk_max_date > max_date):
+            max_date = chunk_max_date
+        if pd.notna(chunk_max_id) and (max_id is None or chunk_max_id > max_id):
+            max_id = chunk_max_id
+
+    for col, n in coerced.items():
+        if n:
+            print(f"⚠️ {n} unparseable '{col}' values were loaded as NULL")
+    return total_rows, total_items, max_date, max_id
+
+
+def print_stage_timings(recorder):
+    summary = recorder.summary()
+    if summary.empty:
+        return
+    print("⏱️ Time per stage:")
+    for stage, row in summary.iterrows():
+        rows = f", {row['rows']:,.0f} rows" if pd.notna(row["rows"]) and row["rows"] else ""
+        print(f"   {stage:<20}{row['total_ms'] / 1000:>9.2f}s  ({int(row['calls'])} calls{rows})")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load the e-commerce dataset into MySQL.")
+    parser.add_argument("--file", default=file_path, help="CSV file to load")
+    parser.add_argument("--mode", choices=["batch", "infile"], default="batch",
+                        help="batch: multi-row INSERTs, infile: LOAD DATA LOCAL INFILE")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="rows per INSERT / LOAD DATA statement and per commit")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE,
+                        help="rows read from the CSV at a time")
+    parser.add_argument("--no-rollups", action="store_true",
+                        help="skip incremental maintenance of the rollup tables")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only load records past the stored watermark of this file")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes cleaning chunks in parallel (see etl_pipeline.py)")
+    parser.add_argument("--writers", type=int, default=1,
+                        help="threads writing chunks, each on its own connection")
+    parser.add_argument("--unordered", action="store_true",
+                        help="write chunks as soon as they are cleaned instead of in file order")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="write attempts per chunk after the first (parallel load only)")
+    parser.add_argument("--metrics-log", default=None,
+                        help="write per-stage timing spans as JSON lines to this file ('-' for stderr)")
+    return parser.parse_args()
+
+
+def main():
+    # imported here: etl_pipeline itself imports this module
+    from etl_pipeline import ChunkFailed, load_chunks_parallel
+
+    args = parse_args()
+    source = os.path.abspath(args.file)
+    if args.metrics_log:
+        instrumentation.enable_json_logs(args.metrics_log)
+    recorder = instrumentation.activate(instrumentation.Recorder())
+
+    # -------------------------------
+    # STEP 1: Connect to MySQL
+    # -------------------------------
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG, allow_local_infile=(args.mode == "infile"))
+        cursor = conn.cursor()
+        print("✅ Connected to MySQL successfully!")
+    except Error as e:
+        print(f"❌ MySQL Connection Error: {e}")
+        exit()
+
+    # -------------------------------
+    # STEP 3: Open Dataset (streamed in chunks)
+    # -------------------------------
+    try:
+        create_watermark_table(cursor)
+        watermark = get_watermark(cursor, source) if args.incremental else None
+        reader, since, file_size = open_incremental(args.file, args.chunksize, watermark)
+        if reader is None:
+            print(f"✅ No new records in {args.file} since the last load.")
+            cursor.close()
+            conn.close()
+            return
+        if watermark is None:
+            print(f"✅ Streaming dataset from {args.file} in chunks of {args.chunksize} rows.")
+        elif since is None:
+            print(f"✅ Resuming {args.file} at byte {watermark['file_offset']} (appended data only).")
+        else:
+            print(f"✅ {args.file} was rewritten; loading orders since {since}.")
+    except FileNotFoundError:
+        print(f"❌ File not found at {args.file}. Please check the path.")
+        conn.close()
+        exit()
+    except Exception as e:
+        print(f"❌ Error loading dataset: {e}")
+        conn.close()
+        exit()
+
+    started = time.perf_counter()
+    try:
+        if args.workers > 1 or args.writers > 1:
+            def connect():
+                return mysql.connector.connect(**DB_CONFIG, allow_local_infile=(args.mode == "infile"))
+            total_rows, total_items, max_date, max_id = load_chunks_parallel(conn, cursor, reader, args,
+                                                                             connect, since)
+        else:
+            total_rows, total_items, max_date, max_id = load_chunks(conn, cursor, reader, args, since)
+
+        # The mark only advances once every batch is committed; a failed run is simply rerun
+        save_watermark(cursor, source, file_size, file_fingerprint(args.file, file_size),
+                       None if max_date is None else max_date.to_pydatetime(),
+                       None if max_id is None else int(max_id), total_rows)
+        conn.commit()
+
+        elapsed = time.perf_counter() - started
+        rate = total_rows / elapsed if elapsed > 0 else 0.0
+        print(f"✅ Successfully upserted {total_rows} rows into '{table_name}' "
+              f"in {elapsed:.2f}s ({rate:,.0f} rows/sec, mode={args.mode}, batch={args.batch_size}, "
+              f"workers={args.workers}, writers={args.writers}).")
+        print(f"✅ Exploded 'products' into {total_items} rows of '{items_table_name}'.")
+        print_stage_timings(recorder)
+    except Error as e:
+        print(f"❌ MySQL Error: {e}")
+    except ChunkFailed as e:
+        print(f"❌ Load stopped at {e}; the watermark was not advanced, rerun to resume.")
+        if e.stored:
+            print("⚠️ Rows of that chunk were committed without their rollups; "
+                  "run `python scripts/rollups.py --rebuild` after the rerun.")
+    finally:
+        reader.close()
+        cursor.close()
+        conn.close()
+        print("🔒 MySQL connection closed.")
+
+
+if __name__ == "__main__":
+    main()
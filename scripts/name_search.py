@@ -0,0 +1,80 @@
+# scripts/name_search.py
+"""Trigram index over distinct customer names for the dashboard search box.
+
+Built once per data load; a lookup intersects the posting lists of the
+query's trigrams and verifies the few candidates, instead of scanning every
+order row with str.contains on each rerun.
+"""
+import bisect
+
+import numpy as np
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    """Case-insensitive substring / prefix search over a set of names."""
+
+    def __init__(self, names):
+        self.names = np.array(sorted({str(n) for n in names if n is not None and n == n}), dtype=object)
+        self.lowered = [n.lower() for n in self.names]
+
+        postings = {}
+        for name_id, name in enumerate(self.lowered):
+            for gram in _trigrams(name):
+                postings.setdefault(gram, []).append(name_id)
+        # ids are appended in increasing order, so every posting list is sorted
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+        # prefix search runs on the lower-cased names in sorted order
+        self.prefix_order = sorted(range(len(self.lowered)), key=self.lowered.__getitem__)
+        self.prefix_keys = [self.lowered[i] for i in self.prefix_order]
+
+    def __len__(self):
+        return len(self.names)
+
+    def _substring_ids(self, query):
+        if len(query) < 3:
+            # too short for trigrams; the distinct names are few enough to scan
+            return np.array([i for i, n in enumerate(self.lowered) if query in n], dtype=np.int32)
+        lists = []
+        for gram in _trigrams(query):
+            ids = self.postings.get(gram)
+            if ids is None:
+                return np.array([], dtype=np.int32)
+            lists.append(ids)
+        lists.sort(key=len)
+        candidates = lists[0]
+        for ids in lists[1:]:
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+            if candidates.size == 0:
+                break
+        # trigram hits may still not contain the query contiguously
+        return np.array([i for i in candidates if query in self.lowered[i]], dtype=np.int32)
+
+    def _prefix_ids(self, query):
+        lo = bisect.bisect_left(self.prefix_keys, query)
+        hi = bisect.bisect_left(self.prefix_keys, query + "￿")
+        return np.array(self.prefix_order[lo:hi], dtype=np.int32)
+
+    def search(self, query, prefix=False):
+        """Names containing (or, with prefix=True, starting with) `query`."""
+        query = query.strip().lower()
+        if not query:
+            return self.names
+        ids = self._prefix_ids(query) if prefix else self._substring_ids(query)
+        return self.names[np.sort(ids)]
+
+    def suggest(self, query, limit=10):
+        """Typeahead suggestions: prefix matches first, then other substring matches."""
+        query = query.strip().lower()
+        if not query:
+            return []
+        prefix = list(self.names[self._prefix_ids(query)[:limit]])
+        if len(prefix) >= limit:
+            return prefix
+        seen = set(prefix)
+        rest = [n for n in self.search(query) if n not in seen]
+        return prefix + rest[:limit - len(prefix)]
@@ -0,0 +1,184 @@
+# scripts/profiler.py
+"""Single-pass, bounded-memory profile of a dataset read in chunks.
+
+Every column keeps only mergeable summaries: counts, min/max, running
+moments, a HyperLogLog sketch for distinct values, a log-bucketed quantile
+sketch and a bounded heavy-hitter counter for top values. Memory does not
+grow with the number of rows, and profiles of separate files (shards) can be
+built in parallel and merged into one.
+"""
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from cleaning import DATE_COLS, MONEY_COLS, clean_money, parse_dates
+from sketches import hll_estimate, hll_merge, hll_registers, quantile_estimate, quantile_merge, quantile_sketch
+
+DISTINCT_PRECISION = 12
+# values tracked per column for the top-values list (Misra-Gries summary)
+TOP_CAPACITY = 256
+QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+
+def _trim_top(counts, capacity=TOP_CAPACITY):
+    """Misra-Gries: keep at most `capacity` counters, discounting all by the first one dropped."""
+    if len(counts) <= capacity:
+        return counts
+    cut = sorted(counts.values(), reverse=True)[capacity]
+    return Counter({v: n - cut for v, n in counts.items() if n > cut})
+
+
+class ColumnProfile:
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.empty = 0
+        self.zeros = 0
+        self.malformed = 0
+        # numeric moments (Chan et al. parallel variance)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.distinct = np.zeros((1, 1 << DISTINCT_PRECISION), dtype=np.uint8)
+        self.quantiles = quantile_sketch([])
+        self.top = Counter()
+
+    def update(self, series):
+        self.count += len(series)
+        self.nulls += int(series.isna().sum())
+        values = series.dropna()
+        if values.empty:
+            return
+
+        # money / date columns are profiled on their cleaned values
+        if self.name in MONEY_COLS:
+            raw = values
+            values, malformed = clean_money(values)
+            self.malformed += malformed
+            self.empty += int((raw.astype(str).str.strip() == "").sum())
+            values = values.dropna()
+        elif self.name in DATE_COLS:
+            values, malformed = parse_dates(values)
+            self.malformed += malformed
+            values = values.dropna()
+        elif not pd.api.types.is_numeric_dtype(values):
+            self.empty += int((values.astype(str).str.strip() == "").sum())
+
+        if values.empty:
+            return
+        self.distinct = hll_merge(self.distinct, hll_registers(values.to_numpy(), p=DISTINCT_PRECISION))
+        self.top.update(values.value_counts().head(TOP_CAPACITY * 2).to_dict())
+        self.top = _trim_top(self.top)
+        try:
+            lo, hi = values.min(), values.max()
+        except TypeError:
+            # numbers and text in one object column
+            text = values.astype(str)
+            lo, hi = text.min(), text.max()
+        self._update_range(lo, hi)
+
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            numbers = values.to_numpy(dtype=np.float64)
+            self.zeros += int(np.count_nonzero(numbers == 0))
+            self._merge_moments(len(numbers), float(numbers.mean()), float(((numbers - numbers.mean()) ** 2).sum()))
+            self.quantiles = quantile_merge(self.quantiles, quantile_sketch(numbers))
+
+    def _update_range(self, lo, hi):
+        if self.min is None:
+            self.min, self.max = lo, hi
+            return
+        try:
+            self.min = lo if lo < self.min else self.min
+            self.max = hi if hi > self.max else self.max
+        except TypeError:
+            # numeric in one chunk (or shard), text in another: compared as text from here on
+            self.min = min(str(self.min), str(lo))
+            self.max = max(str(self.max), str(hi))
+
+    def _merge_moments(self, n, mean, m2):
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.mean += delta * n / total
+        self.n = total
+
+    def merge(self, other):
+        for field in ("count", "nulls", "empty", "zeros", "malformed"):
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        self._merge_moments(other.n, other.mean, other.m2)
+        if other.min is not None:
+            self._update_range(other.min, other.max)
+        self.distinct = hll_merge(self.distinct, other.distinct)
+        self.quantiles = quantile_merge(self.quantiles, other.quantiles)
+        self.top = _trim_top(self.top + other.top)
+        return self
+
+    def summary(self, top=3):
+        numeric = self.n > 0
+        row = {
+            "count": self.count,
+            "nulls": self.nulls,
+            "empty": self.empty,
+            "zeros": self.zeros,
+            "malformed": self.malformed,
+            "distinct~": min(round(hll_estimate(self.distinct)), self.count - self.nulls),
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean if numeric else None,
+            "std": (self.m2 / (self.n - 1)) ** 0.5 if self.n > 1 else None,
+        }
+        for q in QUANTILES:
+            row[f"p{round(q * 100)}~"] = quantile_estimate(self.quantiles, q) if numeric else None
+        row["top values~"] = ", ".join(f"{str(v)[:30]} ({n})" for v, n in self.top.most_common(top))
+        return row
+
+
+class DatasetProfile:
+    def __init__(self):
+        self.rows = 0
+        self.columns = {}
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for col in chunk.columns:
+            self.columns.setdefault(col, ColumnProfile(col)).update(chunk[col])
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        for col, profile in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(profile)
+            else:
+                self.columns[col] = profile
+        return self
+
+    def to_frame(self):
+        frame = pd.DataFrame({col: p.summary() for col, p in self.columns.items()}).transpose()
+        counts = ["count", "nulls", "empty", "zeros", "malformed", "distinct~"]
+        return frame.astype({c: "int64" for c in counts})
+
+
+def iter_file_chunks(path, chunksize=100000):
+    """Read a CSV or Parquet file `chunksize` rows at a time."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def profile_file(path, chunksize=100000):
+    """Profile one file (CSV or Parquet) in a single streaming pass."""
+    profile = DatasetProfile()
+    for chunk in iter_file_chunks(path, chunksize):
+        profile.update(chunk)
+    return profile
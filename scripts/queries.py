@@ -0,0 +1,83 @@
+# scripts/queries.py
+"""Report queries shared by analyze_views.py and the index timing report."""
+
+REPORT_QUERIES = {
+    # 1️⃣ Total Sales by Country
+    "country_sales": """
+SELECT
+    `geoip.country_iso_code` AS country,
+    SUM(taxful_total_price) AS total_sales
+FROM orders
+GROUP BY `geoip.country_iso_code`
+ORDER BY total_sales DESC;
+""",
+    # 2️⃣ Top 10 Customers by Spending
+    "top_customers": """
+SELECT
+    customer_full_name AS customer,
+    SUM(taxful_total_price) AS total_spent
+FROM orders
+GROUP BY customer_full_name
+ORDER BY total_spent DESC
+LIMIT 10;
+""",
+    # 3️⃣ Monthly Revenue Trend
+    "monthly_revenue": """
+SELECT
+    DATE_FORMAT(order_date, '%Y-%m') AS month,
+    SUM(taxful_total_price) AS monthly_revenue
+FROM orders
+GROUP BY month
+ORDER BY month;
+""",
+    # 4️⃣ Top Product Categories (per line item, so multi-category orders are split)
+    "top_categories": """
+SELECT
+    category,
+    SUM(quantity) AS total_quantity_sold,
+    SUM(taxful_price) AS total_revenue
+FROM order_items
+GROUP BY category
+ORDER BY total_revenue DESC
+LIMIT 10;
+""",
+}
+
+# Same reports answered from the rollup tables maintained by rollups.py
+ROLLUP_QUERIES = {
+    "country_sales": """
+SELECT
+    country,
+    SUM(revenue) AS total_sales
+FROM rollup_daily_country
+GROUP BY country
+ORDER BY total_sales DESC;
+""",
+    "top_customers": """
+SELECT
+    customer_full_name AS customer,
+    SUM(revenue) AS total_spent
+FROM rollup_monthly_customer
+GROUP BY customer_full_name
+ORDER BY total_spent DESC
+LIMIT 10;
+""",
+    "monthly_revenue": """
+SELECT
+    DATE_FORMAT(day, '%Y-%m') AS month,
+    SUM(revenue) AS monthly_revenue
+FROM rollup_daily_country
+GROUP BY month
+ORDER BY month;
+""",
+    "top_categories": """
+SELECT
+    category,
+    SUM(quantity) AS total_quantity_sold,
+    SUM(revenue) AS total_revenue
+FROM rollup_daily_country_category
+GROUP BY category
+ORDER BY total_revenue DESC
+LIMIT 10;
+""",
+}
@@ -0,0 +1,112 @@
+# scripts/query_builder.py
+"""Turn the dashboard's sidebar filter state into a parameterized SELECT."""
+from datetime import timedelta
+
+COUNTRY_COL = "geoip.country_iso_code"
+
+# Columns too wide to ship on every rerun; the dashboard never aggregates them
+WIDE_COLUMNS = ["products", "products.created_on", "geoip.location"]
+
+# Sort columns the Data Explorer pages through with keyset seeks (indexed; id breaks ties)
+KEYSET_COLUMNS = ["id", "order_date"]
+
+
+def quote(col):
+    return f"`{col}`"
+
+
+def escape_like(text):
+    """Escape LIKE wildcards so user input is matched literally."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def build_where(start=None, end=None, countries=None, categories=None, customer_search="", customer_names=None):
+    """Return (where_sql, params) for the given filter state.
+
+    None / empty values mean "no filter". The date range is inclusive of
+    `end` and written as a half-open range on the raw column so the
+    order_date index can be used. `customer_names` (exact names resolved by
+    the dashboard's name index) takes precedence over `customer_search`.
+    """
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("order_date >= %s")
+        params.append(start)
+    if end is not None:
+        clauses.append("order_date < %s")
+        params.append(end + timedelta(days=1))
+    if countries:
+        clauses.append(f"{quote(COUNTRY_COL)} IN ({', '.join(['%s'] * len(countries))})")
+        params.extend(countries)
+    if categories:
+        # exact per-item match on the normalized line items, not a substring of the list column
+        clauses.append("order_id IN (SELECT order_id FROM order_items "
+                       f"WHERE category IN ({', '.join(['%s'] * len(categories))}))")
+        params.extend(categories)
+    if customer_names is not None:
+        if not customer_names:
+            clauses.append("1 = 0")
+        else:
+            clauses.append(f"customer_full_name IN ({', '.join(['%s'] * len(customer_names))})")
+            params.extend(customer_names)
+    elif customer_search:
+        clauses.append("customer_full_name LIKE %s")
+        params.append(f"%{escape_like(customer_search)}%")
+    return (" AND ".join(clauses) or "1 = 1"), params
+
+
+def build_orders_query(columns=None, table="orders", **filters):
+    """Return (sql, params) selecting `columns` (all if None) of the filtered orders."""
+    projection = ", ".join(quote(c) for c in columns) if columns else "*"
+    where, params = build_where(**filters)
+    return f"SELECT {projection} FROM {table} WHERE {where}", params
+
+
+def build_page_query(columns, sort="id", descending=False, after=None, offset=0, limit=50, table="orders", **filters):
+    """Return (sql, params) for one page of the filtered orders, ordered by `sort` then id.
+
+    `after` is the (sort value, id) of the last row of the previous page:
+    for KEYSET_COLUMNS the page then starts right after it, so a deep page
+    costs as little as the first. Other sort columns, or a page reached
+    without its predecessor, are fetched with LIMIT / OFFSET.
+
+    NULL sort values (unparseable order dates are kept as NULL) sort below
+    every value, as MySQL orders them: first ascending, last descending. A
+    page ending inside them passes None as its sort value.
+    """
+    columns = list(dict.fromkeys(["id", sort] + list(columns)))
+    where, params = build_where(**filters)
+    op, direction = ("<", "DESC") if descending else (">", "ASC")
+    if after is not None and sort in KEYSET_COLUMNS:
+        col = quote(sort)
+        if sort == "id":
+            where += f" AND id {op} %s"
+            params.append(after[1])
+        elif after[0] is None and descending:
+            # the NULLs come last: only the rest of them is left
+            where += f" AND {col} IS NULL AND id < %s"
+            params.append(after[1])
+        elif after[0] is None:
+            # the NULLs come first: the rest of them, then every value
+            where += f" AND ({col} IS NOT NULL OR id > %s)"
+            params.append(after[1])
+        else:
+            # comparisons with NULL are never true, so descending pages add the NULLs after the values
+            nulls = f" OR {col} IS NULL" if descending else ""
+            where += f" AND ({col} {op} %s OR ({col} = %s AND id {op} %s){nulls})"
+            params.extend([after[0], after[0], after[1]])
+        offset = 0
+    order = f"id {direction}" if sort == "id" else f"{quote(sort)} {direction}, id {direction}"
+    sql = f"SELECT {', '.join(quote(c) for c in columns)} FROM {table} WHERE {where} ORDER BY {order} LIMIT %s"
+    params.append(limit)
+    if offset:
+        sql += " OFFSET %s"
+        params.append(offset)
+    return sql, params
+
+
+def build_id_query(columns, ids, table="orders"):
+    """Return (sql, params) fetching `columns` of the orders with the given ids (e.g. one explorer page)."""
+    ids = [int(i) for i in ids]
+    placeholders = ", ".join(["%s"] * len(ids)) or "NULL"
+    return f"SELECT {', '.join(quote(c) for c in columns)} FROM {table} WHERE id IN ({placeholders})", ids
@@ -0,0 +1,160 @@
+# scripts/refresher.py
+"""Stale-while-revalidate copies of the tables the dashboard keeps in memory.
+
+A TableRefresher holds the current copy of one table and a daemon thread
+that every REFRESH_INTERVAL seconds asks MySQL for the table's version (row
+count, max id). When it has changed, only the rows past the last id seen are
+fetched and appended; when the counts then don't add up (rows deleted, or
+committed out of id order by parallel loader writers), and at least every
+FULL_RELOAD_AFTER seconds (rows upserted in place keep their id), the table
+is reloaded instead.
+
+A new copy is built off to the side and swapped in with a single
+assignment, so a reader always gets one complete version and never waits
+for a refresh: only the very first load of a table blocks.
+
+    orders = TableRefresher(connect, "orders", exclude=["products"], prepare=clean)
+    state = orders.get()          # TableState: frame, version, refreshed_at, ...
+    orders.request_refresh()      # wake the thread now instead of at the next interval
+"""
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import pandas as pd
+
+import compact
+from instrumentation import frame_bytes, span
+from query_builder import quote
+
+REFRESH_INTERVAL = 300
+FULL_RELOAD_AFTER = 3600
+# a table that failed to load is retried by readers at most this often
+RETRY_WAIT = 30
+CHUNK_ROWS = 100_000
+
+# `mode` is how the copy was built: "full" or "incremental" (with `fetched` new rows)
+TableState = namedtuple("TableState", "frame version last_id refreshed_at mode fetched")
+
+
+class TableRefresher:
+    """Current copy of one table (with an auto-increment `id`), refreshed in the background."""
+
+    def __init__(self, connect, table, columns=None, exclude=(), prepare=None,
+                 interval=REFRESH_INTERVAL, full_reload_after=FULL_RELOAD_AFTER):
+        self.connect = connect
+        self.table = table
+        self.columns = columns
+        self.exclude = set(exclude)
+        self.prepare = prepare or (lambda frame: frame)
+        self.interval = interval
+        self.full_reload_after = full_reload_after
+        # replaced whole by every refresh; readers take the reference once and keep using it
+        self.state = None
+        self.refreshing = False
+        self.checked_at = None
+        self.last_error = None
+        self._full_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def get(self):
+        """The current TableState (None if the table has never loaded); only the first load blocks."""
+        state = self.state
+        if state is None and (self.checked_at is None
+                              or (datetime.now() - self.checked_at).total_seconds() >= RETRY_WAIT):
+            state = self.refresh()
+        self._start()
+        return state
+
+    def request_refresh(self):
+        """Have the background thread refresh now; returns without waiting for it."""
+        self._start()
+        self._wake.set()
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"refresh-{self.table}", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.refresh()
+
+    def refresh(self, full=False):
+        """Bring the copy up to date and return it; on failure the previous copy stays current."""
+        with self._refresh_lock:
+            self.refreshing = True
+            try:
+                conn = self.connect()
+                try:
+                    with span(f"refresh.{self.table}") as record:
+                        previous, self.state = self.state, self._refresh(conn, full)
+                        record.update(mode=self.state.mode, rows=self.state.fetched)
+                        if self.state is not previous:
+                            # measured once per rebuilt copy, not on every read of it
+                            record["bytes"] = frame_bytes(self.state.frame)
+                finally:
+                    conn.close()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+            finally:
+                self.refreshing = False
+                self.checked_at = datetime.now()
+            return self.state
+
+    def _refresh(self, conn, full):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT(*), MAX(id) FROM {self.table}")
+            count, max_id = cursor.fetchone()
+        finally:
+            cursor.close()
+        version = (int(count), int(max_id) if max_id is not None else None)
+        state = self.state
+        full = full or state is None or time.monotonic() - self._full_at >= self.full_reload_after
+        if not full and state.version == version:
+            return state
+
+        if not full and max_id is not None:
+            # bounded by the max id counted above, so the sizes below can be compared
+            new = self._read(conn, "WHERE id > %s AND id <= %s", (state.last_id or 0, max_id),
+                             compact.categorical_columns(state.frame))
+            if len(state.frame) + len(new) == count:
+                frame = compact.concat([state.frame, new]) if len(new) else state.frame
+                return TableState(frame, version, max_id, datetime.now(), "incremental", len(new))
+
+        frame = self._read(conn, "WHERE id <= %s", (max_id or 0,))
+        self._full_at = time.monotonic()
+        return TableState(frame, version, max_id, datetime.now(), "full", len(frame))
+
+    def _read(self, conn, where, params, categorical=None):
+        """Rows matching `where`, in id order, read and compacted chunk by chunk."""
+        columns = self.columns or self._table_columns(conn)
+        sql = f"SELECT {', '.join(quote(c) for c in columns)} FROM {self.table} {where} ORDER BY id"
+        chunks = []
+        for chunk in pd.read_sql_query(sql, conn, params=params, chunksize=CHUNK_ROWS):
+            chunk = compact.compact_frame(self.prepare(chunk), categorical)
+            # every chunk gets the categoricals chosen for the first one
+            categorical = categorical if categorical is not None else compact.categorical_columns(chunk)
+            chunks.append(chunk)
+        if not chunks:
+            return self.prepare(pd.DataFrame(columns=columns))
+        return compact.concat(chunks)
+
+    def _table_columns(self, conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT * FROM {self.table} LIMIT 0")
+            columns = [d[0] for d in cursor.description]
+            cursor.fetchall()
+        finally:
+            cursor.close()
+        return [c for c in columns if c not in self.exclude]
@@ -0,0 +1,133 @@
+# scripts/report_engine.py
+"""Run report queries concurrently and cache their results on disk.
+
+Each query is tagged with a version marker of the tables it reads (row
+count, max key, last update time). A result is reused while that marker is
+unchanged; only stale queries are re-run, in parallel, each on its own
+pooled connection.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from mysql.connector import Error, pooling
+
+CACHE_DIR = os.path.join(".cache", "reports")
+POOL_SIZE = 4
+
+# key column whose MAX() is part of the version marker
+TABLE_KEYS = {"orders": "order_id", "order_items": "order_id"}
+
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?", re.IGNORECASE)
+
+
+def make_pool(db_config, size=POOL_SIZE):
+    return pooling.MySQLConnectionPool(pool_name="reports", pool_size=size, **db_config)
+
+
+def tables_of(query):
+    return sorted(set(_TABLE_PATTERN.findall(query)))
+
+
+def table_version(conn, table):
+    """Version marker of `table`: row count, max key and update time (None if unknown)."""
+    cursor = conn.cursor()
+    try:
+        key = TABLE_KEYS.get(table)
+        cursor.execute(f"SELECT COUNT(*){f', MAX({key})' if key else ''} FROM {table}")
+        marker = [str(v) for v in cursor.fetchone()]
+        try:
+            # UPDATE_TIME catches in-place updates that leave count and max key unchanged
+            cursor.execute("SELECT UPDATE_TIME FROM information_schema.tables "
+                           "WHERE table_schema = DATABASE() AND table_name = %s", (table,))
+            row = cursor.fetchone()
+            marker.append(str(row[0]) if row else None)
+        except Error:
+            pass
+        return marker
+    except Error:
+        return None
+    finally:
+        cursor.close()
+
+
+def cache_key(query, versions):
+    payload = json.dumps([query.strip(), versions], sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ReportEngine:
+    def __init__(self, pool, cache_dir=CACHE_DIR, workers=POOL_SIZE):
+        self.pool = pool
+        self.cache_dir = cache_dir
+        self.workers = workers
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, name):
+        base = os.path.join(self.cache_dir, name)
+        return base + ".pkl", base + ".key"
+
+    def _cached(self, name, key):
+        result_path, key_path = self._paths(name)
+        try:
+            with open(key_path, encoding="utf-8") as f:
+                if f.read().strip() != key:
+                    return None
+            return pd.read_pickle(result_path)
+        except (OSError, ValueError, EOFError):
+            return None
+
+    def _store(self, name, key, df):
+        result_path, key_path = self._paths(name)
+        df.to_pickle(result_path)
+        # the key is written last, so a half-written result is never picked up
+        with open(key_path, "w", encoding="utf-8") as f:
+            f.write(key)
+
+    def _run(self, name, query, key):
+        started = time.perf_counter()
+        conn = self.pool.get_connection()
+        try:
+            df = pd.read_sql(query, conn)
+        finally:
+            conn.close()  # returns the connection to the pool
+        self._store(name, key, df)
+        return df, time.perf_counter() - started
+
+    def versions(self, queries):
+        """Version markers of every table read by `queries`, fetched over one connection."""
+        tables = sorted({t for q in queries.values() for t in tables_of(q)})
+        conn = self.pool.get_connection()
+        try:
+            return {t: table_version(conn, t) for t in tables}
+        finally:
+            conn.close()
+
+    def run(self, queries, refresh=False):
+        """Return {name: DataFrame}, re-running only the queries whose tables changed."""
+        started = time.perf_counter()
+        versions = self.versions(queries)
+        keys = {name: cache_key(q, [versions[t] for t in tables_of(q)]) for name, q in queries.items()}
+
+        results, stale = {}, []
+        for name in queries:
+            cached = None if refresh else self._cached(name, keys[name])
+            if cached is None:
+                stale.append(name)
+            else:
+                results[name] = cached
+                print(f"   ♻️ {name}: cached (tables unchanged)")
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(stale))) as executor:
+                futures = {name: executor.submit(self._run, name, queries[name], keys[name]) for name in stale}
+                for name, future in futures.items():
+                    results[name], elapsed = future.result()
+                    print(f"   ⏱️ {name}: {elapsed:.3f}s ({len(results[name])} rows)")
+        print(f"✅ {len(queries)} reports ready in {time.perf_counter() - started:.3f}s "
+              f"({len(stale)} run, {len(queries) - len(stale)} from cache)")
+        return results
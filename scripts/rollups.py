@@ -0,0 +1,505 @@
+# scripts/rollups.py
+"""Pre-aggregated summary tables for the dashboard and analyze_views.py.
+
+The loader calls `apply_batch()` after every chunk it writes, so the rollups
+are maintained incrementally: counters are added with
+INSERT ... ON DUPLICATE KEY UPDATE and distinct-customer HyperLogLog
+sketches are merged. Re-loaded orders whose values changed cannot be
+subtracted from the sketches, so their months are recomputed from the tables
+instead (stale_months / refold_months). The query functions answer the
+standard charts from the rollups; they return None when the requested
+filters cannot be served (the caller then falls back to the raw `orders`
+rows). Map cells (geo.py) are kept per month, country and zoom level.
+
+Rebuild from scratch:  python scripts/rollups.py --rebuild
+"""
+import argparse
+import time
+
+import pandas as pd
+import mysql.connector
+from mysql.connector import Error
+
+import geo
+from cleaning import LAT_COL, LON_COL, parse_dates
+from sketches import (hll_estimate, hll_from_bytes, hll_merge, hll_registers, hll_to_bytes, topk_frame,
+                      topk_from_bytes, topk_merge, topk_summaries, topk_to_bytes)
+
+COUNTRY_COL = "geoip.country_iso_code"
+
+ROLLUP_TABLES = {
+    # day × country: order totals and a distinct-customer sketch
+    "rollup_daily_country": """
+    CREATE TABLE IF NOT EXISTS rollup_daily_country (
+        day DATE NOT NULL,
+        country VARCHAR(32) NOT NULL,
+        revenue DECIMAL(16,2) NOT NULL DEFAULT 0,
+        quantity BIGINT NOT NULL DEFAULT 0,
+        order_count INT NOT NULL DEFAULT 0,
+        customer_hll VARBINARY(1024),
+        PRIMARY KEY (day, country)
+    );
+    """,
+    # day × country × category: line-item totals from order_items
+    "rollup_daily_country_category": """
+    CREATE TABLE IF NOT EXISTS rollup_daily_country_category (
+        day DATE NOT NULL,
+        country VARCHAR(32) NOT NULL,
+        category VARCHAR(128) NOT NULL,
+        revenue DECIMAL(16,2) NOT NULL DEFAULT 0,
+        quantity BIGINT NOT NULL DEFAULT 0,
+        order_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, country, category)
+    );
+    """,
+    # month × country × customer: spend per customer for top-N lists
+    "rollup_monthly_customer": """
+    CREATE TABLE IF NOT EXISTS rollup_monthly_customer (
+        month DATE NOT NULL,
+        country VARCHAR(32) NOT NULL,
+        customer_full_name VARCHAR(255) NOT NULL,
+        customer_id INT,
+        revenue DECIMAL(16,2) NOT NULL DEFAULT 0,
+        order_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (month, country, customer_full_name),
+        KEY idx_month_revenue (month, revenue)
+    );
+    """,
+    # day × country: top-k summaries of customer and SKU spend, merged for any date range
+    "rollup_daily_topk": """
+    CREATE TABLE IF NOT EXISTS rollup_daily_topk (
+        day DATE NOT NULL,
+        country VARCHAR(32) NOT NULL,
+        customer_topk MEDIUMBLOB,
+        sku_topk MEDIUMBLOB,
+        PRIMARY KEY (day, country)
+    );
+    """,
+    # month × country × map grid cell, at every zoom level of geo.ZOOM_LEVELS
+    "rollup_monthly_geo": """
+    CREATE TABLE IF NOT EXISTS rollup_monthly_geo (
+        month DATE NOT NULL,
+        country VARCHAR(32) NOT NULL,
+        zoom TINYINT NOT NULL,
+        cell_lat INT NOT NULL,
+        cell_lon INT NOT NULL,
+        revenue DECIMAL(16,2) NOT NULL DEFAULT 0,
+        order_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (month, country, zoom, cell_lat, cell_lon)
+    );
+    """,
+}
+
+
+def create_rollup_tables(cursor):
+    for ddl in ROLLUP_TABLES.values():
+        cursor.execute(ddl)
+
+
+def rollups_available(conn):
+    """True when every rollup table exists and holds data."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM rollup_daily_country")
+        return cursor.fetchone()[0] > 0
+    except Error:
+        return False
+    finally:
+        cursor.close()
+
+
+# -------------------------------
+# Incremental maintenance
+# -------------------------------
+def _order_frame(orders):
+    """Key columns of an orders chunk, with NULL dimensions mapped to ''."""
+    # partial rows (e.g. from generate_mock_sales.py) may lack some columns
+    orders = orders.reindex(columns=orders.columns.union(
+        ["customer_id", "customer_full_name", "total_quantity", COUNTRY_COL, LAT_COL, LON_COL], sort=False))
+    frame = pd.DataFrame({
+        "order_id": orders["order_id"],
+        "day": parse_dates(orders["order_date"])[0].dt.normalize(),
+        "country": orders[COUNTRY_COL].fillna("").astype(str),
+        "customer_id": pd.to_numeric(orders["customer_id"], errors="coerce"),
+        "customer_full_name": orders["customer_full_name"],
+        "revenue": pd.to_numeric(orders["taxful_total_price"], errors="coerce").fillna(0.0),
+        "quantity": pd.to_numeric(orders["total_quantity"], errors="coerce").fillna(0),
+        "lat": pd.to_numeric(orders[LAT_COL], errors="coerce"),
+        "lon": pd.to_numeric(orders[LON_COL], errors="coerce"),
+    })
+    return frame.dropna(subset=["day"])
+
+
+def _upsert(cursor, table, frame, key_cols, add_cols, set_cols=()):
+    """Upsert rows, adding `add_cols` to existing values and overwriting `set_cols`."""
+    if frame.empty:
+        return
+    cols = list(key_cols) + list(add_cols) + list(set_cols)
+    updates = [f"{c} = {c} + VALUES({c})" for c in add_cols] + [f"{c} = VALUES({c})" for c in set_cols]
+    query = (
+        f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join(['%s'] * len(cols))}) "
+        f"ON DUPLICATE KEY UPDATE {', '.join(updates)}"
+    )
+    data = frame[cols].astype(object).where(frame[cols].notna(), None)
+    cursor.executemany(query, list(data.itertuples(index=False, name=None)))
+
+
+def _stored(cursor, table, column, keys):
+    """{(day, country): blob} of `column` already stored for `keys`."""
+    placeholders = ", ".join(["(%s, %s)"] * len(keys))
+    params = [v for key in keys for v in key]
+    cursor.execute(f"SELECT day, country, {column} FROM {table} WHERE (day, country) IN ({placeholders})", params)
+    return {(pd.Timestamp(day), country): blob for day, country, blob in cursor.fetchall()}
+
+
+def _merged_topk(cursor, column, keys, summaries):
+    stored = _stored(cursor, "rollup_daily_topk", column, keys)
+    return [topk_to_bytes(topk_merge(summary, topk_from_bytes(stored.get((pd.Timestamp(key[0]), key[1])))))
+            for key, summary in zip(keys, summaries)]
+
+
+def _merged_sketches(cursor, keys, new_registers):
+    """Merge freshly built sketches with those already stored for the same keys."""
+    stored = _stored(cursor, "rollup_daily_country", "customer_hll", keys)
+    merged = []
+    for key, registers in zip(keys, new_registers):
+        blob = stored.get((pd.Timestamp(key[0]), key[1]))
+        merged.append(hll_to_bytes(hll_merge(registers, hll_from_bytes(blob)) if blob else registers))
+    return merged
+
+
+def apply_batch(conn, orders, items=None):
+    """Fold one loaded chunk of orders (and its line items) into the rollups."""
+    frame = _order_frame(orders)
+    if frame.empty:
+        return
+    cursor = conn.cursor()
+
+    # day × country
+    grouped = frame.groupby(["day", "country"], sort=False)
+    daily = grouped.agg(revenue=("revenue", "sum"), quantity=("quantity", "sum"),
+                        order_count=("order_id", "count")).reset_index()
+    codes = grouped.ngroup().to_numpy()
+    customers = frame["customer_id"].to_numpy()
+    known = ~pd.isna(customers)
+    registers = hll_registers(customers[known], groups=codes[known], n_groups=len(daily))
+    keys = [(d.date(), c) for d, c in zip(daily["day"], daily["country"])]
+    daily["customer_hll"] = _merged_sketches(cursor, keys, registers)
+    daily["day"] = daily["day"].dt.date
+    _upsert(cursor, "rollup_daily_country", daily, ["day", "country"],
+            ["revenue", "quantity", "order_count"], ["customer_hll"])
+
+    # day × country top-k summaries: customer spend here, SKU spend with the line items below
+    named = frame["customer_full_name"].notna().to_numpy()
+    topk = daily[["day", "country"]].copy()
+    topk["customer_topk"] = _merged_topk(cursor, "customer_topk", keys, topk_summaries(
+        frame["customer_full_name"].to_numpy()[named], frame["revenue"].to_numpy()[named],
+        groups=codes[named], n_groups=len(daily)))
+    topk_cols = ["customer_topk"]
+
+    # month × country × customer (keyed on the name, as the top-customer reports group on it)
+    with_customer = frame.dropna(subset=["customer_full_name"])
+    with_customer = with_customer.assign(month=with_customer["day"].dt.to_period("M").dt.start_time.dt.date)
+    monthly = (with_customer.groupby(["month", "country", "customer_full_name"], sort=False)
+                            .agg(customer_id=("customer_id", "last"),
+                                 revenue=("revenue", "sum"), order_count=("order_id", "count"))
+                            .reset_index())
+    _upsert(cursor, "rollup_monthly_customer", monthly, ["month", "country", "customer_full_name"],
+            ["revenue", "order_count"], ["customer_id"])
+
+    # month × country × grid cell, every zoom level
+    located = frame.dropna(subset=["lat", "lon"])
+    if not located.empty:
+        cells = geo.bin_points(located["lat"], located["lon"], located["revenue"], keys={
+            "month": located["day"].dt.to_period("M").dt.start_time.dt.date.to_numpy(),
+            "country": located["country"].to_numpy()})
+        _upsert(cursor, "rollup_monthly_geo", cells, ["month", "country", "zoom", "cell_lat", "cell_lon"],
+                ["revenue", "order_count"])
+
+    # day × country × category (line items carry the category)
+    if items is not None and not items.empty:
+        lines = items[["order_id", "category", "taxful_price", "quantity"]].merge(
+            frame[["order_id", "day", "country"]], on="order_id", how="inner")
+        lines["category"] = lines["category"].fillna("").astype(str)
+        categories = (lines.groupby(["day", "country", "category"], sort=False)
+                           .agg(revenue=("taxful_price", "sum"), quantity=("quantity", "sum"),
+                                order_count=("order_id", "nunique"))
+                           .reset_index())
+        categories["day"] = categories["day"].dt.date
+        _upsert(cursor, "rollup_daily_country_category", categories, ["day", "country", "category"],
+                ["revenue", "quantity", "order_count"])
+
+        if "sku" in items.columns:
+            with_sku = items[["order_id", "sku", "taxful_price"]].dropna(subset=["sku"]).merge(
+                frame[["order_id"]].assign(code=codes), on="order_id", how="inner")
+            skus = topk_summaries(with_sku["sku"].to_numpy(), with_sku["taxful_price"].to_numpy(dtype=float),
+                                  groups=with_sku["code"].to_numpy(), n_groups=len(daily))
+            topk["sku_topk"] = _merged_topk(cursor, "sku_topk", keys, skus)
+            topk_cols.append("sku_topk")
+    _upsert(cursor, "rollup_daily_topk", topk, ["day", "country"], [], topk_cols)
+
+    conn.commit()
+    cursor.close()
+
+
+def _order_columns(conn):
+    """Columns of `orders` the rollups are built from."""
+    cols = f"order_id, order_date, `{COUNTRY_COL}`, customer_id, customer_full_name, taxful_total_price, total_quantity"
+    cursor = conn.cursor()
+    cursor.execute("SELECT column_name, data_type FROM information_schema.columns "
+                   "WHERE table_schema = DATABASE() AND table_name = %s", ("orders",))
+    if {LAT_COL, LON_COL} <= {row[0] for row in cursor.fetchall()}:
+        cols += f", `{LAT_COL}`, `{LON_COL}`"
+    cursor.close()
+    return cols
+
+
+def _stored_items(conn, ids):
+    return pd.read_sql("SELECT order_id, sku, category, taxful_price, quantity FROM order_items "
+                       f"WHERE order_id IN ({', '.join(['%s'] * len(ids))})", conn, params=ids)
+
+
+def _fold(conn, where="1 = 1", params=(), exclude=(), chunksize=50000):
+    """Fold the stored orders matching `where` into the rollups, yielding the running count."""
+    cols = _order_columns(conn)
+    last_id, total = 0, 0
+    while True:
+        # keyset pagination on the primary key keeps each round trip bounded
+        orders = pd.read_sql(f"SELECT id, {cols} FROM orders WHERE id > %s AND {where} ORDER BY id LIMIT %s",
+                             conn, params=(last_id, *params, chunksize))
+        if orders.empty:
+            break
+        last_id = int(orders["id"].iloc[-1])
+        if exclude:
+            orders = orders[~orders["order_id"].isin(exclude)]
+        ids = [int(i) for i in orders["order_id"].dropna()]
+        apply_batch(conn, orders, _stored_items(conn, ids) if ids else None)
+        total += len(orders)
+        yield total
+
+
+def rebuild(conn, chunksize=50000):
+    """Recompute every rollup from the orders / order_items tables."""
+    cursor = conn.cursor()
+    for table in ROLLUP_TABLES:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    create_rollup_tables(cursor)
+    cursor.close()
+
+    total = 0
+    for total in _fold(conn, chunksize=chunksize):
+        print(f"   ↳ {total} orders folded into rollups")
+    return total
+
+
+def _signatures(frame, items):
+    """One string per order of everything the rollups take from it (order row and line items)."""
+    frame = frame.set_index(frame["order_id"].astype("int64"))
+    sig = frame["day"].astype(str)
+    for col in ["country", "customer_full_name"]:
+        sig = sig + "|" + frame[col].fillna("").astype(str)
+    for col, digits in [("customer_id", 0), ("revenue", 2), ("quantity", 0), ("lat", 6), ("lon", 6)]:
+        sig = sig + "|" + frame[col].astype(float).round(digits).astype(str)
+    if items is not None and not items.empty:
+        lines = (items["sku"].fillna("").astype(str) + "/" + items["category"].fillna("").astype(str) + "/"
+                 + pd.to_numeric(items["taxful_price"], errors="coerce").round(2).astype(str) + "/"
+                 + pd.to_numeric(items["quantity"], errors="coerce").astype(float).astype(str))
+        per_order = lines.groupby(items["order_id"].astype("int64").to_numpy()).agg(lambda v: ",".join(sorted(v)))
+        sig = sig + "|" + per_order.reindex(sig.index).fillna("")
+    return sig
+
+
+def stale_months(conn, orders, items=None):
+    """Months whose rollups go stale when `orders` overwrite stored rows of the same order ids.
+
+    Call it before the upsert: the orders whose stored values (or line items)
+    differ are looked up, and the months of both their old and new dates
+    returned for refold_months().
+    """
+    ids = [int(i) for i in pd.unique(orders["order_id"].dropna())]
+    if not ids:
+        return set()
+    stored = pd.read_sql(f"SELECT {_order_columns(conn)} FROM orders "
+                         f"WHERE order_id IN ({', '.join(['%s'] * len(ids))})", conn, params=ids)
+    if stored.empty:
+        return set()
+    old = _order_frame(stored)
+    new = _order_frame(orders[orders["order_id"].isin(stored["order_id"])].drop_duplicates("order_id", keep="last"))
+    if items is not None:
+        items = items[items["order_id"].isin(stored["order_id"])]
+    old_sig = _signatures(old, _stored_items(conn, [int(i) for i in stored["order_id"]]))
+    new_sig = _signatures(new, items)
+    both = old_sig.index.union(new_sig.index)
+    changed = both[old_sig.reindex(both).ne(new_sig.reindex(both)).to_numpy()]
+    days = pd.concat([frame.loc[frame["order_id"].astype("int64").isin(changed), "day"] for frame in (old, new)])
+    return set(days.dt.to_period("M").dt.start_time)
+
+
+def refold_months(conn, months, exclude=()):
+    """Recompute the rollups of whole `months` from the orders / order_items tables.
+
+    Orders in `exclude` (written but not yet folded by a concurrent writer)
+    are left for that writer to add.
+    """
+    for month in sorted(months):
+        start, end = month.date(), (month + pd.offsets.MonthBegin()).date()
+        cursor = conn.cursor()
+        for table in ROLLUP_TABLES:
+            if "daily" in table:
+                cursor.execute(f"DELETE FROM {table} WHERE day >= %s AND day < %s", (start, end))
+            else:
+                cursor.execute(f"DELETE FROM {table} WHERE month = %s", (start,))
+        cursor.close()
+        for _ in _fold(conn, "order_date >= %s AND order_date < %s", (start, end), exclude):
+            pass
+        conn.commit()
+
+
+# -------------------------------
+# Query layer
+# -------------------------------
+def can_serve(customer_search="", categories_filtered=False):
+    """Rollups are keyed on day/country only; other filters need raw rows."""
+    return not customer_search and not categories_filtered
+
+
+def _where(date_col, start, end, countries):
+    clauses, params = [f"{date_col} BETWEEN %s AND %s"], [start, end]
+    if countries:
+        clauses.append(f"country IN ({', '.join(['%s'] * len(countries))})")
+        params.extend(countries)
+    return " AND ".join(clauses), params
+
+
+def _read(conn, query, params, numeric_cols):
+    df = pd.read_sql(query, conn, params=params)
+    for col in numeric_cols:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+    return df
+
+
+def sales_by_country(conn, start, end, countries=None):
+    where, params = _where("day", start, end, countries)
+    return _read(conn, f"""
+        SELECT country, SUM(revenue) AS total_sales, SUM(order_count) AS total_orders
+        FROM rollup_daily_country WHERE {where}
+        GROUP BY country ORDER BY total_sales DESC""", params, ["total_sales", "total_orders"])
+
+
+def monthly_revenue(conn, start, end, countries=None):
+    where, params = _where("day", start, end, countries)
+    return _read(conn, f"""
+        SELECT DATE_FORMAT(day, '%%Y-%%m') AS month, SUM(revenue) AS monthly_revenue
+        FROM rollup_daily_country WHERE {where}
+        GROUP BY month ORDER BY month""", params, ["monthly_revenue"])
+
+
+def top_categories(conn, start, end, countries=None, limit=10):
+    where, params = _where("day", start, end, countries)
+    return _read(conn, f"""
+        SELECT category, SUM(quantity) AS total_quantity_sold, SUM(revenue) AS total_revenue
+        FROM rollup_daily_country_category WHERE {where}
+        GROUP BY category ORDER BY total_revenue DESC LIMIT %s""", params + [limit],
+                 ["total_quantity_sold", "total_revenue"])
+
+
+def top_customers(conn, start, end, countries=None, limit=20):
+    """Top spenders; only answerable when [start, end] covers whole months."""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if start.day != 1 or not end.is_month_end:
+        return None
+    where, params = _where("month", start.date(), end.date(), countries)
+    return _read(conn, f"""
+        SELECT customer_full_name AS customer, SUM(revenue) AS total_spent, SUM(order_count) AS orders
+        FROM rollup_monthly_customer WHERE {where}
+        GROUP BY customer_full_name ORDER BY total_spent DESC LIMIT %s""", params + [limit],
+                 ["total_spent", "orders"])
+
+
+def unique_customers(conn, start, end, countries=None):
+    """Approximate distinct customers, merged from the per-day sketches."""
+    where, params = _where("day", start, end, countries)
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT customer_hll FROM rollup_daily_country WHERE {where}", params)
+    blobs = [hll_from_bytes(row[0]) for row in cursor.fetchall() if row[0]]
+    cursor.close()
+    return hll_estimate(hll_merge(*blobs)) if blobs else 0.0
+
+
+def totals(conn, start, end, countries=None):
+    """Exact (revenue, order count) for the range, summed from the daily rollup."""
+    where, params = _where("day", start, end, countries)
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT SUM(revenue), SUM(order_count) FROM rollup_daily_country WHERE {where}", params)
+    revenue, orders = cursor.fetchone()
+    cursor.close()
+    return float(revenue or 0), int(orders or 0)
+
+
+def approx_top(conn, start, end, countries=None, kind="customer", limit=20):
+    """Top customers ("customer") or SKUs ("sku") for any date range, merged from the per-day summaries.
+
+    Returns (frame of key / estimate / lower bound, floor), where no key left
+    out of the list can exceed `floor`.
+    """
+    where, params = _where("day", start, end, countries)
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {kind}_topk FROM rollup_daily_topk WHERE {where}", params)
+    merged = topk_merge(*[topk_from_bytes(row[0]) for row in cursor.fetchall() if row[0]])
+    cursor.close()
+    return topk_frame(merged, limit), merged["floor"]
+
+
+def geo_cells(conn, start, end, countries=None, zoom=geo.DEFAULT_ZOOM):
+    """Order count and revenue per map cell at `zoom`; only answerable when [start, end] covers whole months."""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if start.day != 1 or not end.is_month_end:
+        return None
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM rollup_monthly_geo LIMIT 1")
+    empty = cursor.fetchone() is None
+    cursor.close()
+    if empty:
+        # loaded before coordinates were parsed: the caller bins the raw rows
+        return None
+    where, params = _where("month", start.date(), end.date(), countries)
+    cells = _read(conn, f"""
+        SELECT cell_lat, cell_lon, SUM(order_count) AS order_count, SUM(revenue) AS revenue
+        FROM rollup_monthly_geo WHERE zoom = %s AND {where}
+        GROUP BY cell_lat, cell_lon""", [zoom] + params, ["order_count", "revenue"])
+    return geo.with_centers(cells, zoom)
+
+
+def main():
+    from load_to_mysql import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description="Maintain the dashboard rollup tables.")
+    parser.add_argument("--rebuild", action="store_true", help="drop and recompute every rollup table")
+    args = parser.parse_args()
+
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        print("✅ Connected to MySQL successfully!")
+    except Error as e:
+        print(f"❌ MySQL Connection Error: {e}")
+        exit()
+
+    try:
+        if args.rebuild:
+            started = time.perf_counter()
+            total = rebuild(conn)
+            print(f"✅ Rebuilt rollups from {total} orders in {time.perf_counter() - started:.2f}s.")
+        else:
+            cursor = conn.cursor()
+            create_rollup_tables(cursor)
+            cursor.close()
+            print("✅ Rollup tables are in place.")
+    except Error as e:
+        print(f"❌ MySQL Error: {e}")
+    finally:
+        conn.close()
+        print("🔒 MySQL connection closed.")
+
+
+if __name__ == "__main__":
+    main()
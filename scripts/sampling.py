@@ -0,0 +1,92 @@
+# scripts/sampling.py
+"""Stratified sampling for approximate dashboard charts.
+
+About a fixed number of rows is drawn from every stratum (e.g. order
+month), each carrying an expansion weight N_h / n_h. Group totals are
+estimated from the weighted sample together with a 95% confidence
+half-width, so charts over very large filtered frames can be drawn from a
+few thousand rows per month. Rows are picked by a uniform key hashed from
+their id, stored once with the frame, so drawing a sample is a single
+comparison per row.
+"""
+import numpy as np
+import pandas as pd
+
+SAMPLE_PER_STRATUM = 2000
+Z_95 = 1.96
+# column holding each row's sampling key (see add_sample_keys)
+SAMPLE_KEY = "_sample_key"
+
+
+def sample_keys(ids):
+    """Uniform [0, 1) key per row from its id (splitmix64 hash): a row keeps its key across reloads."""
+    x = np.asarray(ids, dtype=np.int64).astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    # the top 24 bits are exact in a float32
+    return (x >> np.uint64(40)).astype(np.float32) * np.float32(2.0 ** -24)
+
+
+def add_sample_keys(frame):
+    """Store the sampling key of every row of `frame` (by its `id`) and return it."""
+    if "id" in frame.columns:
+        frame[SAMPLE_KEY] = sample_keys(frame["id"])
+    return frame
+
+
+def month_strata(dates):
+    """Month of each datetime64 value as a stratum code 0..k-1 (NaT gets a code of its own).
+
+    Looked up per day in a small table, which is much cheaper than
+    converting every value to a month.
+    """
+    values = np.asarray(dates, dtype="datetime64[ns]")
+    missing = np.isnat(values)
+    days = values.view(np.int64) // 86_400_000_000_000
+    if missing.all():
+        return np.zeros(len(values), dtype=np.int64)
+    if missing.any():
+        days = np.where(missing, days[~missing].min(), days)
+    first = days.min()
+    months = np.arange(first, days.max() + 1).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    codes = months[days - first] - months[0]
+    if missing.any():
+        codes[missing] = codes.max() + 1
+    return codes
+
+
+def stratified_sample(frame, strata, keys, per_stratum=SAMPLE_PER_STRATUM):
+    """About `per_stratum` rows of each stratum, with `_stratum`, `_n` and `_N` columns.
+
+    `strata` are small non-negative codes (e.g. month_strata) and `keys` the
+    rows' uniform keys in [0, 1). A stratum of N rows keeps the rows whose
+    key is below per_stratum / N: no sort or rank over the rows.
+    """
+    codes = np.asarray(strata)
+    sizes = np.bincount(codes)
+    fraction = np.minimum(1.0, per_stratum / np.maximum(sizes, 1))
+    taken = np.asarray(keys) < fraction[codes]
+    sample = frame[taken]
+    codes = codes[taken]
+    counts = np.bincount(codes, minlength=len(sizes))
+    return sample.assign(_stratum=codes, _n=counts[codes], _N=sizes[codes])
+
+
+def estimate_totals(sample, by, value):
+    """Estimated total of `value` per `by` group, with its 95% confidence half-width (`error`)."""
+    y = pd.to_numeric(sample[value], errors="coerce").fillna(0.0)
+    parts = pd.DataFrame({"group": sample[by].to_numpy(), "stratum": sample["_stratum"].to_numpy(),
+                          "y": y.to_numpy(), "y2": (y * y).to_numpy()})
+    per = parts.groupby(["group", "stratum"]).agg(s=("y", "sum"), s2=("y2", "sum")).reset_index()
+    strata = sample.groupby("_stratum")[["_n", "_N"]].first()
+    per = per.join(strata, on="stratum")
+    n, N = per["_n"].astype(float), per["_N"].astype(float)
+    # y_i * [row in group] over the stratum's sample: mean and (unbiased) variance
+    mean = per["s"] / n
+    var = ((per["s2"] - n * mean * mean) / (n - 1)).where(n > 1, 0.0).clip(lower=0)
+    per["total"] = N * mean
+    per["variance"] = N * N * (1 - n / N) * var / n
+    totals = per.groupby("group").agg(total=("total", "sum"), variance=("variance", "sum"))
+    totals["error"] = Z_95 * np.sqrt(totals["variance"])
+    return totals.drop(columns="variance").rename_axis(by).reset_index()
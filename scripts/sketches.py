@@ -0,0 +1,199 @@
+# scripts/sketches.py
+"""Mergeable probabilistic sketches used by the rollup tables and the dataset profiler."""
+import json
+
+import numpy as np
+import pandas as pd
+
+# 2^10 one-byte registers: ~1 KB per sketch, ~3.2% standard error
+HLL_PRECISION = 10
+
+
+def _hash64(values):
+    """Stable 64-bit hashes of an array of values (ints or strings).
+
+    Whole floats hash like the equal int: an id column is int64 in a chunk
+    without NULLs and float64 in one with them, and 17 must land in the same
+    register either way.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == "f":
+        whole = np.isfinite(values) & (np.abs(values) < 2.0**63) & (values == np.floor(values))
+        boxed = values.astype(object)
+        boxed[whole] = values[whole].astype(np.int64).tolist()
+        values = boxed
+    return pd.util.hash_array(np.asarray(values, dtype=object)).astype(np.uint64)
+
+
+def _bit_length(x):
+    """Vectorized int.bit_length() for uint64 arrays (exact, via 32-bit halves)."""
+    hi = (x >> np.uint64(32)).astype(np.float64)
+    lo = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(hi > 0, 32 + np.frexp(hi)[1], np.frexp(lo)[1])
+
+
+def hll_registers(values, groups=None, n_groups=1, p=HLL_PRECISION):
+    """Build HyperLogLog registers for `values`.
+
+    With `groups` (integer codes 0..n_groups-1, one per value) a separate
+    sketch is built per group in the same vectorized pass. Returns a uint8
+    array of shape (n_groups, 2**p).
+    """
+    m = 1 << p
+    registers = np.zeros((n_groups, m), dtype=np.uint8)
+    if len(values) == 0:
+        return registers
+    h = _hash64(values)
+    index = (h >> np.uint64(64 - p)).astype(np.int64)
+    w = h & np.uint64((1 << (64 - p)) - 1)
+    rank = ((64 - p) - _bit_length(w) + 1).astype(np.uint8)
+    groups = np.zeros(len(h), dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+    np.maximum.at(registers, (groups, index), rank)
+    return registers
+
+
+def hll_merge(*registers):
+    """Union of sketches: element-wise max of their registers."""
+    return np.maximum.reduce([np.asarray(r, dtype=np.uint8) for r in registers])
+
+
+def hll_estimate(registers):
+    """Estimated distinct count of one register array."""
+    registers = np.asarray(registers, dtype=np.float64)
+    m = registers.size
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.exp2(-registers))
+    zeros = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * m and zeros:
+        # small-range correction (linear counting)
+        estimate = m * np.log(m / zeros)
+    return float(estimate)
+
+
+def hll_to_bytes(registers):
+    return np.asarray(registers, dtype=np.uint8).tobytes()
+
+
+def hll_from_bytes(blob, p=HLL_PRECISION):
+    if not blob:
+        return np.zeros(1 << p, dtype=np.uint8)
+    return np.frombuffer(bytes(blob), dtype=np.uint8)
+
+
+# Quantile sketch (DDSketch): values are counted in logarithmic buckets, so every
+# quantile is returned within QUANTILE_ALPHA relative error and sketches merge by
+# adding their bucket counts.
+QUANTILE_ALPHA = 0.01
+
+
+def _gamma(alpha):
+    return (1 + alpha) / (1 - alpha)
+
+
+def quantile_sketch(values, alpha=QUANTILE_ALPHA):
+    """Build a quantile sketch: {"pos": {bucket: n}, "neg": {bucket: n}, "zero": n}."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    log_gamma = np.log(_gamma(alpha))
+    sketch = {"pos": {}, "neg": {}, "zero": int(np.count_nonzero(values == 0))}
+    for sign, part in (("pos", values[values > 0]), ("neg", -values[values < 0])):
+        buckets, counts = np.unique(np.ceil(np.log(part) / log_gamma).astype(np.int64), return_counts=True)
+        sketch[sign] = dict(zip(buckets.tolist(), counts.tolist()))
+    return sketch
+
+
+def quantile_merge(*sketches):
+    merged = {"pos": {}, "neg": {}, "zero": 0}
+    for sketch in sketches:
+        merged["zero"] += sketch["zero"]
+        for sign in ("pos", "neg"):
+            for bucket, n in sketch[sign].items():
+                merged[sign][bucket] = merged[sign].get(bucket, 0) + n
+    return merged
+
+
+def quantile_estimate(sketch, q, alpha=QUANTILE_ALPHA):
+    """Approximate q-quantile (0 <= q <= 1) of the sketched values, None if empty."""
+    gamma = _gamma(alpha)
+    # walk the buckets in value order: large negatives, zeros, then positives
+    ordered = [(-2 * gamma ** b / (gamma + 1), n) for b, n in sorted(sketch["neg"].items(), reverse=True)]
+    ordered.append((0.0, sketch["zero"]))
+    ordered += [(2 * gamma ** b / (gamma + 1), n) for b, n in sorted(sketch["pos"].items())]
+    total = sum(n for _, n in ordered)
+    if total == 0:
+        return None
+    rank, seen = q * (total - 1), 0
+    for value, n in ordered:
+        seen += n
+        if seen > rank:
+            return value
+    return ordered[-1][0]
+
+
+# Top-k summary (mergeable, Space-Saving style): the heaviest keys with an upper
+# bound on their weight and the most that bound can overestimate, plus a floor
+# bounding the weight of any key not listed. Merging adds weights, an absent key
+# counting as the other summary's floor, so per-day summaries merge into a top-k
+# list with error bounds for any date range.
+TOPK_CAPACITY = 50
+
+# relative standard error of an HLL_PRECISION estimate
+HLL_ERROR = 1.04 / np.sqrt(1 << HLL_PRECISION)
+
+
+def _topk_truncate(weight, error, floor, capacity):
+    """Summary of the `capacity` heaviest keys of {key: weight}; the first key dropped raises the floor."""
+    ranked = sorted(weight, key=lambda k: (-weight[k], k))
+    if len(ranked) > capacity:
+        floor = max(floor, weight[ranked[capacity]])
+        ranked = ranked[:capacity]
+    return {"floor": floor, "keys": ranked, "weight": [weight[k] for k in ranked], "error": [error[k] for k in ranked]}
+
+
+def topk_summaries(keys, weights, groups=None, n_groups=1, capacity=TOPK_CAPACITY):
+    """Exact summaries of one batch, one per group code 0..n_groups-1 (as in hll_registers)."""
+    groups = np.zeros(len(keys), dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+    totals = (pd.DataFrame({"group": groups, "key": pd.Series(keys, dtype=object).astype(str).to_numpy(),
+                            "weight": np.asarray(weights, dtype=float)})
+                .groupby(["group", "key"], sort=False)["weight"].sum().reset_index()
+                .sort_values(["group", "weight", "key"], ascending=[True, False, True]))
+    # one sort for the whole batch; each group is then a slice of it, heaviest first
+    group = totals["group"].to_numpy()
+    key, weight = totals["key"].tolist(), totals["weight"].tolist()
+    bounds = np.searchsorted(group, np.arange(n_groups + 1))
+    summaries = []
+    for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        kept = min(hi, lo + capacity)
+        summaries.append({"floor": weight[kept] if kept < hi else 0.0, "keys": key[lo:kept],
+                          "weight": weight[lo:kept], "error": [0.0] * (kept - lo)})
+    return summaries
+
+
+def topk_merge(*summaries, capacity=TOPK_CAPACITY):
+    """Merge summaries; each listed weight stays an upper bound, `error` its maximum overestimate."""
+    summaries = [s for s in summaries if s is not None]
+    total_floor = float(sum(s["floor"] for s in summaries))
+    # a key absent from a summary is counted at that summary's floor: add the floors
+    # of all summaries once, and for listed keys only the excess over their own floor
+    weight, error = {}, {}
+    for s in summaries:
+        floor = s["floor"]
+        for k, w, e in zip(s["keys"], s["weight"], s["error"]):
+            weight[k] = weight.get(k, total_floor) + w - floor
+            error[k] = error.get(k, total_floor) + e - floor
+    return _topk_truncate(weight, error, total_floor, capacity)
+
+
+def topk_frame(summary, limit=None):
+    """DataFrame of a summary: key, estimate (upper bound) and lower bound."""
+    frame = pd.DataFrame({"key": summary["keys"], "estimate": summary["weight"]})
+    frame["lower"] = frame["estimate"] - np.asarray(summary["error"], dtype=float)
+    return frame.head(limit) if limit else frame
+
+
+def topk_to_bytes(summary):
+    return json.dumps(summary, separators=(",", ":")).encode("utf-8")
+
+
+def topk_from_bytes(blob):
+    return json.loads(bytes(blob).decode("utf-8")) if blob else None
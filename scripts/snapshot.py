@@ -0,0 +1,282 @@
+# scripts/snapshot.py
+"""Month-partitioned columnar snapshot of the orders tables.
+
+`orders` and `order_items` are exported to one Arrow IPC file per order
+month under data/snapshot/. The files are memory-mapped on load, so opening
+a snapshot costs no MySQL round trip (text columns are still converted to
+Python strings), and the dashboard and analyze_views.py keep working with
+MySQL down. A refresh compares per-month signatures (row count, max id and
+a checksum over every column) with the manifest and only rewrites the
+months that changed.
+
+    python scripts/snapshot.py            # create / refresh
+    python scripts/snapshot.py --full     # rewrite every partition
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from decimal import Decimal
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+except ImportError:  # snapshots are optional
+    pa = None
+try:
+    from mysql.connector import FieldType
+except ImportError:
+    FieldType = None
+
+from cleaning import DATE_COLS, parse_dates
+
+SNAPSHOT_DIR = os.path.join("data", "snapshot")
+MANIFEST = "manifest.json"
+TABLES = ("orders", "order_items")
+# partition of orders without an order_date
+NO_DATE = "none"
+
+
+# -------------------------------
+# Reading
+# -------------------------------
+def read_manifest(snapshot_dir=SNAPSHOT_DIR):
+    """The snapshot's manifest, or None if there is no usable snapshot."""
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def available(snapshot_dir=SNAPSHOT_DIR):
+    return pa is not None and read_manifest(snapshot_dir) is not None
+
+
+def _read_partition(path, columns=None, exclude=None):
+    # the table's buffers point into the mapped file instead of being read into memory
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    if exclude:
+        table = table.drop_columns([c for c in exclude if c in table.column_names])
+    return table.select(columns) if columns else table
+
+
+def _read_table(table, snapshot_dir, columns=None, months=None, exclude=None):
+    manifest = read_manifest(snapshot_dir)
+    if pa is None or manifest is None:
+        return None
+    parts = [m for m in sorted(manifest["partitions"]) if months is None or m in months]
+    tables = [_read_partition(os.path.join(snapshot_dir, table, f"{m}.arrow"), columns, exclude) for m in parts
+              if os.path.exists(os.path.join(snapshot_dir, table, f"{m}.arrow"))]
+    # "permissive" also merges partitions written before they shared one schema (int64 vs double)
+    return pa.concat_tables(tables, promote_options="permissive") if tables else None
+
+
+def load_table(table="orders", snapshot_dir=SNAPSHOT_DIR, columns=None, months=None, exclude=None):
+    """Load `table` from the snapshot as a DataFrame (optionally only some columns / months, or without `exclude`)."""
+    data = _read_table(table, snapshot_dir, columns, months, exclude)
+    if data is None:
+        return pd.DataFrame(columns=columns)
+    return data.to_pandas(split_blocks=True)
+
+
+def load_by_id(ids, columns, table="orders", snapshot_dir=SNAPSHOT_DIR):
+    """`columns` of the rows with the given ids; only those rows are converted to pandas."""
+    data = _read_table(table, snapshot_dir, columns=list(dict.fromkeys(["id"] + list(columns))))
+    if data is None:
+        return pd.DataFrame(columns=columns)
+    return data.filter(pc.is_in(data["id"], value_set=pa.array([int(i) for i in ids], data["id"].type))).to_pandas()
+
+
+# -------------------------------
+# Writing / refresh
+# -------------------------------
+def _month_bounds(month):
+    start = pd.Timestamp(f"{month}-01")
+    return start.to_pydatetime(), (start + pd.offsets.MonthBegin(1)).to_pydatetime()
+
+
+_ARROW_TYPES = {
+    "TINY": "int64", "SHORT": "int64", "LONG": "int64", "INT24": "int64", "LONGLONG": "int64", "YEAR": "int64",
+    "DECIMAL": "float64", "NEWDECIMAL": "float64", "FLOAT": "float64", "DOUBLE": "float64",
+    "DATE": "timestamp", "NEWDATE": "timestamp", "DATETIME": "timestamp", "TIMESTAMP": "timestamp",
+    "VARCHAR": "string", "VAR_STRING": "string", "STRING": "string", "ENUM": "string", "JSON": "string",
+    "TINY_BLOB": "string", "MEDIUM_BLOB": "string", "LONG_BLOB": "string", "BLOB": "string",
+}
+
+
+def _column_types(description):
+    """{column: Arrow type} from the column types MySQL reports, so every month gets the same schema.
+
+    Inferred from one month's values instead, an INT column with a NULL in it
+    comes out as double there and int64 everywhere else.
+    """
+    if pa is None or FieldType is None:
+        return {}
+    types = {}
+    for d in description:
+        kind = _ARROW_TYPES.get(FieldType.get_info(d[1])) if isinstance(d[1], int) else None
+        if kind == "timestamp":
+            types[d[0]] = pa.timestamp("us")
+        elif kind is not None:
+            types[d[0]] = pa.string() if kind == "string" else pa.from_numpy_dtype(kind)
+    return types
+
+
+def _fetch(conn, sql, params=()):
+    """(rows as a DataFrame, {column: Arrow type} of the columns whose type MySQL reported)."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        columns = [d[0] for d in cursor.description]
+        types = _column_types(cursor.description)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    df = pd.DataFrame(rows, columns=columns)
+    # DECIMAL columns come back as Decimal objects; store them as float64
+    for col in df.columns:
+        sample = df[col].dropna().head(1)
+        if df[col].dtype == object and len(sample) and isinstance(sample.iloc[0], Decimal):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    # stored as timestamps so loading the snapshot needs no date parsing
+    for col in set(DATE_COLS + ["created_on"]) & set(df.columns):
+        df[col] = parse_dates(df[col])[0]
+    return df, types
+
+
+def _checksum(cursor, table, alias):
+    """SQL aggregate of a CRC32 over every column of each row, so any changed value changes it."""
+    cursor.execute("SELECT column_name, data_type FROM information_schema.columns "
+                   "WHERE table_schema = DATABASE() AND table_name = %s", (table,))
+    # NULL as CHAR(0): CONCAT_WS would skip it, and a value could then pass for its neighbour's
+    values = ", ".join(f"COALESCE({alias}.`{row[0]}`, CHAR(0))" for row in cursor.fetchall())
+    return f"BIT_XOR(CRC32(CONCAT_WS('|', {values})))"
+
+
+def partition_signatures(conn):
+    """{month: signature} of the live tables; a changed signature means a stale partition."""
+    month = f"COALESCE(DATE_FORMAT(o.order_date, '%Y-%m'), '{NO_DATE}')"
+    signatures = {}
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT {month}, COUNT(*), MAX(o.id), MAX(o.order_id), {_checksum(cursor, 'orders', 'o')} "
+                       "FROM orders o GROUP BY 1")
+        for row in cursor.fetchall():
+            signatures[row[0]] = [str(v) for v in row[1:]]
+        try:
+            cursor.execute(f"SELECT {month}, COUNT(*), {_checksum(cursor, 'order_items', 'i')} "
+                           "FROM order_items i JOIN orders o ON o.order_id = i.order_id GROUP BY 1")
+            for row in cursor.fetchall():
+                signatures.setdefault(row[0], []).extend(str(v) for v in row[1:])
+        except Exception:
+            pass  # loads from before order_items existed
+    finally:
+        cursor.close()
+    return signatures
+
+
+def _write_arrow(df, path, types=None):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if types:
+        table = table.cast(pa.schema([pa.field(f.name, types.get(f.name, f.type)) for f in table.schema]))
+    tmp = path + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def write_partition(conn, month, snapshot_dir=SNAPSHOT_DIR):
+    """Export one order month of orders and order_items."""
+    if month == NO_DATE:
+        where, params = "o.order_date IS NULL", ()
+    else:
+        where, params = "o.order_date >= %s AND o.order_date < %s", _month_bounds(month)
+    frames = {"orders": _fetch(conn, f"SELECT o.* FROM orders o WHERE {where} ORDER BY o.order_date", params)}
+    try:
+        frames["order_items"] = _fetch(
+            conn, f"SELECT i.* FROM order_items i JOIN orders o ON o.order_id = i.order_id WHERE {where}", params)
+    except Exception:
+        pass
+    for table, (df, types) in frames.items():
+        os.makedirs(os.path.join(snapshot_dir, table), exist_ok=True)
+        _write_arrow(df, os.path.join(snapshot_dir, table, f"{month}.arrow"), types)
+    return len(frames["orders"][0])
+
+
+def refresh(conn, snapshot_dir=SNAPSHOT_DIR, full=False):
+    """Bring the snapshot up to date; returns (months rewritten, months unchanged, months removed)."""
+    if pa is None:
+        raise ImportError("Snapshots need pyarrow (pip install pyarrow)")
+    manifest = (None if full else read_manifest(snapshot_dir)) or {"partitions": {}}
+    old, new = manifest["partitions"], partition_signatures(conn)
+
+    changed = sorted(m for m, sig in new.items() if old.get(m) != sig)
+    for month in changed:
+        rows = write_partition(conn, month, snapshot_dir)
+        print(f"   ↳ {month}: {rows} orders written")
+    removed = sorted(set(old) - set(new))
+    for month in removed:
+        for table in TABLES:
+            path = os.path.join(snapshot_dir, table, f"{month}.arrow")
+            if os.path.exists(path):
+                os.remove(path)
+
+    version = hashlib.sha1(json.dumps(new, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    manifest = {"partitions": new, "version": version, "refreshed_at": pd.Timestamp.now().isoformat(timespec="seconds")}
+    # written last: readers only ever see partitions the manifest vouches for
+    tmp = os.path.join(snapshot_dir, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(snapshot_dir, MANIFEST))
+    return changed, len(new) - len(changed), removed
+
+
+# -------------------------------
+# Reports from the snapshot (same shape as queries.REPORT_QUERIES)
+# -------------------------------
+def run_reports(snapshot_dir=SNAPSHOT_DIR):
+    orders = load_table("orders", snapshot_dir,
+                        columns=["order_date", "geoip.country_iso_code", "customer_full_name", "taxful_total_price"])
+    items = load_table("order_items", snapshot_dir, columns=["category", "quantity", "taxful_price"])
+    country = (orders.groupby("geoip.country_iso_code")["taxful_total_price"].sum()
+                     .rename("total_sales").rename_axis("country").reset_index()
+                     .sort_values("total_sales", ascending=False))
+    customers = (orders.groupby("customer_full_name")["taxful_total_price"].sum()
+                       .rename("total_spent").rename_axis("customer").reset_index()
+                       .sort_values("total_spent", ascending=False).head(10))
+    monthly = (orders.groupby(orders["order_date"].dt.strftime("%Y-%m"))["taxful_total_price"].sum()
+                     .rename("monthly_revenue").rename_axis("month").reset_index())
+    categories = (items.groupby("category")
+                       .agg(total_quantity_sold=("quantity", "sum"), total_revenue=("taxful_price", "sum"))
+                       .reset_index().sort_values("total_revenue", ascending=False).head(10))
+    return {"country_sales": country, "top_customers": customers,
+            "monthly_revenue": monthly, "top_categories": categories}
+
+
+def main():
+    import mysql.connector
+    from load_to_mysql import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description="Create or refresh the columnar snapshot of the orders tables.")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR, help="snapshot directory")
+    parser.add_argument("--full", action="store_true", help="rewrite every partition")
+    args = parser.parse_args()
+
+    started = time.time()
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        changed, unchanged, removed = refresh(conn, args.dir, full=args.full)
+    finally:
+        conn.close()
+    print(f"✅ Snapshot in {args.dir}: {len(changed)} month(s) rewritten, {unchanged} unchanged, "
+          f"{len(removed)} removed ({time.time() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
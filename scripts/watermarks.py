@@ -0,0 +1,114 @@
+# scripts/watermarks.py
+"""High-water marks for incremental loads.
+
+One row per source file records how far the last successful load got: the
+byte offset of the end of the data it read (plus a fingerprint of the bytes
+before it, so a rewritten file is detected) and the newest order_date /
+order_id seen. An incremental run resumes from the offset when the file was
+only appended to, and otherwise re-reads the file but skips orders older
+than the order_date mark. Rows are upserted on order_id either way, so a
+rerun never duplicates data.
+"""
+import hashlib
+import os
+
+import pandas as pd
+
+WATERMARK_TABLE = "etl_watermarks"
+
+# Bytes hashed at the start of a file to tell an append from a rewrite
+FINGERPRINT_BYTES = 65536
+
+
+def create_watermark_table(cursor):
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+        source VARCHAR(512) NOT NULL PRIMARY KEY,
+        file_offset BIGINT NOT NULL DEFAULT 0,
+        fingerprint CHAR(40),
+        last_order_date DATETIME,
+        last_order_id BIGINT,
+        rows_loaded BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    );
+    """)
+
+
+def get_watermark(cursor, source):
+    """Return the stored watermark of `source` as a dict, or None."""
+    cursor.execute(
+        f"SELECT file_offset, fingerprint, last_order_date, last_order_id, rows_loaded "
+        f"FROM {WATERMARK_TABLE} WHERE source = %s",
+        (source,),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    keys = ["file_offset", "fingerprint", "last_order_date", "last_order_id", "rows_loaded"]
+    return dict(zip(keys, row))
+
+
+def save_watermark(cursor, source, file_offset, fingerprint, last_order_date, last_order_id, rows_loaded):
+    """Advance the watermark; the order_date / order_id marks never move backwards."""
+    cursor.execute(
+        f"""
+        INSERT INTO {WATERMARK_TABLE}
+            (source, file_offset, fingerprint, last_order_date, last_order_id, rows_loaded)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            file_offset = VALUES(file_offset),
+            fingerprint = VALUES(fingerprint),
+            last_order_date = GREATEST(COALESCE(last_order_date, VALUES(last_order_date)), VALUES(last_order_date)),
+            last_order_id = GREATEST(COALESCE(last_order_id, VALUES(last_order_id)), VALUES(last_order_id)),
+            rows_loaded = rows_loaded + VALUES(rows_loaded)
+        """,
+        (source, file_offset, fingerprint, last_order_date, last_order_id, rows_loaded),
+    )
+
+
+def file_fingerprint(path, upto):
+    """SHA-1 of the first min(upto, FINGERPRINT_BYTES) bytes of `path`."""
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(min(upto, FINGERPRINT_BYTES))).hexdigest()
+
+
+def _ends_on_record_boundary(path, offset):
+    with open(path, "rb") as f:
+        f.seek(offset - 1)
+        return f.read(1) == b"\n"
+
+
+def _read_from(path, offset, columns, chunksize):
+    """Chunks of the CSV records after byte `offset`; the file is closed when the reader is."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        with pd.read_csv(f, header=None, names=columns, chunksize=chunksize) as reader:
+            yield from reader
+
+
+def open_incremental(path, chunksize, watermark):
+    """Open `path` for an incremental load.
+
+    Returns (reader, since, file_size): `reader` yields chunks of records not
+    yet loaded (None when there is nothing new) and `since` is an order_date
+    cut-off to apply to them (None when resuming from a byte offset). The
+    caller closes the reader.
+    """
+    file_size = os.path.getsize(path)
+    offset = watermark["file_offset"] if watermark else 0
+
+    appended = (
+        offset > 0
+        and file_size >= offset
+        and watermark["fingerprint"] == file_fingerprint(path, offset)
+        and _ends_on_record_boundary(path, offset)
+    )
+    if appended:
+        if file_size == offset:
+            return None, None, file_size
+        columns = pd.read_csv(path, nrows=0).columns.tolist()
+        return _read_from(path, offset, columns, chunksize), None, file_size
+
+    # New or rewritten file: parse it all, but skip orders the mark already covers
+    since = watermark["last_order_date"] if watermark else None
+    return pd.read_csv(path, chunksize=chunksize), since, file_size
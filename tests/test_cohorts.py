@@ -0,0 +1,37 @@
+# tests/test_cohorts.py
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import cohorts  # noqa: E402
+
+
+def _orders(rows):
+    return pd.DataFrame(rows, columns=["id", "customer_id", "order_date", "taxful_total_price"])
+
+
+def test_repeat_purchases_keeps_cohorts_after_a_month_without_new_customers():
+    # no customer starts in 2024-02, so the cohort rows are not numbered 0..n-1 before "All"
+    activity = cohorts.CustomerActivity().update(_orders([
+        (1, 1, "2024-01-05", 10.0), (2, 1, "2024-02-05", 10.0),
+        (3, 2, "2024-03-05", 20.0),
+        (4, 3, "2024-04-05", 30.0), (5, 3, "2024-04-20", 30.0),
+    ]))
+    table = cohorts.repeat_purchases(activity)
+    assert table["cohort"].tolist() == ["2024-01", "2024-03", "2024-04", "All"]
+    assert table["customers"].tolist() == [1, 1, 1, 3]
+    assert table["repeat_customers"].tolist() == [1, 0, 1, 2]
+
+
+def test_refresh_from_frame_rebuilds_when_rows_were_replaced():
+    orders = _orders([(1, 1, "2024-01-05", 10.0), (2, 2, "2024-01-06", 20.0)])
+    activity = cohorts.refresh_from_frame(orders)
+    # LOAD DATA ... REPLACE: order id 2 deleted and re-inserted as row 3
+    replaced = _orders([(1, 1, "2024-01-05", 10.0), (3, 2, "2024-01-06", 20.0)])
+    activity = cohorts.refresh_from_frame(replaced, activity)
+    assert activity.orders.sum() == 2
+    assert activity.revenue.sum() == 30.0
+    assert activity.last_id == 3
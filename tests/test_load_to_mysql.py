@@ -0,0 +1,48 @@
+# tests/test_load_to_mysql.py
+import os
+import sys
+from argparse import Namespace
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import bench_backend  # noqa: E402
+from load_to_mysql import _decode_products, load_chunks  # noqa: E402
+
+DATASET = os.path.join(os.path.dirname(__file__), "..", "data", "ecom_dataset.csv")
+
+
+def test_decode_products_rejects_splices_with_the_right_count():
+    # spliced, these decode to 3 elements, none of them the basket of its own order
+    values = ['[{"a":1}', '{"b":2}]', '{"c":3},{"d":4}']
+    assert _decode_products(values) == [[], [], []]
+
+
+def test_decode_products_rejects_splices_with_the_wrong_count():
+    values = ['[{"a":1}]', '[{"b":1}', '{"c":1}]', '[]']
+    assert _decode_products(values) == [[{"a": 1}], [], [], []]
+
+
+def test_decode_products_keeps_well_formed_baskets():
+    assert _decode_products(['[{"a":1}]', "", None, "[]"]) == [[{"a": 1}], [], [], []]
+
+
+def test_resuming_a_rewritten_file_keeps_orders_without_a_date(tmp_path, capsys):
+    conn = bench_backend.connect(str(tmp_path / "db.sqlite"))
+    cursor = conn.cursor()
+    args = Namespace(mode="batch", batch_size=100, no_rollups=False)
+    rows = pd.read_csv(DATASET, nrows=10)
+    load_chunks(conn, cursor, iter([rows.iloc[:5].copy()]), args)
+    assert "Created table" in capsys.readouterr().out
+
+    rewritten = rows.copy()
+    rewritten.loc[7, "order_date"] = "not a date"
+    since = pd.to_datetime(rows["order_date"]).min()
+    load_chunks(conn, cursor, iter([rewritten]), args, since=since)
+    assert "Created table" not in capsys.readouterr().out
+
+    cursor.execute("SELECT COUNT(*) FROM orders WHERE order_date IS NULL")
+    assert cursor.fetchone()[0] == 1
+    cursor.close()
+    conn.close()
@@ -0,0 +1,30 @@
+# tests/test_profiler.py
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from profiler import DatasetProfile  # noqa: E402
+
+
+def test_mixed_type_column_across_chunks():
+    profile = DatasetProfile()
+    profile.update(pd.DataFrame({"zip": [123, 456]}))
+    profile.update(pd.DataFrame({"zip": ["AB1", "CD2"]}))
+    column = profile.columns["zip"]
+    assert column.count == 4
+    assert (column.min, column.max) == ("123", "CD2")
+
+
+def test_mixed_type_column_across_shards():
+    numbers = DatasetProfile().update(pd.DataFrame({"zip": [123, 456]}))
+    text = DatasetProfile().update(pd.DataFrame({"zip": ["AB1", "CD2"]}))
+    column = text.merge(numbers).columns["zip"]
+    assert (column.min, column.max) == ("123", "CD2")
+
+
+def test_mixed_type_values_in_one_chunk():
+    profile = DatasetProfile().update(pd.DataFrame({"zip": pd.Series([123, "AB1"], dtype=object)}))
+    assert (profile.columns["zip"].min, profile.columns["zip"].max) == ("123", "AB1")
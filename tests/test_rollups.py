@@ -0,0 +1,41 @@
+# tests/test_rollups.py
+import os
+import sys
+from argparse import Namespace
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import bench_backend  # noqa: E402
+import rollups  # noqa: E402
+from load_to_mysql import load_chunks  # noqa: E402
+
+DATASET = os.path.join(os.path.dirname(__file__), "..", "data", "ecom_dataset.csv")
+
+
+def _stored_revenue(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT SUM(taxful_total_price), COUNT(*) FROM orders WHERE order_date IS NOT NULL")
+    revenue, orders = cursor.fetchone()
+    cursor.close()
+    return round(float(revenue), 2), orders
+
+
+def test_reloading_a_changed_order_keeps_rollup_totals_exact(tmp_path):
+    conn = bench_backend.connect(str(tmp_path / "db.sqlite"))
+    cursor = conn.cursor()
+    args = Namespace(mode="batch", batch_size=100, no_rollups=False)
+    rows = pd.read_csv(DATASET, nrows=50)
+    load_chunks(conn, cursor, iter([rows.copy()]), args)
+
+    # the same order exported again with a new total and moved to another month
+    changed = rows.iloc[[3]].copy()
+    changed["taxful_total_price"] = 1234.5
+    changed["order_date"] = (pd.to_datetime(changed["order_date"]) + pd.DateOffset(months=2)).astype(str)
+    load_chunks(conn, cursor, iter([changed]), args)
+
+    revenue, orders = rollups.totals(conn, "1900-01-01", "2999-12-31")
+    assert (round(revenue, 2), orders) == _stored_revenue(conn)
+    cursor.close()
+    conn.close()
@@ -0,0 +1,32 @@
+# tests/test_sampling.py
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import sampling  # noqa: E402
+
+
+def test_month_strata_codes_months_and_undated_rows():
+    dates = pd.Series(pd.to_datetime(["2020-01-31 23:00", None, "2019-12-01 00:00", "2020-03-01 00:00"]))
+    assert sampling.month_strata(dates).tolist() == [1, 4, 0, 3]
+
+
+def test_stratified_sample_takes_about_per_stratum_rows_and_small_strata_whole():
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame({"id": np.arange(1, 50_001), "value": rng.gamma(2.0, 40.0, 50_000)})
+    strata = np.r_[np.zeros(49_900, dtype=np.int64), np.ones(100, dtype=np.int64)]
+    sample = sampling.stratified_sample(frame, strata, sampling.sample_keys(frame["id"]), per_stratum=2000)
+
+    taken = sample.groupby("_stratum").size()
+    assert 1800 < taken[0] < 2200
+    assert taken[1] == 100
+    # the same ids always draw the same rows
+    again = sampling.stratified_sample(frame, strata, sampling.sample_keys(frame["id"]), per_stratum=2000)
+    assert sample["id"].tolist() == again["id"].tolist()
+
+    estimate = sampling.estimate_totals(sample.assign(group="all"), "group", "value").iloc[0]
+    assert abs(estimate["total"] - frame["value"].sum()) <= estimate["error"]